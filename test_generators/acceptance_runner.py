@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Reference runner for acceptance suites such as test_suites/prod_integration.json.
+
+Every TestCase sends one creative query through the ARS, built from its
+assets, which share input, predicate and qualifiers, and every TestAsset is
+then evaluated against the merged results by the rank of its output id:
+
+    TopAnswer         within the top TOP_ANSWER_CUTOFF results
+    Acceptable        anywhere in the results
+    BadButForgivable  always passes
+    NeverShow         not in the results
+
+One json line per asset is written with its rank and verdict. With --trace,
+the run is traced as suite -> test case -> query -> ARS submission, polls and
+ARA children, with an asset span per TestAsset for its evaluation, every span
+keyed by the ids of its suite, case and asset, so slow phases and slow ARAs
+of a nightly run can be found offline.
+
+Usage: python -m test_generators.acceptance_runner SUITE --endpoints endpoints.json [--case PATTERN] [--out records.jsonl] [--trace trace.jsonl]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+
+from test_generators import serialization
+from test_generators.performance_runner import (
+    ARS_COMPONENT,
+    RecordWriter,
+    RunnerConfig,
+    load_endpoints,
+    query_ars,
+    select_cases,
+)
+from test_generators.query_corpus import build_creative_query
+from test_generators.tracing import OtlpJsonFileExporter, Tracer
+
+logger = logging.getLogger(__name__)
+
+TOP_ANSWER_CUTOFF = 30
+
+
+def get_output_rank(message: Dict, query: Dict, output_id: str) -> Optional[int]:
+    """The 1-based rank of the first result binding output_id to the unpinned query node, None if absent."""
+    nodes = query["message"]["query_graph"]["nodes"]
+    output_node = next(key for key, node in nodes.items() if not node.get("ids"))
+    for rank, result in enumerate(message.get("results") or [], start=1):
+        bindings = (result.get("node_bindings") or {}).get(output_node) or []
+        if any(binding.get("id") == output_id for binding in bindings):
+            return rank
+    return None
+
+
+def evaluate(expected_output: Optional[str], rank: Optional[int]) -> bool:
+    """Whether an asset's output at rank (None for absent) meets its expected output."""
+    if expected_output == "TopAnswer":
+        return rank is not None and rank <= TOP_ANSWER_CUTOFF
+    if expected_output == "Acceptable":
+        return rank is not None
+    if expected_output == "NeverShow":
+        return rank is None
+    return True
+
+
+class AcceptanceRunner:
+    """Run the test cases of an acceptance suite through the ARS."""
+
+    def __init__(
+        self,
+        suite_json: Dict,
+        config: RunnerConfig,
+        records: RecordWriter,
+        tracer: Optional[Tracer] = None,
+        concurrency: int = 4,
+    ):
+        self.suite_json = suite_json
+        self.config = config
+        self.records = records
+        self.tracer = tracer or Tracer()
+        self.concurrency = concurrency
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def run(self, case_ids: List[str]) -> Dict[str, Dict]:
+        """Run the given cases, concurrency at a time, and return a summary per case."""
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def run_case(case_id: str) -> Dict:
+            async with slots:
+                return await self.run_case(self.suite_json["test_cases"][case_id])
+
+        async with httpx.AsyncClient(timeout=self.config.timeout, headers=self.config.headers) as self.client:
+            with self.tracer.suite_span(self.suite_json, len(case_ids)):
+                summaries = await asyncio.gather(*(run_case(case_id) for case_id in case_ids))
+        self.records.flush()
+        return dict(zip(case_ids, summaries))
+
+    async def run_case(self, test_case: Dict) -> Dict:
+        with self.tracer.test_case_span(test_case) as span:
+            summary = await self._run_case(test_case)
+            if "skipped" in summary:
+                span.add_event("skipped", {"reason": summary["skipped"]})
+            else:
+                span.set_attributes({"test_case.passed": summary["passed"], "test_case.assets": summary["assets"]})
+            return summary
+
+    async def _run_case(self, test_case: Dict) -> Dict:
+        case_id = test_case["id"]
+        if ARS_COMPONENT not in self.config.endpoints:
+            return {"skipped": "no ARS endpoint"}
+        assets = test_case.get("test_assets") or []
+        with self.tracer.span("construct_query"):
+            query = next(filter(None, (build_creative_query(asset) for asset in assets)), None)
+        if query is None:
+            logger.warning(f"Skipping {case_id}, its assets cannot make a query")
+            return {"skipped": "no query"}
+        logger.info(f"Running {case_id}")
+        with self.tracer.span("query") as span:
+            try:
+                record, response = await query_ars(self.client, self.tracer, self.config, query)
+                message = {}
+                if record["ok"]:
+                    message = response.json()["fields"]["data"]["message"]
+            except Exception as e:
+                record, message = {"ok": False, "error": f"{type(e).__name__}: {e}"}, {}
+            if not record["ok"]:
+                span.set_error(record.get("error") or f"ARS status {record.get('ars_status')}")
+            trace_ids = {"trace_id": span.trace_id, "span_id": span.span_id}
+        passed = 0
+        for asset in assets:
+            with self.tracer.asset_span(asset) as span:
+                rank = get_output_rank(message, query, asset["output_id"]) if record["ok"] else None
+                asset_passed = record["ok"] and evaluate(asset.get("expected_output"), rank)
+                span.set_attributes({"asset.rank": rank, "asset.passed": asset_passed})
+            passed += asset_passed
+            self.records.write(
+                {
+                    "case_id": case_id,
+                    "asset_id": asset["id"],
+                    "expected_output": asset.get("expected_output"),
+                    "rank": rank,
+                    "passed": asset_passed,
+                    "pk": record.get("pk"),
+                    "ars_status": record.get("ars_status"),
+                    "error": record.get("error"),
+                    **trace_ids,
+                }
+            )
+        return {"assets": len(assets), "passed": passed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an acceptance TestSuite through the ARS.")
+    parser.add_argument("suite", help="acceptance suite json")
+    parser.add_argument("--endpoints", help='json file with the ARS base URL, e.g. {"ars": "https://ars.ci.transltr.io"}')
+    parser.add_argument("--case", action="append", default=[], help="case id glob to run, may be repeated")
+    parser.add_argument("--out", default="acceptance_records.jsonl", help="per-asset records (json lines)")
+    parser.add_argument("--trace", help="write trace spans here (OTLP/JSON lines)")
+    parser.add_argument("--concurrency", type=int, default=4, help="test cases run at once")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--ars-poll-interval", type=float, default=5.0)
+    parser.add_argument("--ars-timeout", type=float, default=600.0, help="seconds to wait for an ARS query to finish")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.suite, "rb") as f:
+        suite_json = serialization.decode(f.read())
+    config = RunnerConfig(
+        endpoints=load_endpoints(args.endpoints),
+        timeout=args.timeout,
+        ars_poll_interval=args.ars_poll_interval,
+        ars_timeout=args.ars_timeout,
+    )
+    records = RecordWriter(args.out)
+    tracer = Tracer(OtlpJsonFileExporter(args.trace, service_name="acceptance_runner") if args.trace else None)
+    try:
+        runner = AcceptanceRunner(suite_json, config, records, tracer, args.concurrency)
+        summaries = asyncio.run(runner.run(select_cases(suite_json, args.case)))
+    finally:
+        records.close()
+        tracer.close()
+    for case_id, summary in summaries.items():
+        if "skipped" in summary:
+            print(f"{case_id}: skipped, {summary['skipped']}")
+        else:
+            print(f"{case_id}: {summary['passed']}/{summary['assets']} assets passed")
+    print(f"Wrote {records.count} records to {args.out}")
+    if args.trace:
+        print(f"Wrote {tracer.exporter.count} spans to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Columnar in-memory index of Test Assets for slicing them into suites.
+
+Assets are added from their raw json without validation. Every indexed column
+is an array of interned string ids, with a posting list of rows per distinct
+value. Each asset is kept as one compact json payload, zlib compressed against
+a preset dictionary taken from the first asset, which shrinks the repetitive
+asset json several fold. Queries return row numbers, and only the rows a suite
+actually needs are validated into models.
+
+from_source decodes, extracts and compresses the asset files in worker
+processes, the main process only interns their columns.
+"""
+from array import array
+import functools
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import zlib
+
+from test_generators import serialization
+from test_generators.asset_sources import AssetLoadReport, AssetSource, map_batched, parse_test_assets
+
+logger = logging.getLogger(__name__)
+
+INDEXED_COLUMNS = (
+    "input_id",
+    "predicate_name",
+    "qualifier_key",
+    "input_category",
+    "output_category",
+    "expected_output",
+    "test_reference",
+    "well_known",
+)
+# string id 0 stands for a missing value
+NONE_ID = 0
+
+
+def _column_value(value: Any) -> Optional[str]:
+    """A value as the columns store it: enums by their value, booleans as "true"/"false"."""
+    value = getattr(value, "value", value)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def _column_values(asset_json: Dict) -> Dict[str, Optional[str]]:
+    """Extract the indexed columns from an asset's json."""
+    qualifier_key = "".join(qualifier.get("value") or "" for qualifier in asset_json.get("qualifiers") or [])
+    test_reference = asset_json.get("test_reference") or (asset_json.get("test_metadata") or {}).get("test_reference")
+    well_known = asset_json.get("well_known")
+    return {
+        "input_id": asset_json.get("input_id"),
+        "predicate_name": asset_json.get("predicate_name"),
+        "qualifier_key": qualifier_key,
+        "input_category": asset_json.get("input_category"),
+        "output_category": asset_json.get("output_category"),
+        "expected_output": asset_json.get("expected_output"),
+        "test_reference": test_reference,
+        "well_known": None if well_known is None else str(bool(well_known)).lower(),
+    }
+
+
+def _compress(payload: bytes, zdict: bytes) -> bytes:
+    compressor = zlib.compressobj(zdict=zdict)
+    return compressor.compress(payload) + compressor.flush()
+
+
+def _index_asset_file(asset_file: Tuple[str, bytes], zdict: bytes):
+    """Decode one asset file into its columns, id and compressed payload. Runs inside pool workers."""
+    name, raw = asset_file
+    try:
+        asset_json = serialization.decode(raw)
+        payload = _compress(serialization.encode(asset_json, indent=None), zdict)
+        return name, (_column_values(asset_json), asset_json.get("id"), payload), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+class AssetIndex:
+    """Interned, array-backed asset columns with a posting list per value."""
+
+    def __init__(self):
+        self._strings: List[Optional[str]] = [None]
+        self._string_ids: Dict[str, int] = {}
+        self._columns: Dict[str, array] = {column: array("I") for column in INDEXED_COLUMNS}
+        self._postings: Dict[str, Dict[int, array]] = {column: {} for column in INDEXED_COLUMNS}
+        self._ids: array = array("I")
+        self._payloads: List[bytes] = []
+        self._zdict: Optional[bytes] = None
+        self._materialized: Dict[Tuple[type, int], object] = {}
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def _intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE_ID
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def add_json(self, asset_json: Dict) -> int:
+        """Add one asset from its decoded json and return its row number."""
+        payload = serialization.encode(asset_json, indent=None)
+        if self._zdict is None:
+            self._zdict = payload
+        return self._add_row(_column_values(asset_json), asset_json.get("id"), _compress(payload, self._zdict))
+
+    def _add_row(self, column_values: Dict[str, Optional[str]], asset_id: Optional[str], payload: bytes) -> int:
+        row = len(self._payloads)
+        for column, value in column_values.items():
+            string_id = self._intern(value)
+            self._columns[column].append(string_id)
+            self._postings[column].setdefault(string_id, array("I")).append(row)
+        self._ids.append(self._intern(asset_id))
+        self._payloads.append(payload)
+        return row
+
+    def _payload(self, row: int) -> bytes:
+        decompressor = zlib.decompressobj(zdict=self._zdict)
+        return decompressor.decompress(self._payloads[row]) + decompressor.flush()
+
+    @classmethod
+    def from_json(cls, asset_jsons: Iterable[Dict]) -> "AssetIndex":
+        index = cls()
+        for asset_json in asset_jsons:
+            index.add_json(asset_json)
+        return index
+
+    @classmethod
+    def from_source(
+        cls,
+        source: AssetSource,
+        asset_dir: str = "test_assets",
+        workers: int = 1,
+        report: Optional[AssetLoadReport] = None,
+    ) -> "AssetIndex":
+        """
+        Index every asset file in asset_dir, over a process pool with workers > 1 (or 0 for one per core).
+
+        Files that cannot be decoded are collected into report and logged once at the end.
+        """
+        index = cls()
+        if report is None:
+            report = AssetLoadReport()
+        asset_files = iter(source.iter_asset_files(asset_dir))
+        # the first asset becomes the compression dictionary the workers need
+        for name, raw in asset_files:
+            try:
+                index.add_json(serialization.decode(raw))
+            except Exception as e:
+                report.failures.append((name, str(e)))
+                continue
+            report.loaded += 1
+            break
+        index_file = functools.partial(_index_asset_file, zdict=index._zdict)
+        for name, row, error in map_batched(index_file, asset_files, workers):
+            if error is not None:
+                report.failures.append((name, error))
+            else:
+                index._add_row(*row)
+                report.loaded += 1
+        if report.failures:
+            logger.warning(report.summary())
+        return index
+
+    @classmethod
+    def from_assets(cls, test_assets: Iterable) -> "AssetIndex":
+        return cls.from_json(serialization.to_jsonable(test_asset) for test_asset in test_assets)
+
+    def select(self, **filters: Union[Any, Iterable[Any]]) -> List[int]:
+        """
+        Return the sorted rows matching every filter.
+
+        Each keyword is an indexed column, matched against a single value or
+        any of an iterable of values, e.g.
+        index.select(expected_output=["TopAnswer", "NeverShow"], predicate_name="treats", well_known=True)
+        Booleans, numbers and enums match the strings the columns store for them.
+        """
+        matches = None
+        for column, wanted in filters.items():
+            if column not in self._postings:
+                raise KeyError(f"{column} is not an indexed column, use one of {INDEXED_COLUMNS}")
+            if isinstance(wanted, str) or not isinstance(wanted, Iterable):
+                wanted = [wanted]
+            rows = set()
+            for value in map(_column_value, wanted):
+                string_id = NONE_ID if value is None else self._string_ids.get(value)
+                if string_id is not None:
+                    rows.update(self._postings[column].get(string_id, ()))
+            matches = rows if matches is None else matches & rows
+            if not matches:
+                return []
+        return sorted(range(len(self)) if matches is None else matches)
+
+    def value(self, column: str, row: int) -> Optional[str]:
+        return self._strings[self._columns[column][row]]
+
+    def values(self, column: str) -> Dict[Optional[str], int]:
+        """Distinct values of a column with their row counts."""
+        return {self._strings[string_id]: len(rows) for string_id, rows in self._postings[column].items()}
+
+    def asset_id(self, row: int) -> Optional[str]:
+        return self._strings[self._ids[row]]
+
+    def get_json(self, row: int) -> Dict:
+        return serialization.decode(self._payload(row))
+
+    def materialize(
+        self,
+        rows: Iterable[int],
+        asset_model,
+        workers: int = 1,
+        report: Optional[AssetLoadReport] = None,
+    ) -> List:
+        """Validate the given rows into asset_model instances, each row at most once."""
+        rows = list(rows)
+        missing = [row for row in rows if (asset_model, row) not in self._materialized]
+        if missing:
+            parsed = parse_test_assets(
+                ((str(row), self._payload(row)) for row in missing),
+                asset_model,
+                logger=logger,
+                workers=workers,
+                report=report,
+            )
+            parsed_by_id = {test_asset.id: test_asset for test_asset in parsed}
+            for row in missing:
+                test_asset = parsed_by_id.get(self.asset_id(row))
+                if test_asset is not None:
+                    self._materialized[(asset_model, row)] = test_asset
+        return [self._materialized[(asset_model, row)] for row in rows if (asset_model, row) in self._materialized]
+
+    def query(self, asset_model, **filters) -> List:
+        """Select and materialize in one step."""
+        return self.materialize(self.select(**filters), asset_model)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Asset sources for the Test Suite generators.
+
+Test Assets can be read from a local checkout of this repository, from a local
+archive of it, or from a URL pointing at such an archive. Archives are read
+member by member without being extracted, and downloaded archives are cached on
+disk so repeated runs work offline and skip the download when nothing changed.
+"""
+import concurrent.futures
+import functools
+import hashlib
+import itertools
+import json
+import logging
+import os
+from pathlib import Path, PurePosixPath
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import zipfile
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_ASSET_SOURCE = str(REPO_ROOT)
+ASSET_CACHE_DIR = Path(
+    os.environ.get("TRANSLATOR_TESTS_CACHE", Path.home() / ".cache" / "translator_tests")
+)
+
+logger = logging.getLogger(__name__)
+
+# files handed to the process pool per worker at a time
+PARSE_BATCH_PER_WORKER = 64
+
+
+def _is_asset_member(member: str, asset_dir: str) -> bool:
+    """Match archive members like <repo folder>/<asset_dir>/<name>.json."""
+    parts = PurePosixPath(member).parts
+    return (
+        len(parts) == 3
+        and parts[1] == asset_dir
+        and parts[2].endswith(".json")
+        and not parts[2].startswith(".")
+    )
+
+
+class AssetSource:
+    """Base class for anything that can provide Test Asset json files."""
+
+    def iter_asset_files(self, asset_dir: str) -> Iterator[Tuple[str, bytes]]:
+        """Yield (name, raw json bytes) for every json file in asset_dir."""
+        raise NotImplementedError
+
+    def iter_asset_json(self, asset_dir: str) -> Iterator[Tuple[str, Dict]]:
+        """Yield (name, decoded json) for every json file in asset_dir."""
+        for name, raw in self.iter_asset_files(asset_dir):
+            yield name, json.loads(raw)
+
+
+class LocalCheckoutSource(AssetSource):
+    """Read assets straight from a checkout of this repository."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def iter_asset_files(self, asset_dir: str) -> Iterator[Tuple[str, bytes]]:
+        for path in sorted((self.root / asset_dir).glob("*.json")):
+            if not path.name.startswith("."):
+                yield path.name, path.read_bytes()
+
+
+class ZipArchiveSource(AssetSource):
+    """Read assets from a local archive of this repository, e.g. main.zip."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def iter_asset_files(self, asset_dir: str) -> Iterator[Tuple[str, bytes]]:
+        """Read matching members straight out of the archive, without extracting it."""
+        with zipfile.ZipFile(self.path) as zip_ref:
+            members = sorted(
+                info.filename for info in zip_ref.infolist()
+                if _is_asset_member(info.filename, asset_dir)
+            )
+            for member in members:
+                yield PurePosixPath(member).name, zip_ref.read(member)
+
+
+class UrlArchiveSource(AssetSource):
+    """Download an archive of this repository, reusing the cached copy when unchanged."""
+
+    def __init__(self, url: str, cache_dir: Path = ASSET_CACHE_DIR):
+        assert Path(url).suffix == ".zip"
+        self.url = url
+        self.cache_dir = Path(cache_dir)
+        self._archive: Optional[ZipArchiveSource] = None
+
+    def _download(self) -> Path:
+        import httpx
+
+        url_key = hashlib.sha256(self.url.encode()).hexdigest()[:16]
+        download_dir = self.cache_dir / "downloads"
+        download_dir.mkdir(parents=True, exist_ok=True)
+        archive_path = download_dir / f"{url_key}.zip"
+        etag_path = download_dir / f"{url_key}.etag"
+
+        headers = {}
+        if archive_path.exists() and etag_path.exists():
+            headers["If-None-Match"] = etag_path.read_text().strip()
+        logger.info(f"Downloading tests from {self.url}...")
+        try:
+            with httpx.Client(follow_redirects=True) as client:
+                with client.stream("GET", self.url, headers=headers) as response:
+                    if response.status_code == 304:
+                        logger.info("Cached archive is up to date.")
+                        return archive_path
+                    response.raise_for_status()
+                    fd, tmp_path = tempfile.mkstemp(dir=download_dir, suffix=".zip")
+                    with os.fdopen(fd, "wb") as f:
+                        for chunk in response.iter_bytes():
+                            f.write(chunk)
+                    os.replace(tmp_path, archive_path)
+                    if response.headers.get("etag"):
+                        etag_path.write_text(response.headers["etag"])
+        except httpx.HTTPError as e:
+            if not archive_path.exists():
+                raise
+            logger.warning(f"Failed to download {self.url}, using cached archive: {e}")
+        return archive_path
+
+    def _archive_source(self) -> ZipArchiveSource:
+        if self._archive is None:
+            self._archive = ZipArchiveSource(self._download())
+        return self._archive
+
+    def iter_asset_files(self, asset_dir: str) -> Iterator[Tuple[str, bytes]]:
+        return self._archive_source().iter_asset_files(asset_dir)
+
+
+def get_asset_source(location: str = DEFAULT_ASSET_SOURCE) -> AssetSource:
+    """Pick an asset source for a repo checkout path, a local .zip or a .zip URL."""
+    if location.startswith(("http://", "https://")):
+        return UrlArchiveSource(location)
+    if Path(location).suffix == ".zip":
+        return ZipArchiveSource(location)
+    return LocalCheckoutSource(location)
+
+
+class AssetLoadReport:
+    """Outcome of a batched asset load: counts plus one entry per failed file."""
+
+    def __init__(self):
+        self.loaded = 0
+        self.filtered = 0
+        self.failures: List[Tuple[str, str]] = []
+
+    def summary(self) -> str:
+        lines = [f"Loaded {self.loaded} assets, filtered {self.filtered}, failed {len(self.failures)}"]
+        lines.extend(f"  {name}: {error}" for name, error in self.failures)
+        return "\n".join(lines)
+
+
+def _parse_asset_file(asset_file: Tuple[str, bytes], asset_model, expected_outputs):
+    """Decode and validate a single asset file. Runs inside pool workers."""
+    name, raw = asset_file
+    try:
+        asset_json = json.loads(raw)
+        name = asset_json.get("id", name)
+        test_asset = asset_model.model_validate(asset_json)
+    except Exception as e:
+        return name, None, str(e)
+    if expected_outputs is not None and test_asset.expected_output not in expected_outputs:
+        return name, None, None
+    return name, test_asset, None
+
+
+def _batches(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def map_batched(func, items: Iterable, workers: int = 1) -> Iterator:
+    """
+    Lazily apply a picklable func to items, yielding the results in input order.
+
+    With workers > 1 (or 0 for one per core) the calls are fanned out over a
+    process pool, PARSE_BATCH_PER_WORKER items per worker at a time, so only
+    one batch of items is held in memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for batch in _batches(items, workers * PARSE_BATCH_PER_WORKER):
+            if pool is None or len(batch) < 2:
+                yield from map(func, batch)
+            else:
+                yield from pool.map(func, batch, chunksize=max(1, len(batch) // (workers * 4)))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def iter_parsed_assets(
+    asset_files: Iterable[Tuple[str, bytes]],
+    asset_model,
+    expected_outputs: Optional[List[str]] = None,
+    logger: logging.Logger = logger,
+    workers: int = 1,
+    report: Optional[AssetLoadReport] = None,
+) -> Iterator:
+    """
+    Lazily decode and validate (name, raw json) pairs, keeping only the given expected outputs.
+
+    With workers > 1 (or 0 for one per core) decoding and validation are fanned
+    out over a process pool by map_batched, so only one batch of raw files is
+    held in memory. Assets come out in input order either way, and failures
+    are collected into report and logged once at the end.
+    """
+    if report is None:
+        report = AssetLoadReport()
+    parse = functools.partial(_parse_asset_file, asset_model=asset_model, expected_outputs=expected_outputs)
+    for name, test_asset, error in map_batched(parse, asset_files, workers):
+        if error is not None:
+            report.failures.append((name, error))
+        elif test_asset is None:
+            report.filtered += 1
+        else:
+            report.loaded += 1
+            yield test_asset
+    if report.failures:
+        logger.warning(report.summary())
+
+
+def parse_test_assets(
+    asset_files: Iterable[Tuple[str, bytes]],
+    asset_model,
+    expected_outputs: Optional[List[str]] = None,
+    logger: logging.Logger = logger,
+    workers: int = 1,
+    report: Optional[AssetLoadReport] = None,
+) -> List:
+    """All assets of iter_parsed_assets as a list."""
+    return list(iter_parsed_assets(asset_files, asset_model, expected_outputs, logger, workers, report))
+
+
+def iter_test_assets(
+    source: AssetSource,
+    asset_model,
+    asset_dir: str = "test_assets",
+    expected_outputs: Optional[List[str]] = None,
+    logger: logging.Logger = logger,
+    workers: int = 1,
+    report: Optional[AssetLoadReport] = None,
+) -> Iterator:
+    """Lazily parse every asset in asset_dir as it is read from the source, see iter_parsed_assets."""
+    return iter_parsed_assets(
+        source.iter_asset_files(asset_dir), asset_model, expected_outputs, logger, workers, report
+    )
+
+
+def load_test_assets(
+    source: AssetSource,
+    asset_model,
+    asset_dir: str = "test_assets",
+    expected_outputs: Optional[List[str]] = None,
+    logger: logging.Logger = logger,
+    workers: int = 1,
+    report: Optional[AssetLoadReport] = None,
+) -> List:
+    """All assets of iter_test_assets as a list."""
+    return list(iter_test_assets(source, asset_model, asset_dir, expected_outputs, logger, workers, report))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark for loading Test Assets with a growing number of pool workers.
+
+Usage: python -m test_generators.benchmark_asset_loading [asset source] [--repeat N]
+
+--repeat duplicates the asset corpus N times to approximate larger corpora.
+"""
+import argparse
+import os
+import time
+
+from translator_testing_model.datamodel.pydanticmodel import TestAsset
+
+from test_generators.asset_sources import (
+    DEFAULT_ASSET_SOURCE,
+    AssetSource,
+    AssetLoadReport,
+    get_asset_source,
+    load_test_assets,
+)
+
+
+class RepeatedSource(AssetSource):
+    """Serve every asset file of another source several times over."""
+
+    def __init__(self, source: AssetSource, repeat: int):
+        self.asset_files = {}
+        self.source = source
+        self.repeat = repeat
+
+    def iter_asset_files(self, asset_dir: str):
+        if asset_dir not in self.asset_files:
+            self.asset_files[asset_dir] = list(self.source.iter_asset_files(asset_dir))
+        for i in range(self.repeat):
+            for name, raw in self.asset_files[asset_dir]:
+                yield f"{i}_{name}", raw
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", default=DEFAULT_ASSET_SOURCE)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    source = RepeatedSource(get_asset_source(args.source), args.repeat)
+    # warm the file cache so only decoding and validation are measured
+    list(source.iter_asset_files("test_assets"))
+
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, 16, cpus} & set(range(1, cpus + 1)))
+    baseline = None
+    print(f"{'workers':>8} {'assets':>8} {'seconds':>9} {'speedup':>8}")
+    for workers in worker_counts:
+        report = AssetLoadReport()
+        start = time.perf_counter()
+        load_test_assets(source, TestAsset, workers=workers, report=report)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {report.loaded:>8} {elapsed:>9.3f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark encode/decode time and output size of the serialization backends
+on the existing test_suites/*.json files, both from their plain json and from
+the validated TestSuite model.
+
+Usage: python -m test_generators.benchmark_serialization [suite json files]
+"""
+import argparse
+import gzip
+import json
+from pathlib import Path
+import time
+
+from test_generators import serialization
+from test_generators.asset_sources import REPO_ROOT
+
+
+def _best_of(func, rounds: int = 3) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _load_model(suite: dict):
+    """The suite as a TestSuite model, or None if it does not validate."""
+    from pydantic import ValidationError
+    from translator_testing_model.datamodel.pydanticmodel import TestSuite
+
+    try:
+        return TestSuite.model_validate(suite)
+    except ValidationError:
+        return None
+
+
+def benchmark_file(path: Path) -> None:
+    raw = path.read_bytes()
+    suite = json.loads(raw)
+    rows = [
+        ("stdlib pretty", lambda: json.dumps(suite, ensure_ascii=False, indent=4).encode("utf-8"), json.loads),
+        ("stdlib compact", lambda: json.dumps(suite, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), json.loads),
+        ("backend pretty", lambda: serialization.encode(suite), serialization.decode),
+        ("backend indent=2", lambda: serialization.encode(suite, indent=2), serialization.decode),
+        ("backend compact", lambda: serialization.encode(suite, indent=None), serialization.decode),
+    ]
+    model = _load_model(suite)
+    if model is not None:
+        rows += [
+            ("model pretty", lambda: serialization.encode(model), serialization.decode),
+            ("model compact", lambda: serialization.encode(model, indent=None), serialization.decode),
+        ]
+    print(f"{path.name} ({len(raw) / 1e6:.2f} MB)")
+    for name, encode, decode in rows:
+        data = encode()
+        encode_ms = _best_of(encode) * 1000
+        decode_ms = _best_of(lambda: decode(data)) * 1000
+        gzip_size = len(gzip.compress(data, mtime=0))
+        sizes = f"{len(data) / 1e3:>9.1f} kB {gzip_size / 1e3:>8.1f} kB gz"
+        if serialization.zstandard is not None:
+            sizes += f" {len(serialization.compress(data, 'zstd')) / 1e3:>8.1f} kB zst"
+        print(f"  {name:<18} encode {encode_ms:>8.2f} ms  decode {decode_ms:>8.2f} ms  {sizes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", type=Path)
+    args = parser.parse_args()
+    print(f"orjson: {'yes' if serialization.orjson else 'no'}, zstandard: {'yes' if serialization.zstandard else 'no'}")
+    for path in args.files or sorted((REPO_ROOT / "test_suites").glob("*.json")):
+        benchmark_file(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Precomputed Biolink lookups for importing Test Assets from TSV snapshots.
+
+It maps predicate spellings to their Biolink predicate and qualifiers, and CURIE
+prefixes to categories. The index is built from a pinned Biolink release and
+kept next to this module as biolink_index_{version}.json, so once it exists
+loading it never touches the network. Only when the file is missing or holds
+another release is the bmt Toolkit constructed, which downloads the Biolink
+schema and predicate mapping, and the index is written out again. To rebuild it
+explicitly:
+
+python -m test_generators.biolink_index --rebuild
+"""
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BIOLINK_VERSION = "4.2.2"
+BIOLINK_BASE_URL = f"https://raw.githubusercontent.com/biolink/biolink-model/v{BIOLINK_VERSION}/"
+INDEX_PATH = Path(__file__).parent / f"biolink_index_{BIOLINK_VERSION}.json"
+
+logger = logging.getLogger(__name__)
+
+# Categories assigned to CURIE prefixes, in order of precedence for prefixes
+# that Biolink lists under several categories (e.g. MESH, UMLS, GO).
+CATEGORY_PRECEDENCE = [
+    "chemical entity",
+    "disease",
+    "phenotypic feature",
+    "gene",
+    "protein",
+    "biological process",
+    "molecular activity",
+    "pathway",
+    "cell",
+    "cellular component",
+    "anatomical entity",
+    "organism taxon",
+    "gene family",
+]
+# Prefixes pinned to a category regardless of Biolink id_prefixes
+CATEGORY_OVERRIDES = {
+    "NCBIGene": "biolink:Gene",
+    "MONDO": "biolink:Disease",
+    "UBERON": "biolink:AnatomicalEntity",
+    "HP": "biolink:PhenotypicFeature",
+    "DRUGBANK": "biolink:ChemicalEntity",
+    "CHEBI": "biolink:ChemicalEntity",
+}
+INDEX_SECTIONS = ("predicates", "categories")
+
+_toolkit = None
+_index = None
+
+
+def get_toolkit():
+    """Construct the bmt Toolkit for the pinned Biolink release on first use."""
+    global _toolkit
+    if _toolkit is None:
+        import bmt
+
+        logger.info(f"Loading Biolink {BIOLINK_VERSION}...")
+        _toolkit = bmt.Toolkit(
+            schema=f"{BIOLINK_BASE_URL}biolink-model.yaml",
+            predicate_map=f"{BIOLINK_BASE_URL}predicate_mapping.yaml",
+        )
+    return _toolkit
+
+
+def build_predicate_index(toolkit) -> Dict[str, List[Optional[str]]]:
+    """
+    Map every predicate spelling used in TSV snapshots to
+    [predicate, object aspect qualifier, object direction qualifier, qualified predicate].
+
+    Biolink element names and aliases take precedence over mapped predicates,
+    and the first mapping wins when a mapped predicate occurs more than once.
+    """
+    index = {}
+    for collection in toolkit.pmap.values():
+        for item in collection:
+            mapped_predicate = item.get("mapped predicate")
+            if mapped_predicate and mapped_predicate not in index:
+                index[mapped_predicate] = [
+                    item.get("predicate").replace(" ", "_"),
+                    item.get("object aspect qualifier"),
+                    item.get("object direction qualifier"),
+                    "biolink:" + item.get("qualified predicate"),
+                ]
+    for name in toolkit.get_all_elements():
+        element = toolkit.get_element(name)
+        if element is None:
+            continue
+        converted = [element.name.replace(" ", "_"), "", "", "biolink:" + element.name]
+        for key in [element.name, *(element.aliases or [])]:
+            index[key] = converted
+            index[key.replace(" ", "_")] = converted
+    return index
+
+
+def build_category_index(toolkit) -> Dict[str, str]:
+    """Map CURIE prefixes to a single Biolink category following CATEGORY_PRECEDENCE."""
+    index = dict(CATEGORY_OVERRIDES)
+    for category_name in CATEGORY_PRECEDENCE:
+        element = toolkit.get_element(category_name)
+        for prefix in element.id_prefixes or []:
+            index.setdefault(prefix, element.class_uri)
+    return index
+
+
+def build_index(toolkit) -> Dict:
+    return {
+        "biolink_version": BIOLINK_VERSION,
+        "predicates": build_predicate_index(toolkit),
+        "categories": build_category_index(toolkit),
+    }
+
+
+def rebuild_index(index_path=INDEX_PATH) -> Dict:
+    """Build the index from the pinned Biolink release (downloading it) and write it to index_path."""
+    global _index
+    _index = build_index(get_toolkit())
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_index, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, index_path)
+    logger.info(f"Wrote {index_path}")
+    return _index
+
+
+def _read_index(index_path) -> Optional[Dict]:
+    """The index stored at index_path, or None if it is missing or not for the pinned release."""
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    missing = [section for section in INDEX_SECTIONS if section not in index]
+    if missing or index.get("biolink_version") != BIOLINK_VERSION:
+        logger.warning(f"{index_path} does not hold the Biolink {BIOLINK_VERSION} index")
+        return None
+    return index
+
+
+def load_index(index_path=INDEX_PATH) -> Dict:
+    """Load the index snapshot, building and writing it with the bmt Toolkit on a miss."""
+    global _index
+    if _index is not None:
+        return _index
+    index = _read_index(index_path)
+    if index is None:
+        return rebuild_index(index_path)
+    _index = index
+    return _index
+
+
+def get_converted_predicate(specified_predicate: str) -> Tuple[str, str, str, str]:
+    """Resolve a TSV relationship to (predicate, aspect, direction, qualified predicate)."""
+    if specified_predicate == "decreases abundance or activity of":
+        specified_predicate = "decreases activity or abundance of"
+    predicates = load_index()["predicates"]
+    converted = predicates.get(specified_predicate) or predicates.get(specified_predicate.replace("biolink:", "", 1))
+    if converted is None:
+        return specified_predicate, "", "", ""
+    return tuple(converted)
+
+
+def get_category(curie: str) -> Optional[str]:
+    """Infer the Biolink category of a CURIE from its prefix."""
+    return load_index()["categories"].get(curie.split(":", 1)[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="download the pinned Biolink release and rebuild the index")
+    parser.add_argument("--output", type=Path, default=INDEX_PATH)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    if args.rebuild:
+        rebuild_index(args.output)
+    index = load_index(args.output)
+    print(
+        f"Biolink {index['biolink_version']}: {len(index['predicates'])} predicate spellings, "
+        f"{len(index['categories'])} category prefixes"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Adaptive search for the highest load a component sustains within an SLO.
+
+A capacity test case does not prescribe a load. The runner offers an
+open-loop rate for one stage, checks the observed latency and error rate
+against the SLO, and lets find_capacity choose the next rate: it multiplies
+the rate by step_factor until the SLO is breached (or max_rps is reached),
+then bisects between the last passing and the first failing rate until they
+are within resolution of each other. The last passing rate is the knee.
+"""
+from dataclasses import asdict, dataclass, field
+import math
+from typing import Callable, Dict, List, Optional, Sequence
+
+from test_generators.load_profiles import OPEN_LOOP_ARRIVALS, Stage
+
+
+@dataclass(frozen=True)
+class SLO:
+    """Limits a stage must stay within for its rate to count as sustainable."""
+
+    p95_latency: float = 10.0
+    max_error_rate: float = 0.01
+
+    def is_met(self, result: "StageResult") -> bool:
+        return result.p95_latency <= self.p95_latency and result.error_rate <= self.max_error_rate
+
+
+@dataclass(frozen=True)
+class StageResult:
+    """What the runner observed while offering target_rps for one stage."""
+
+    target_rps: float
+    num_queries: int
+    p95_latency: float
+    error_rate: float
+    achieved_rps: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class CapacitySearch:
+    """Parameters of the search, stored on a capacity test case."""
+
+    start_rps: float = 1.0
+    max_rps: float = 200.0
+    step_factor: float = 2.0
+    resolution: float = 0.1
+    stage_duration: float = 60.0
+    arrival: str = "poisson"
+    slo: SLO = field(default_factory=SLO)
+
+    def __post_init__(self):
+        if self.arrival not in OPEN_LOOP_ARRIVALS:
+            raise ValueError(f"A capacity search needs an open-loop arrival, one of {OPEN_LOOP_ARRIVALS}")
+        if self.step_factor <= 1:
+            raise ValueError("step_factor has to be greater than 1")
+        if not 0 < self.start_rps <= self.max_rps:
+            raise ValueError("start_rps has to be positive and at most max_rps")
+
+    def stage(self, target_rps: float) -> Stage:
+        return Stage(arrival=self.arrival, target_rps=target_rps, duration=self.stage_duration)
+
+    def max_stages(self) -> int:
+        """An upper bound on the number of stages a search runs."""
+        steps = math.ceil(math.log(self.max_rps / self.start_rps, self.step_factor)) + 1
+        gap = self.step_factor - 1
+        bisections = math.ceil(math.log2(gap / self.resolution)) if gap > self.resolution else 0
+        return steps + bisections
+
+    def to_json(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_json(cls, search_json: Dict) -> "CapacitySearch":
+        return cls(**{**search_json, "slo": SLO(**search_json.get("slo", {}))})
+
+
+@dataclass
+class CapacityResult:
+    """Outcome of a search: the knee rate and every stage run to find it."""
+
+    knee_rps: Optional[float]
+    saturated: bool
+    stages: List[StageResult]
+
+    def to_json(self) -> Dict:
+        return {
+            "knee_rps": self.knee_rps,
+            "saturated": self.saturated,
+            "stages": [asdict(stage) for stage in self.stages],
+        }
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """The q-th percentile (0-100) by the nearest-rank method."""
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize_stage(target_rps: float, latencies: Sequence[float], errors: int, elapsed: Optional[float] = None):
+    """Build a StageResult from the latencies of successful queries and the error count."""
+    num_queries = len(latencies) + errors
+    return StageResult(
+        target_rps=target_rps,
+        num_queries=num_queries,
+        # a stage where everything failed has no meaningful latency
+        p95_latency=percentile(latencies, 95) if latencies else math.inf,
+        error_rate=errors / num_queries if num_queries else 1.0,
+        achieved_rps=num_queries / elapsed if elapsed else None,
+    )
+
+
+def find_capacity(search: CapacitySearch, measure: Callable[[Stage], StageResult]) -> CapacityResult:
+    """
+    Run stages chosen by the search until the knee is found.
+
+    measure runs one stage against the component and reports what it saw.
+    saturated is False when even max_rps met the SLO, the knee is then only a
+    lower bound. knee_rps is None when start_rps already breached the SLO.
+    """
+    stages = []
+
+    def passes(target_rps: float) -> bool:
+        result = measure(search.stage(target_rps))
+        stages.append(result)
+        return search.slo.is_met(result)
+
+    passing, failing = None, None
+    target_rps = search.start_rps
+    while True:
+        if not passes(target_rps):
+            failing = target_rps
+            break
+        passing = target_rps
+        if target_rps >= search.max_rps:
+            return CapacityResult(knee_rps=passing, saturated=False, stages=stages)
+        target_rps = min(target_rps * search.step_factor, search.max_rps)
+
+    if passing is None:
+        return CapacityResult(knee_rps=None, saturated=True, stages=stages)
+    while (failing - passing) / passing > search.resolution:
+        target_rps = (passing + failing) / 2
+        if passes(target_rps):
+            passing = target_rps
+        else:
+            failing = target_rps
+    return CapacityResult(knee_rps=passing, saturated=True, stages=stages)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Seeded sampling of query CURIEs from a KP's pool of ids.
+
+Instead of sending the same truncated query over and over, every query of a
+performance test case gets its own CURIE set drawn from the ids the KP's
+backup query lists. A test case only stores a CurieSampling, the pool
+reference plus a seed, and a runner rebuilds the exact same queries from it:
+
+    sampler = CurieSampler.from_spec(CurieSampling.from_json(test_case["curie_sampling"]))
+    query = sampler.query(test_case["query"], query_index)
+
+Without replacement, queries walk seeded permutations of the pool, so no CURIE
+repeats before the whole pool has been used. With replacement, each query
+draws its CURIEs independently, optionally skewed towards a few popular ones
+by a Zipf distribution, which is closer to what caches see in production.
+"""
+from dataclasses import asdict, dataclass
+import copy
+import functools
+import hashlib
+import heapq
+import json
+import math
+import random
+from typing import Dict, List, Optional, Sequence
+
+from test_generators.asset_sources import REPO_ROOT
+
+POOL_DIR = REPO_ROOT / "test_generators" / "asset_backups"
+
+
+@dataclass(frozen=True)
+class CurieSampling:
+    """
+    How to fill the queries of a test case.
+
+    pool_ref is "<backup file>#<entry key>/<query node id>", the ids of that
+    node are the pool. zipf_exponent skews sampling with replacement towards
+    the first CURIEs of a seeded shuffle of the pool.
+    """
+
+    pool_ref: str
+    num_curies: int
+    seed: int
+    replacement: bool = False
+    zipf_exponent: Optional[float] = None
+
+    def __post_init__(self):
+        if self.num_curies < 1:
+            raise ValueError("num_curies has to be at least 1")
+        if self.zipf_exponent is not None and not self.replacement:
+            raise ValueError("A Zipf skew needs sampling with replacement")
+
+    @property
+    def node_id(self) -> str:
+        return self.pool_ref.rsplit("/", 1)[1]
+
+    def to_json(self) -> Dict:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+    @classmethod
+    def from_json(cls, sampling_json: Dict) -> "CurieSampling":
+        return cls(**sampling_json)
+
+
+def get_seed(*parts: str) -> int:
+    """A stable 32 bit seed derived from e.g. a test case id."""
+    return int.from_bytes(hashlib.sha256("\x1f".join(parts).encode("utf-8")).digest()[:4], "big")
+
+
+def get_pool_ref(backup_file: str, entry_key: str, query: Dict) -> str:
+    """Reference the query node with the most ids, the one the KP backup queries vary."""
+    nodes = query["message"]["query_graph"]["nodes"]
+    node_id = max(nodes, key=lambda node_id: len(nodes[node_id].get("ids") or []))
+    return f"{backup_file}#{entry_key}/{node_id}"
+
+
+@functools.lru_cache(maxsize=None)
+def _load_backup(path) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_pool(pool_ref: str, pool_dir=POOL_DIR) -> List[str]:
+    """The distinct ids a pool reference points at, in file order."""
+    backup_file, entry = pool_ref.split("#", 1)
+    entry_key, node_id = entry.rsplit("/", 1)
+    node = _load_backup(pool_dir / backup_file)[entry_key]["query"]["message"]["query_graph"]["nodes"][node_id]
+    return list(dict.fromkeys(node.get("ids") or []))
+
+
+class CurieSampler:
+    """Deterministically draw the CURIEs of query number query_index."""
+
+    def __init__(self, sampling: CurieSampling, pool: Sequence[str]):
+        if not pool:
+            raise ValueError(f"The pool {sampling.pool_ref} is empty")
+        if not sampling.replacement and sampling.num_curies > len(pool):
+            raise ValueError(f"Cannot draw {sampling.num_curies} distinct curies from {len(pool)}")
+        self.sampling = sampling
+        self.pool = list(pool)
+        self._permutation = functools.lru_cache(maxsize=2)(self._shuffled)
+        self._weights = None
+        if sampling.zipf_exponent is not None:
+            # popularity ranks are a seeded shuffle, not the order of the backup file
+            self.pool = self._shuffled(-1)
+            self._weights = [1 / rank ** sampling.zipf_exponent for rank in range(1, len(self.pool) + 1)]
+
+    @classmethod
+    def from_spec(cls, sampling: CurieSampling, pool_dir=POOL_DIR) -> "CurieSampler":
+        return cls(sampling, load_pool(sampling.pool_ref, pool_dir))
+
+    def _rng(self, *parts) -> random.Random:
+        return random.Random(":".join(str(part) for part in (self.sampling.seed, *parts)))
+
+    def _shuffled(self, epoch: int) -> List[str]:
+        permutation = list(self.pool)
+        self._rng("epoch", epoch).shuffle(permutation)
+        return permutation
+
+    def sample(self, query_index: int) -> List[str]:
+        num_curies = self.sampling.num_curies
+        if self.sampling.replacement:
+            rng = self._rng("query", query_index)
+            num_curies = min(num_curies, len(self.pool))
+            if self._weights is None:
+                return rng.sample(self.pool, num_curies)
+            # weighted sampling of distinct curies (Efraimidis-Spirakis), popular
+            # curies recur across queries rather than within one
+            keys = [math.log(1 - rng.random()) / weight for weight in self._weights]
+            top = heapq.nlargest(num_curies, range(len(self.pool)), key=keys.__getitem__)
+            return [self.pool[index] for index in top]
+        # consecutive slices of an endless sequence of seeded permutations
+        curies = {}
+        position = query_index * num_curies
+        while len(curies) < num_curies:
+            epoch, offset = divmod(position, len(self.pool))
+            taken = self._permutation(epoch)[offset:offset + num_curies - len(curies)]
+            # a slice spanning two permutations may repeat a curie
+            curies.update(dict.fromkeys(taken))
+            position += len(taken)
+        return list(curies)
+
+    def query(self, query_template: Dict, query_index: int) -> Dict:
+        """The template with the pooled node's ids replaced by the CURIEs of query_index."""
+        query = copy.deepcopy(query_template)
+        query["message"]["query_graph"]["nodes"][self.sampling.node_id]["ids"] = self.sample(query_index)
+        return query
@@ -1,5 +1,4 @@
 
-import bmt
 import csv
 import enum
 import json
@@ -17,7 +16,10 @@ from translator_testing_model.datamodel.pydanticmodel import (
 )
 from typing import Dict, List
 
-toolkit = bmt.Toolkit()
+from test_generators.asset_index import AssetIndex
+from test_generators.biolink_index import get_category, get_converted_predicate
+from test_generators import utils
+from test_generators.utils import dump_all_to_json, dump_to_json
 
 
 class SuiteNames(enum.Enum):
@@ -41,39 +43,6 @@ def parse_tsv(filename):
         return list(reader)
 
 
-def get_converted_predicate(specified_predicate, toolkit):
-    if specified_predicate == "decreases abundance or activity of":
-        specified_predicate = "decreases activity or abundance of"
-    element = toolkit.get_element(specified_predicate)
-    if element is not None:
-        return element.name.replace(" ", "_"), "", "", "biolink:" + element.name
-    else:
-        for collection in toolkit.pmap.values():
-            for item in collection:
-                if item.get("mapped predicate") == specified_predicate:
-                    return (
-                        item.get("predicate").replace(" ", "_"),
-                        item.get("object aspect qualifier"),
-                        item.get("object direction qualifier"),
-                        "biolink:" + item.get("qualified predicate"),
-                    )
-    return specified_predicate, "", "", ""
-
-
-def get_category(prefixes, id):
-    if id.startswith("NCBIGene:"):
-        return 'biolink:Gene'
-    elif id.startswith("MONDO:"):
-        return 'biolink:Disease'
-    elif id.startswith("UBERON:"):
-        return 'biolink:AnatomicalEntity'
-    elif id.startswith("HP:"):
-        return 'biolink:PhenotypicFeature'
-    elif id.startswith("DRUGBANK:") or id.startswith("CHEBI:") or any(id.startswith(prefix) for prefix in prefixes):
-        return 'biolink:ChemicalEntity'
-    return None
-
-
 def get_expected_output(row):
     output = row.get("Expected Result / Suggested Comparator")
     if output in ["4_NeverShow", "3_BadButForgivable", "2_Acceptable", "1_TopAnswer", "5_OverlyGeneric"]:
@@ -84,16 +53,15 @@ def get_expected_output(row):
 
 def create_test_asset(row):
     specified_predicate = row.get("Relationship").lower().strip()
-    converted_predicate, biolink_object_aspect_qualifier, biolink_object_direction_qualifier, biolink_qualified_predicate = get_converted_predicate(specified_predicate, toolkit)
+    converted_predicate, biolink_object_aspect_qualifier, biolink_object_direction_qualifier, biolink_qualified_predicate = get_converted_predicate(specified_predicate)
 
     expected_output = get_expected_output(row)
     if not expected_output:
         print(f"Asset id {row.get('id')} has no expected output")
         return None
 
-    chem_prefixes = toolkit.get_element("chemical entity").id_prefixes
-    input_category = get_category(chem_prefixes, row.get("InputID"))
-    output_category = get_category(chem_prefixes, row.get("OutputID"))
+    input_category = get_category(row.get("InputID"))
+    output_category = get_category(row.get("OutputID"))
 
     ta = TestAsset(
         id=row.get("id").replace(":", "_"),
@@ -139,74 +107,7 @@ def create_test_asset(row):
 
 
 def create_test_cases_from_test_assets(test_assets) -> Dict[str, TestCase]:
-    # Group test assets based on input_id and relationship
-    grouped_assets = {}
-    for test_asset in test_assets:
-        qualifier_key = ""
-        if test_asset.qualifiers and test_asset.qualifiers is not None:
-            for qualifier in test_asset.qualifiers:
-                qualifier_key = qualifier_key+qualifier.value
-        key = (test_asset.input_id, test_asset.predicate_name, qualifier_key)
-        if key not in grouped_assets:
-            grouped_assets[key] = []
-        grouped_assets[key].append(test_asset)
-
-    # Create test cases from grouped test assets
-    test_cases = {}
-    for idx, (key, assets) in enumerate(grouped_assets.items()):
-        test_case_id = f"TestCase_{idx}"
-        descriptions = '; '.join(asset.description for asset in assets)
-        first_asset = next(iter(assets))
-        test_case = TestCase(
-            id=test_case_id,
-            name="what " + key[1] + " " + key[0],
-            description=descriptions,
-            test_env=TestEnvEnum.ci,
-            components=[ComponentEnum.ars],
-            test_case_objective=TestObjectiveEnum.AcceptanceTest,
-            test_case_predicate_name=first_asset.predicate_name,
-            test_case_predicate_id=first_asset.predicate_id,
-            test_case_input_id=first_asset.input_id,
-            input_category=first_asset.input_category,
-            output_category=first_asset.output_category,
-            test_assets=assets,
-            test_runner_settings=["inferred"],
-            query_type=None,
-            trapi_template=None,
-            test_case_source=None,
-        )
-        if test_case.test_assets is None:
-            print("test case has no assets", test_case)
-
-        if test_case.test_case_objective == "AcceptanceTest":
-            test_input_id = ""
-            test_case_predicate_name = ""
-            test_case_qualifiers = []
-            input_category = ""
-            output_category = ""
-            for asset in assets:
-                # these all assume group by applies to the same input_id and predicate_name
-                test_input_id = asset.input_id
-                test_case_predicate_name = asset.predicate_name
-                test_case_qualifiers = asset.qualifiers
-                input_category = asset.input_category
-                output_category = asset.output_category
-
-            test_case.test_case_input_id = test_input_id
-            test_case.test_case_predicate_name = test_case_predicate_name
-            test_case.test_case_predicate_id = "biolink:" + test_case_predicate_name
-            test_case.qualifiers = test_case_qualifiers
-            test_case.input_category = input_category
-            test_case.output_category = output_category
-            test_cases[test_case_id] = test_case
-
-    return test_cases
-
-
-def dump_to_json(file_path, test_object):
-    filename = f"{file_path}/{test_object.id}.json"
-    with open(f"{filename}", 'w', encoding='utf-8') as file:
-        json.dump(test_object.dict(), file, ensure_ascii=False, indent=4)
+    return utils.create_test_cases_from_test_assets(test_assets, TestEnvEnum.ci)
 
 
 # Functions to create TestAssets, TestCases, and TestSuite
@@ -246,18 +147,14 @@ def main():
 
     print(len(test_cases.values()))
 
-    for i, item in enumerate(test_cases.values()):
-        dump_to_json("../test_cases", item)
-
-    for i, item in enumerate(test_assets):
-        dump_to_json("../test_assets", item)
+    legacy_ids = utils.replace_legacy_test_cases("../test_cases", test_cases.values())
+    utils.update_legacy_id_map("../legacy_test_case_ids/test_cases.json", legacy_ids)
+    dump_all_to_json("../test_assets", test_assets, remove_orphans=True)
 
     suite_id = "sprint_4_tests"
-    suite_test_assets = []
     # trim test assets for specific suite
-    for test_asset in test_assets:
-        if test_asset.expected_output == "TopAnswer":
-            suite_test_assets.append(test_asset)
+    asset_index = AssetIndex.from_assets(test_assets)
+    suite_test_assets = asset_index.query(TestAsset, expected_output="TopAnswer")
     suite_test_cases = create_test_cases_from_test_assets(suite_test_assets)
 
     # Assemble into a TestSuite
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Generate any number of TestSuites from the Test Assets in a single pass.
+
+Every suite is described by an entry in SUITES. Assets are indexed once per
+asset directory, each suite is sliced out of that index, and every asset is
+validated at most once however many suites use it.
+
+Usage: python -m test_generators.generate_suites [suite_id ...] [--source PATH_OR_URL]
+"""
+import argparse
+from dataclasses import dataclass
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from test_generators.asset_index import AssetIndex
+from test_generators.asset_sources import DEFAULT_ASSET_SOURCE, REPO_ROOT, get_asset_source
+from test_generators.serialization import COMPRESSIONS, to_jsonable
+from test_generators.suite_bundle import verify_bundle, write_bundle
+from test_generators.suite_store import (
+    DEFAULT_STORE_ROOT,
+    apply_overlay,
+    collect_garbage,
+    write_normalized_suite,
+    write_suite_overlay,
+)
+
+logger = logging.getLogger(__name__)
+
+# old TestCase_{index} ids of each suite mapped to their stable ids
+LEGACY_ID_DIR = "legacy_test_case_ids"
+ALL_EXPECTED_OUTPUTS = ("TopAnswer", "Acceptable", "BadButForgivable", "NeverShow")
+
+
+@dataclass(frozen=True)
+class SuiteSpec:
+    """Declarative description of one generated TestSuite."""
+
+    suite_id: str
+    description: str
+    test_env: str
+    expected_outputs: Tuple[str, ...] = ALL_EXPECTED_OUTPUTS
+    asset_model: str = "TestAsset"
+    asset_dir: str = "test_assets"
+    grouping: str = "create_test_cases_from_test_assets"
+    grouping_key: str = "get_grouping_key"
+    suite_dir: str = "test_suites"
+    case_dir: Optional[str] = None
+    # a suite with the same assets that this one only overrides test_env of
+    base: Optional[str] = None
+
+
+SUITES: Dict[str, SuiteSpec] = {
+    spec.suite_id: spec
+    for spec in [
+        SuiteSpec(
+            suite_id="sprint_5_tests",
+            description="Sprint 5 TopAnswer and NeverShow tests",
+            test_env="ci",
+            expected_outputs=("TopAnswer", "NeverShow"),
+        ),
+        SuiteSpec(
+            suite_id="sprint_6_tests",
+            description="Sprint 6 tests",
+            test_env="ci",
+        ),
+        SuiteSpec(
+            suite_id="prod_integration",
+            description="PROD Integration Tests",
+            test_env="prod",
+        ),
+        SuiteSpec(
+            suite_id="test_integration",
+            description="TEST Integration Tests",
+            test_env="test",
+            base="prod_integration",
+        ),
+        SuiteSpec(
+            suite_id="pathfinder_tests",
+            description="Pathfinder tests",
+            test_env="ci",
+            asset_model="PathfinderTestAsset",
+            asset_dir="pathfinder_test_assets",
+            grouping="create_pathfinder_test_cases_from_test_assets",
+            grouping_key="get_pathfinder_grouping_key",
+            case_dir="pathfinder_test_cases",
+        ),
+    ]
+}
+
+
+def build_test_suite(spec: SuiteSpec, suite_assets: List):
+    """Group the suite's assets into TestCases and wrap them in a TestSuite."""
+    from translator_testing_model.datamodel.pydanticmodel import (
+        TestSuite,
+        TestMetadata,
+        TestPersonaEnum,
+        TestSourceEnum,
+        TestObjectiveEnum,
+        TestEnvEnum,
+    )
+    from test_generators import utils
+
+    create_test_cases = getattr(utils, spec.grouping)
+    test_cases = create_test_cases(suite_assets, TestEnvEnum(spec.test_env))
+
+    # Assemble into a TestSuite
+    tmd = TestMetadata(
+        id="1",
+        name=None,
+        description=spec.description,
+        test_source=TestSourceEnum.SMURF,
+        test_objective=TestObjectiveEnum.AcceptanceTest,
+        test_reference=None,
+    )
+    return TestSuite(
+        id=spec.suite_id,
+        name=spec.suite_id,
+        description=spec.description,
+        test_persona=TestPersonaEnum.All,
+        test_suite_specification=None,
+        test_cases=test_cases,
+        test_metadata=tmd,
+    )
+
+
+def build_overlay_suite(spec: SuiteSpec, base_suite):
+    """Derive an environment copy of a base suite without regrouping its assets."""
+    from translator_testing_model.datamodel.pydanticmodel import TestSuite
+
+    overlay = {
+        "id": spec.suite_id,
+        "base": base_suite.id,
+        "suite": {"id": spec.suite_id, "name": spec.suite_id, "description": spec.description},
+        "test_cases": {"test_env": spec.test_env},
+    }
+    overlay["suite"]["test_metadata"] = {**to_jsonable(base_suite.test_metadata), "description": spec.description}
+    return overlay, TestSuite.model_validate(apply_overlay(to_jsonable(base_suite), overlay))
+
+
+def generate_suites(
+    suite_ids: Iterable[str],
+    source: str = DEFAULT_ASSET_SOURCE,
+    workers: int = 0,
+    output_root=REPO_ROOT,
+    store_root=None,
+    bundle_path=None,
+    **dump_options,
+) -> None:
+    """
+    Index the assets once and write every requested suite, see dump_to_json for dump_options.
+
+    With a store_root, every suite is also written to that normalized suite store,
+    suites with a base as overlays of it. With a bundle_path, all of them are also
+    packed into one suite bundle, which is verified against the written json.
+    """
+    from translator_testing_model.datamodel import pydanticmodel
+    from test_generators import utils
+    from test_generators.utils import dump_to_json
+
+    asset_source = get_asset_source(source)
+    asset_indexes = {}
+    built_suites = {}
+
+    def get_suite(spec: SuiteSpec):
+        if spec.suite_id in built_suites:
+            return built_suites[spec.suite_id]
+        if spec.base is not None:
+            overlay, suite = build_overlay_suite(spec, get_suite(SUITES[spec.base])[1])
+        else:
+            if spec.asset_dir not in asset_indexes:
+                asset_indexes[spec.asset_dir] = AssetIndex.from_source(asset_source, spec.asset_dir, workers)
+            asset_index = asset_indexes[spec.asset_dir]
+            suite_assets = asset_index.materialize(
+                asset_index.select(expected_output=spec.expected_outputs),
+                getattr(pydanticmodel, spec.asset_model),
+                workers=workers,
+            )
+            overlay, suite = None, build_test_suite(spec, suite_assets)
+        built_suites[spec.suite_id] = overlay, suite
+        return overlay, suite
+
+    for suite_id in suite_ids:
+        spec = SUITES[suite_id]
+        overlay, new_suite = get_suite(spec)
+
+        grouping_key = getattr(utils, spec.grouping_key)
+        suite_path = output_root / spec.suite_dir / f"{spec.suite_id}.json"
+        legacy_ids = {}
+        if suite_path.exists():
+            with open(suite_path, encoding="utf-8") as f:
+                legacy_ids = utils.get_legacy_id_mapping(json.load(f).get("test_cases") or {}, grouping_key)
+
+        dump_to_json(output_root / spec.suite_dir, new_suite, **dump_options)
+        if spec.case_dir is not None:
+            legacy_ids.update(
+                utils.replace_legacy_test_cases(
+                    output_root / spec.case_dir,
+                    new_suite.test_cases.values(),
+                    grouping_key,
+                    **dump_options,
+                )
+            )
+        if legacy_ids:
+            utils.update_legacy_id_map(output_root / LEGACY_ID_DIR / f"{spec.suite_id}.json", legacy_ids)
+        if store_root is not None:
+            if overlay is not None:
+                if spec.base not in suite_ids:
+                    write_normalized_suite(get_suite(SUITES[spec.base])[1], store_root, sweep=False, **dump_options)
+                write_suite_overlay(overlay, store_root, sweep=False, **dump_options)
+            else:
+                write_normalized_suite(new_suite, store_root, sweep=False, **dump_options)
+        logger.info(f"Wrote {spec.suite_id} with {len(new_suite.test_cases)} test cases")
+    if store_root is not None:
+        logger.info(f"Deleted {collect_garbage(store_root)} unreferenced files from {store_root}")
+
+    if bundle_path is not None:
+        base_ids = [suite_id for suite_id, (overlay, _) in built_suites.items() if overlay is None]
+        counts = write_bundle(
+            bundle_path,
+            [built_suites[suite_id][1] for suite_id in base_ids],
+            [overlay for overlay, _ in built_suites.values() if overlay is not None],
+        )
+        mismatches = [
+            suite_id
+            for suite_id in suite_ids
+            if verify_bundle(bundle_path, output_root / SUITES[suite_id].suite_dir, [suite_id])
+        ]
+        if mismatches:
+            raise ValueError(f"Bundle {bundle_path} does not match the json of {', '.join(mismatches)}")
+        logger.info(f"Wrote bundle {bundle_path} with {counts}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate TestSuites from Test Assets.")
+    parser.add_argument("suites", nargs="*", metavar="suite_id", help="suites to generate (default: all)")
+    parser.add_argument("--source", default=DEFAULT_ASSET_SOURCE, help="repo checkout, .zip archive or .zip URL")
+    parser.add_argument("--workers", type=int, default=0, help="asset parsing processes (default: one per core)")
+    parser.add_argument("--compact", action="store_true", help="write compact instead of indented json")
+    parser.add_argument(
+        "--compress",
+        action="append",
+        default=[],
+        choices=sorted(COMPRESSIONS),
+        help="also write a compressed sibling of every file, may be repeated",
+    )
+    parser.add_argument(
+        "--normalized",
+        nargs="?",
+        const=DEFAULT_STORE_ROOT,
+        type=Path,
+        help=f"also write a reference-based suite store (default: {DEFAULT_STORE_ROOT.name}/)",
+    )
+    parser.add_argument("--bundle", type=Path, help="also pack the suites into this bundle file")
+    parser.add_argument("--list", action="store_true", help="list the available suites and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for spec in SUITES.values():
+            base = f" (overlay of {spec.base})" if spec.base else ""
+            print(f"{spec.suite_id}\t{spec.test_env}\t{spec.description}{base}")
+        return
+    unknown = [suite_id for suite_id in args.suites if suite_id not in SUITES]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.INFO)
+    generate_suites(
+        args.suites or list(SUITES),
+        args.source,
+        args.workers,
+        store_root=args.normalized,
+        bundle_path=args.bundle,
+        indent=None if args.compact else 4,
+        compressions=args.compress,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Fixed-size, mergeable latency histogram with HDR Histogram bucketing.
+
+Latencies are counted in integer microseconds in log-linear buckets: values
+below 2 * 10^significant_figures get a bucket each, and every further power
+of two is split into as many sub-buckets, so any recorded value is known to
+within 10^-significant_figures of itself. Memory depends only on the
+configured range, not on how many values were recorded, and histograms with
+the same configuration merge by adding their counts, so workers can record
+separately and be combined into exact-as-configured percentiles afterwards.
+"""
+import math
+from typing import Dict, Iterator, List, Optional, Tuple
+
+UNIT = 1e-6
+DEFAULT_HIGHEST_TRACKABLE = 3600.0
+DEFAULT_SIGNIFICANT_FIGURES = 2
+
+
+class LatencyHistogram:
+    """Counts of latencies in seconds, up to highest_trackable seconds."""
+
+    def __init__(
+        self,
+        highest_trackable: float = DEFAULT_HIGHEST_TRACKABLE,
+        significant_figures: int = DEFAULT_SIGNIFICANT_FIGURES,
+    ):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.highest_trackable = highest_trackable
+        self.significant_figures = significant_figures
+        self._highest_value = max(1, round(highest_trackable / UNIT))
+        sub_bucket_count = 1 << math.ceil(math.log2(2 * 10**significant_figures))
+        self._sub_bucket_half_magnitude = sub_bucket_count.bit_length() - 2
+        self._sub_bucket_half = sub_bucket_count >> 1
+        self.counts: List[int] = [0] * (self._index(self._highest_value) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, value: int) -> int:
+        bucket = max(0, value.bit_length() - self._sub_bucket_half_magnitude - 1)
+        sub_bucket = value >> bucket
+        return (bucket + 1) * self._sub_bucket_half + sub_bucket - self._sub_bucket_half
+
+    def _bucket_range(self, index: int) -> Tuple[int, int]:
+        """Lowest and highest value, in units, counted in bucket index."""
+        bucket = (index >> self._sub_bucket_half_magnitude) - 1
+        sub_bucket = (index & (self._sub_bucket_half - 1)) + self._sub_bucket_half
+        if bucket < 0:
+            sub_bucket -= self._sub_bucket_half
+            bucket = 0
+        lowest = sub_bucket << bucket
+        return lowest, lowest + (1 << bucket) - 1
+
+    def record(self, latency: float, count: int = 1) -> None:
+        """Count latency seconds count times, values out of range count in the top bucket."""
+        value = min(max(0, round(latency / UNIT)), self._highest_value)
+        self.counts[self._index(value)] += count
+        self.total += count
+        self.sum += latency * count
+        self.min = latency if self.min is None else min(self.min, latency)
+        self.max = latency if self.max is None else max(self.max, latency)
+
+    def _check_compatible(self, other: "LatencyHistogram") -> None:
+        if (self.highest_trackable, self.significant_figures) != (other.highest_trackable, other.significant_figures):
+            raise ValueError("Cannot merge histograms with different ranges or precision")
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """Add the counts of other to this histogram and return it."""
+        self._check_compatible(other)
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    @classmethod
+    def merged(cls, histograms: List["LatencyHistogram"]) -> "LatencyHistogram":
+        """A new histogram with the counts of all histograms, which share a configuration."""
+        if not histograms:
+            return cls()
+        result = cls(histograms[0].highest_trackable, histograms[0].significant_figures)
+        for histogram in histograms:
+            result.merge(histogram)
+        return result
+
+    def __len__(self) -> int:
+        return self.total
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.total if self.total else None
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        The nearest-rank percentile in seconds, as the highest value equivalent
+        to the bucket it falls in, kept within the recorded min and max.
+        """
+        if not self.total:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * self.total))
+        if rank >= self.total:
+            return self.max
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                value = self._bucket_range(index)[1] * UNIT
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self, percentiles=(50, 95, 99)) -> Dict[str, Optional[float]]:
+        return {f"p{percentile:g}": self.percentile(percentile) for percentile in percentiles}
+
+    def iter_values(self) -> Iterator[Tuple[float, int]]:
+        """(representative latency in seconds, count) per non-empty bucket, in increasing order."""
+        for index, count in enumerate(self.counts):
+            if count:
+                lowest, highest = self._bucket_range(index)
+                yield (lowest + highest) / 2 * UNIT, count
+
+    def to_json(self) -> Dict:
+        return {
+            "highest_trackable": self.highest_trackable,
+            "significant_figures": self.significant_figures,
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            # sparse [index, count] pairs
+            "counts": [[index, count] for index, count in enumerate(self.counts) if count],
+        }
+
+    @classmethod
+    def from_json(cls, histogram_json: Dict) -> "LatencyHistogram":
+        histogram = cls(histogram_json["highest_trackable"], histogram_json["significant_figures"])
+        for index, count in histogram_json["counts"]:
+            histogram.counts[index] = count
+        histogram.total = histogram_json["total"]
+        histogram.sum = histogram_json["sum"]
+        histogram.min = histogram_json["min"]
+        histogram.max = histogram_json["max"]
+        return histogram
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Declarative load profiles for performance TestCases.
+
+A profile is a sequence of stages. Each stage runs for a duration or a number
+of queries and drives load in one of three ways:
+
+    closed     a fixed number of concurrent workers, each sending its next
+               query think_time seconds after the previous one completed
+    constant   an open loop sending target_rps queries per second at even
+               intervals, regardless of how fast responses come back
+    poisson    an open loop with exponentially distributed gaps averaging
+               target_rps queries per second, like independent users
+
+Open-loop stages keep sending while the system under test slows down, so
+queueing shows up in the latencies instead of being hidden by fewer requests
+(coordinated omission).
+"""
+from dataclasses import asdict, dataclass
+import math
+from typing import Dict, Optional, Tuple
+
+ARRIVAL_MODELS = ("closed", "constant", "poisson")
+OPEN_LOOP_ARRIVALS = ("constant", "poisson")
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One phase of a load profile, see the module docstring for the arrival models."""
+
+    arrival: str = "closed"
+    duration: Optional[float] = None
+    num_queries: Optional[int] = None
+    concurrency: Optional[int] = None
+    target_rps: Optional[float] = None
+    think_time: float = 0.0
+
+    def __post_init__(self):
+        if self.arrival not in ARRIVAL_MODELS:
+            raise ValueError(f"Unknown arrival model {self.arrival}, use one of {ARRIVAL_MODELS}")
+        if self.duration is None and self.num_queries is None:
+            raise ValueError("A stage needs a duration or a number of queries")
+        if self.arrival == "closed" and not self.concurrency:
+            raise ValueError("A closed stage needs a concurrency")
+        if self.arrival in OPEN_LOOP_ARRIVALS and not self.target_rps:
+            raise ValueError(f"A {self.arrival} stage needs a target_rps")
+
+    def expected_queries(self) -> Optional[int]:
+        """The number of queries the stage sends, None if it depends on response times."""
+        if self.num_queries is not None:
+            return self.num_queries
+        if self.arrival in OPEN_LOOP_ARRIVALS:
+            return math.ceil(self.duration * self.target_rps)
+        return None
+
+    def to_json(self) -> Dict:
+        return {field: value for field, value in asdict(self).items() if value is not None}
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    """A named sequence of stages, run one after another."""
+
+    name: str
+    stages: Tuple[Stage, ...]
+
+    def legacy_fields(self) -> Optional[Dict]:
+        """
+        The num_queries/concurrent fields of runners that predate profiles, or
+        None if such a runner cannot run this profile.
+
+        Those runners only send a number of queries one after another or all at once.
+        """
+        if len(self.stages) != 1:
+            return None
+        stage = self.stages[0]
+        if stage.arrival != "closed" or stage.num_queries is None or stage.duration is not None or stage.think_time:
+            return None
+        if stage.concurrency == 1:
+            return {"num_queries": stage.num_queries, "concurrent": False}
+        if stage.concurrency >= stage.num_queries:
+            return {"num_queries": stage.num_queries, "concurrent": True}
+        return None
+
+    def expected_queries(self) -> Optional[int]:
+        counts = [stage.expected_queries() for stage in self.stages]
+        return None if None in counts else sum(counts)
+
+    def duration(self) -> Optional[float]:
+        durations = [stage.duration for stage in self.stages]
+        return None if None in durations else sum(durations)
+
+    def to_json(self) -> Dict:
+        return {"name": self.name, "stages": [stage.to_json() for stage in self.stages]}
+
+    @classmethod
+    def from_json(cls, profile_json: Dict) -> "LoadProfile":
+        return cls(name=profile_json["name"], stages=tuple(Stage(**stage) for stage in profile_json["stages"]))
+
+
+def sequential(num_queries: int, think_time: float = 0.0) -> LoadProfile:
+    """num_queries queries one after another, the legacy sequential test."""
+    return LoadProfile(
+        name=f"sequential_{num_queries}",
+        stages=(Stage(arrival="closed", concurrency=1, num_queries=num_queries, think_time=think_time),),
+    )
+
+
+def concurrent(num_queries: int) -> LoadProfile:
+    """num_queries queries all sent at once, the legacy concurrent test."""
+    return LoadProfile(
+        name=f"concurrent_{num_queries}",
+        stages=(Stage(arrival="closed", concurrency=num_queries, num_queries=num_queries),),
+    )
+
+
+def constant_rate(target_rps: float, duration: float, arrival: str = "poisson") -> LoadProfile:
+    """A steady open-loop rate, e.g. a soak test."""
+    return LoadProfile(
+        name=f"{arrival}_{target_rps:g}rps_{duration:g}s",
+        stages=(Stage(arrival=arrival, target_rps=target_rps, duration=duration),),
+    )
+
+
+def ramp(start_rps: float, end_rps: float, duration: float, steps: int = 5, arrival: str = "poisson") -> LoadProfile:
+    """An open-loop rate climbing from start_rps to end_rps in equal steps over duration seconds."""
+    if steps < 1:
+        raise ValueError("A ramp needs at least one step")
+    increment = 0 if steps == 1 else (end_rps - start_rps) / (steps - 1)
+    return LoadProfile(
+        name=f"{arrival}_ramp_{start_rps:g}-{end_rps:g}rps_{duration:g}s",
+        stages=tuple(
+            Stage(arrival=arrival, target_rps=start_rps + step * increment, duration=duration / steps)
+            for step in range(steps)
+        ),
+    )
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for KPs, ARAs and the ARS, for running performance cases offline.
+
+Every component gets a TRAPI query endpoint at /<component>/query, e.g. one
+per infores of the KP backup file plus "ara", and the ARS flow is served at
+/ars/api/submit and /ars/api/messages/<pk>. How each component behaves is
+configured by a ComponentModel:
+
+    latency          a LatencyModel drawing the service time of a query,
+                     plus per_curie seconds for every CURIE of the query
+    base_bytes,      response size, padded with dummy results
+    bytes_per_curie
+    error_rate       share of queries answered with error_status
+    max_concurrency  queries processed at once; the rest wait for a slot,
+                     or get a 429 with overload="reject"
+
+For the ARS, the latency is the time a submitted message stays Running, and
+failed messages end up with status Error. max_concurrency limits the messages
+Running at once: a message submitted while all slots are taken starts once
+one frees up, or is answered with a 429 with overload="reject". Polling a
+message with ?trace=y returns its status and one child message per agent of
+ARS_AGENTS, each done after a random share of the message's latency.
+
+Usage: python -m test_generators.mock_trapi_server [--config mock.json] [--port 8765] [--endpoints-out endpoints.json]
+"""
+import argparse
+from dataclasses import asdict, dataclass, field
+import heapq
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from test_generators.curie_sampler import POOL_DIR
+
+logger = logging.getLogger(__name__)
+
+KP_BACKUP_FILE = "kp_performance_tests_2024_10_18.json"
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+OVERLOAD_POLICIES = ("queue", "reject")
+ARS_COMPONENT = "ars"
+# the ARAs an ARS message fans out to
+ARS_AGENTS = ("ara-aragorn", "ara-arax", "ara-bte", "ara-improving", "ara-unsecret")
+# approximate size of one padding result
+RESULT_BYTES = 200
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """
+    Service time in seconds: fixed at median, uniform within median +- spread,
+    exponential with mean median, or lognormal with median median and shape sigma.
+    """
+
+    distribution: str = "lognormal"
+    median: float = 0.1
+    spread: float = 0.0
+    sigma: float = 0.5
+    per_curie: float = 0.0
+
+    def __post_init__(self):
+        if self.distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {self.distribution}, use one of {LATENCY_DISTRIBUTIONS}")
+
+    def sample(self, rng: random.Random, num_curies: int = 0) -> float:
+        if self.distribution == "fixed":
+            latency = self.median
+        elif self.distribution == "uniform":
+            latency = rng.uniform(self.median - self.spread, self.median + self.spread)
+        elif self.distribution == "exponential":
+            latency = rng.expovariate(1 / self.median) if self.median > 0 else 0.0
+        else:
+            latency = rng.lognormvariate(0, self.sigma) * self.median
+        return max(0.0, latency + self.per_curie * num_curies)
+
+
+@dataclass(frozen=True)
+class ComponentModel:
+    """How one mocked component answers, see the module docstring."""
+
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    base_bytes: int = 1000
+    bytes_per_curie: int = 2000
+    error_rate: float = 0.0
+    error_status: int = 500
+    max_concurrency: Optional[int] = None
+    overload: str = "queue"
+
+    def __post_init__(self):
+        if self.overload not in OVERLOAD_POLICIES:
+            raise ValueError(f"Unknown overload policy {self.overload}, use one of {OVERLOAD_POLICIES}")
+
+    @classmethod
+    def from_json(cls, model_json: Dict) -> "ComponentModel":
+        return cls(**{**model_json, "latency": LatencyModel(**model_json.get("latency", {}))})
+
+    def to_json(self) -> Dict:
+        return asdict(self)
+
+
+def load_components(config: Optional[Dict] = None) -> Dict[str, ComponentModel]:
+    """
+    A model per component: every infores of the KP backup file, "ara" and "ars".
+
+    config is {"default": {...}, "components": {"infores:spoke": {...}}}, where
+    component entries override the default field by field.
+    """
+    config = config or {}
+    with open(POOL_DIR / KP_BACKUP_FILE, encoding="utf-8") as f:
+        components = [kp["infores"] for kp in json.load(f).values()]
+    overrides = config.get("components", {})
+    components.extend(component for component in ["ara", ARS_COMPONENT, *overrides] if component not in components)
+    default = config.get("default", {})
+    models = {}
+    for component in components:
+        override = overrides.get(component, {})
+        latency = {**default.get("latency", {}), **override.get("latency", {})}
+        models[component] = ComponentModel.from_json({**default, **override, "latency": latency})
+    return models
+
+
+def count_curies(query: Dict) -> int:
+    nodes = query.get("message", {}).get("query_graph", {}).get("nodes", {})
+    return sum(len(node.get("ids") or []) for node in nodes.values())
+
+
+def build_response(query: Dict, size: int) -> bytes:
+    """A TRAPI response echoing the query graph, padded to about size bytes."""
+    query_graph = query.get("message", {}).get("query_graph", {})
+    results = [
+        {"node_bindings": {}, "analyses": [{"resource_id": "infores:mock", "edge_bindings": {}, "score": index}]}
+        for index in range(max(0, size // RESULT_BYTES))
+    ]
+    message = {"query_graph": query_graph, "knowledge_graph": {"nodes": {}, "edges": {}}, "results": results}
+    return json.dumps({"message": message}).encode("utf-8")
+
+
+class _Component:
+    """Runtime state of a mocked component."""
+
+    def __init__(self, name: str, model: ComponentModel, seed: int):
+        self.name = name
+        self.model = model
+        self.rng = random.Random(f"{seed}:{name}")
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(model.max_concurrency) if model.max_concurrency else None
+        self.requests = 0
+        self.rejected = 0
+
+    def draw(self, num_curies: int):
+        """Service time and whether the query fails."""
+        with self.lock:
+            self.requests += 1
+            return self.model.latency.sample(self.rng, num_curies), self.rng.random() < self.model.error_rate
+
+    def acquire(self) -> bool:
+        if self.slots is None:
+            return True
+        if self.slots.acquire(blocking=self.model.overload == "queue"):
+            return True
+        with self.lock:
+            self.rejected += 1
+        return False
+
+    def release(self) -> None:
+        if self.slots is not None:
+            self.slots.release()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes, with Nagle's algorithm the
+    # body waits for the client's delayed ACK, adding ~40 ms to every response
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, obj) -> None:
+        self._send(status, json.dumps(obj).encode("utf-8"))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            query = json.loads(body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"detail": "invalid json"})
+        parts = [unquote(part) for part in self.path.strip("/").split("/")]
+        if parts == ["ars", "api", "submit"]:
+            message = self.server.submit_ars(query)
+            if message is None:
+                return self._send_json(429, {"detail": "too many running messages"})
+            return self._send_json(200, message)
+        if len(parts) == 2 and parts[1] == "query" and parts[0] in self.server.components:
+            return self._query(self.server.components[parts[0]], query)
+        self._send_json(404, {"detail": f"no endpoint {self.path}"})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts[:3] == ["ars", "api", "messages"] and len(parts) == 4:
+            trace = parse_qs(url.query).get("trace") == ["y"]
+            message = self.server.poll_ars(parts[3], trace)
+            if message is None:
+                return self._send_json(404, {"detail": f"no message {parts[3]}"})
+            return self._send_json(200, message)
+        self._send_json(404, {"detail": f"no endpoint {self.path}"})
+
+    def _query(self, component: _Component, query: Dict) -> None:
+        if not component.acquire():
+            return self._send_json(429, {"detail": "too many concurrent queries"})
+        try:
+            num_curies = count_curies(query)
+            latency, failed = component.draw(num_curies)
+            time.sleep(latency)
+        finally:
+            component.release()
+        if failed:
+            return self._send_json(component.model.error_status, {"detail": "mock failure"})
+        model = component.model
+        self._send(200, build_response(query, model.base_bytes + model.bytes_per_curie * num_curies))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # performance cases open hundreds of connections at once
+    request_queue_size = 1024
+
+    def __init__(self, address, components: Dict[str, _Component]):
+        super().__init__(address, _Handler)
+        self.components = components
+        self.ars_messages: Dict[str, Dict] = {}
+        self.ars_lock = threading.Lock()
+        # when the messages holding the ARS's max_concurrency slots finish, as a heap
+        self.ars_slots: List[float] = []
+        self.pks = itertools.count(1)
+
+    def _start_ars_message(self, ars: _Component, latency: float) -> Optional[float]:
+        """Take a slot for a message and return when it starts running, or None if it is rejected."""
+        now = time.monotonic()
+        max_concurrency = ars.model.max_concurrency
+        if not max_concurrency:
+            return now
+        while self.ars_slots and self.ars_slots[0] <= now:
+            heapq.heappop(self.ars_slots)
+        start = now
+        if len(self.ars_slots) >= max_concurrency:
+            if ars.model.overload == "reject":
+                return None
+            start = heapq.heappop(self.ars_slots)
+        heapq.heappush(self.ars_slots, start + latency)
+        return start
+
+    def submit_ars(self, query: Dict) -> Optional[Dict]:
+        """Store a new message, None if it is rejected for lack of a slot."""
+        ars = self.components[ARS_COMPONENT]
+        num_curies = count_curies(query)
+        latency, failed = ars.draw(num_curies)
+        with ars.lock:
+            shares = [ars.rng.random() for _ in ARS_AGENTS]
+        with self.ars_lock:
+            start = self._start_ars_message(ars, latency)
+            if start is None:
+                with ars.lock:
+                    ars.rejected += 1
+                return None
+            pk = f"mock-{next(self.pks)}"
+            self.ars_messages[pk] = {
+                "done_at": start + latency,
+                "children_done_at": {agent: start + latency * share for agent, share in zip(ARS_AGENTS, shares)},
+                "failed": failed,
+                "query": query,
+                "size": ars.model.base_bytes + ars.model.bytes_per_curie * num_curies,
+            }
+        return {"pk": pk, "fields": {"status": "Running"}}
+
+    def poll_ars(self, pk: str, trace: bool = False) -> Optional[Dict]:
+        with self.ars_lock:
+            message = self.ars_messages.get(pk)
+        if message is None:
+            return None
+        if trace:
+            return self._trace_ars(pk, message)
+        if time.monotonic() < message["done_at"]:
+            return {"pk": pk, "fields": {"status": "Running"}}
+        if message["failed"]:
+            return {"pk": pk, "fields": {"status": "Error"}}
+        response = json.loads(build_response(message["query"], message["size"]))
+        return {"pk": pk, "fields": {"status": "Done", "data": response}}
+
+    @staticmethod
+    def _status(done_at: float, failed: bool) -> str:
+        if time.monotonic() < done_at:
+            return "Running"
+        return "Error" if failed else "Done"
+
+    def _trace_ars(self, pk: str, message: Dict) -> Dict:
+        """The ?trace=y view of a message: its status and those of its ARA children, without results."""
+        children = []
+        for index, (agent, done_at) in enumerate(message["children_done_at"].items()):
+            status = self._status(done_at, message["failed"])
+            children.append(
+                {
+                    "message": f"{pk}-{index}",
+                    "status": status,
+                    "actor": {"agent": agent},
+                    "code": {"Running": 202, "Done": 200, "Error": 500}[status],
+                    "result_count": message["size"] // RESULT_BYTES if status == "Done" else None,
+                }
+            )
+        return {"message": pk, "status": self._status(message["done_at"], message["failed"]), "children": children}
+
+
+class MockTrapiServer:
+    """Serve mocked components from a background thread."""
+
+    def __init__(self, models: Dict[str, ComponentModel], host: str = "127.0.0.1", port: int = 0, seed: int = 0):
+        components = {name: _Component(name, model, seed) for name, model in models.items()}
+        self.server = _Server((host, port), components)
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def endpoints(self) -> Dict[str, str]:
+        """Component -> URL, in the format of performance_runner --endpoints."""
+        endpoints = {
+            name: f"{self.base_url}/{quote(name, safe='')}/query"
+            for name in self.server.components
+            if name != ARS_COMPONENT
+        }
+        endpoints[ARS_COMPONENT] = self.base_url
+        return endpoints
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"requests": component.requests, "rejected": component.rejected}
+            for name, component in self.server.components.items()
+            if component.requests or component.rejected
+        }
+
+    def start(self) -> "MockTrapiServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockTrapiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve mock KP, ARA and ARS endpoints.")
+    parser.add_argument("--config", help='json file: {"default": {...}, "components": {"infores:spoke": {...}}}')
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--endpoints-out", help="write the endpoints for performance_runner --endpoints here")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    config = None
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = json.load(f)
+    mock = MockTrapiServer(load_components(config), args.host, args.port, args.seed)
+    if args.endpoints_out:
+        with open(args.endpoints_out, "w", encoding="utf-8") as f:
+            json.dump(mock.endpoints(), f, indent=2)
+    logger.info(f"Serving {len(mock.server.components)} mock components at {mock.base_url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"Requests served: {mock.stats()}")
+        mock.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
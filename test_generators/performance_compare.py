@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Statistical comparison of two performance runs, for gating deployments.
+
+Baseline and candidate are PerformanceResults (results json files or runner
+records), and every (case id, component) present in both is compared on the
+latencies of its successful queries:
+
+    percentiles   baseline and candidate p50/p95/p99, and a bootstrap
+                  confidence interval of their difference
+    rank test     Mann-Whitney U with tie correction, two-sided p-value
+    effect size   Cliff's delta, P(candidate slower) - P(candidate faster),
+                  with the usual negligible/small/medium/large magnitudes
+    errors        two-proportion z-test of the error rates
+
+A case regressed when the rank test is significant, Cliff's delta is at
+least min_effect towards slower, and the bootstrap interval of the gated
+percentile's difference lies above zero, or when its error rate is
+significantly higher. Everything works on the histogram buckets, the
+bootstrap resamples bucket counts with Poisson weights, so the cost does not
+grow with the number of queries.
+
+Usage: python -m test_generators.performance_compare --baseline OLD... --candidate NEW... [--out comparison.json]
+Exits with 1 if any case regressed.
+"""
+import argparse
+from dataclasses import asdict, dataclass
+import json
+import logging
+import math
+import random
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from test_generators.latency_histogram import LatencyHistogram
+from test_generators.performance_results import CaseResult, PerformanceResults, load_results
+
+logger = logging.getLogger(__name__)
+
+# Romano et al. thresholds of |Cliff's delta|
+EFFECT_MAGNITUDES = ((0.147, "negligible"), (0.33, "small"), (0.474, "medium"), (1.0, "large"))
+
+
+@dataclass(frozen=True)
+class ComparisonSettings:
+    """How strict the comparison is."""
+
+    alpha: float = 0.01
+    min_effect: float = 0.147
+    confidence: float = 0.95
+    resamples: int = 1000
+    min_queries: int = 10
+    percentiles: Tuple[float, ...] = (50, 95, 99)
+    gate_percentile: float = 95
+    seed: int = 0
+
+
+def effect_magnitude(delta: float) -> str:
+    for threshold, magnitude in EFFECT_MAGNITUDES:
+        if abs(delta) < threshold:
+            return magnitude
+    return "large"
+
+
+def _normal_p_value(z: float) -> float:
+    """Two-sided p-value of a standard normal z."""
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def _check_compatible(baseline: LatencyHistogram, candidate: LatencyHistogram) -> None:
+    if (baseline.highest_trackable, baseline.significant_figures) != (
+        candidate.highest_trackable,
+        candidate.significant_figures,
+    ):
+        raise ValueError("Cannot compare histograms with different ranges or precision")
+
+
+def mann_whitney(baseline: LatencyHistogram, candidate: LatencyHistogram) -> Tuple[float, float, float]:
+    """
+    U statistic of the candidate, z and two-sided p-value, using the normal
+    approximation with tie correction; values sharing a bucket are ties.
+    """
+    _check_compatible(baseline, candidate)
+    n1, n2 = baseline.total, candidate.total
+    u = 0.0
+    below = 0
+    ties = 0
+    for base_count, cand_count in zip(baseline.counts, candidate.counts):
+        if cand_count:
+            u += cand_count * (below + 0.5 * base_count)
+        tied = base_count + cand_count
+        ties += tied**3 - tied
+        below += base_count
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return u, 0.0, 1.0
+    mean = n1 * n2 / 2
+    # continuity correction towards the mean
+    z = (u - mean - math.copysign(0.5, u - mean)) / math.sqrt(variance) if u != mean else 0.0
+    return u, z, _normal_p_value(z)
+
+
+def cliffs_delta(u: float, n1: int, n2: int) -> float:
+    """P(candidate > baseline) - P(candidate < baseline) from the candidate's U."""
+    return 2 * u / (n1 * n2) - 1
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    if mean >= 30:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    # Knuth's method, fine for small means
+    limit = math.exp(-mean)
+    count = 0
+    product = rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def _weighted_percentiles(
+    values: Sequence[float], counts: Sequence[int], percentiles: Sequence[float]
+) -> Optional[List[float]]:
+    """Nearest-rank percentiles, in increasing order, of values repeated counts times."""
+    total = sum(counts)
+    if not total:
+        return None
+    ranks = [max(1, math.ceil(percentile / 100 * total)) for percentile in percentiles]
+    results = []
+    seen = 0
+    for value, count in zip(values, counts):
+        seen += count
+        while len(results) < len(ranks) and seen >= ranks[len(results)]:
+            results.append(value)
+    return results + [values[-1]] * (len(ranks) - len(results))
+
+
+def bootstrap_percentile_differences(
+    baseline: LatencyHistogram,
+    candidate: LatencyHistogram,
+    percentiles: Sequence[float],
+    settings: ComparisonSettings,
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Confidence interval of candidate minus baseline per percentile, in
+    increasing order, from a Poisson bootstrap of the buckets.
+    """
+    rng = random.Random(settings.seed)
+    base_values, base_counts = zip(*baseline.iter_values())
+    cand_values, cand_counts = zip(*candidate.iter_values())
+    differences: Dict[float, List[float]] = {percentile: [] for percentile in percentiles}
+    for _ in range(settings.resamples):
+        base_sample = [_poisson(rng, count) for count in base_counts]
+        cand_sample = [_poisson(rng, count) for count in cand_counts]
+        base_percentiles = _weighted_percentiles(base_values, base_sample, percentiles)
+        cand_percentiles = _weighted_percentiles(cand_values, cand_sample, percentiles)
+        if base_percentiles is not None and cand_percentiles is not None:
+            for percentile, base_value, cand_value in zip(percentiles, base_percentiles, cand_percentiles):
+                differences[percentile].append(cand_value - base_value)
+    tail = (1 - settings.confidence) / 2
+    intervals = {}
+    for percentile, samples in differences.items():
+        samples.sort()
+        low = samples[min(len(samples) - 1, math.floor(tail * len(samples)))]
+        high = samples[min(len(samples) - 1, math.ceil((1 - tail) * len(samples)) - 1)]
+        intervals[f"p{percentile:g}"] = (low, high)
+    return intervals
+
+
+def compare_error_rates(baseline: CaseResult, candidate: CaseResult) -> Dict:
+    """Two-proportion z-test of the error rates, positive z when the candidate fails more."""
+    n1, n2 = baseline.queries, candidate.queries
+    rate1, rate2 = baseline.errors / n1, candidate.errors / n2
+    pooled = (baseline.errors + candidate.errors) / (n1 + n2)
+    variance = pooled * (1 - pooled) * (1 / n1 + 1 / n2)
+    z = (rate2 - rate1) / math.sqrt(variance) if variance > 0 else 0.0
+    return {"baseline": rate1, "candidate": rate2, "difference": rate2 - rate1, "z": z, "p_value": _normal_p_value(z)}
+
+
+def compare_case(baseline: CaseResult, candidate: CaseResult, settings: ComparisonSettings) -> Dict:
+    """Comparison of one case and component, its "verdict" is regressed, improved, unchanged or insufficient_data."""
+    comparison = {
+        "baseline_queries": baseline.queries,
+        "candidate_queries": candidate.queries,
+    }
+    if baseline.queries == 0 or candidate.queries == 0:
+        return {**comparison, "verdict": "insufficient_data"}
+    errors = compare_error_rates(baseline, candidate)
+    comparison["error_rate"] = errors
+    errors_regressed = errors["z"] > 0 and errors["p_value"] < settings.alpha
+    base_histogram, cand_histogram = baseline.histogram, candidate.histogram
+    if min(base_histogram.total, cand_histogram.total) < settings.min_queries:
+        comparison["verdict"] = "regressed" if errors_regressed else "insufficient_data"
+        return comparison
+
+    percentiles = sorted({*settings.percentiles, settings.gate_percentile})
+    intervals = bootstrap_percentile_differences(base_histogram, cand_histogram, percentiles, settings)
+    comparison["percentiles"] = {
+        name: {
+            "baseline": base_histogram.percentile(percentile),
+            "candidate": cand_histogram.percentile(percentile),
+            "difference_ci": list(intervals[name]),
+        }
+        for percentile, name in ((percentile, f"p{percentile:g}") for percentile in percentiles)
+    }
+    u, z, p_value = mann_whitney(base_histogram, cand_histogram)
+    delta = cliffs_delta(u, base_histogram.total, cand_histogram.total)
+    comparison["mann_whitney"] = {"u": u, "z": z, "p_value": p_value}
+    comparison["cliffs_delta"] = delta
+    comparison["effect"] = effect_magnitude(delta)
+
+    gate_low, gate_high = intervals[f"p{settings.gate_percentile:g}"]
+    significant = p_value < settings.alpha and abs(delta) >= settings.min_effect
+    if errors_regressed or (significant and delta > 0 and gate_low > 0):
+        comparison["verdict"] = "regressed"
+    elif significant and delta < 0 and gate_high < 0:
+        comparison["verdict"] = "improved"
+    else:
+        comparison["verdict"] = "unchanged"
+    return comparison
+
+
+def compare_results(
+    baseline: PerformanceResults,
+    candidate: PerformanceResults,
+    settings: Optional[ComparisonSettings] = None,
+) -> Dict:
+    """{"settings", "verdicts": {verdict: count}, "comparisons": {case id: {component: comparison}}}"""
+    settings = settings or ComparisonSettings()
+    comparisons = {}
+    verdicts = {}
+    for key in sorted(set(baseline.results) | set(candidate.results)):
+        case_id, component = key
+        if key not in baseline.results:
+            comparison = {"verdict": "missing_baseline"}
+        elif key not in candidate.results:
+            comparison = {"verdict": "missing_candidate"}
+        else:
+            comparison = compare_case(baseline.results[key], candidate.results[key], settings)
+        comparisons.setdefault(case_id, {})[component] = comparison
+        verdicts[comparison["verdict"]] = verdicts.get(comparison["verdict"], 0) + 1
+    return {"settings": asdict(settings), "verdicts": verdicts, "comparisons": comparisons}
+
+
+def format_comparison(comparison_json: Dict, verbose: bool = False) -> List[str]:
+    lines = []
+    for case_id, components in comparison_json["comparisons"].items():
+        for component, comparison in components.items():
+            verdict = comparison["verdict"]
+            if not verbose and verdict not in ("regressed", "improved"):
+                continue
+            line = f"{verdict.upper()} {case_id} [{component}]"
+            if "cliffs_delta" in comparison:
+                line += f": Cliff's delta {comparison['cliffs_delta']:+.3f} ({comparison['effect']})"
+                line += f", p {comparison['mann_whitney']['p_value']:.2g}"
+                for name, percentile in comparison["percentiles"].items():
+                    low, high = percentile["difference_ci"]
+                    line += f", {name} {percentile['baseline']:.3f}s -> {percentile['candidate']:.3f}s [{low:+.3f}, {high:+.3f}]"
+            if "error_rate" in comparison:
+                errors = comparison["error_rate"]
+                line += f", errors {errors['baseline']:.1%} -> {errors['candidate']:.1%}"
+            lines.append(line)
+    lines.append(", ".join(f"{count} {verdict}" for verdict, count in sorted(comparison_json["verdicts"].items())))
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two performance runs and flag regressions.")
+    parser.add_argument("--baseline", nargs="+", required=True, help="results json files or runner records (.jsonl)")
+    parser.add_argument("--candidate", nargs="+", required=True, help="results json files or runner records (.jsonl)")
+    parser.add_argument("--out", help="write the comparison json here")
+    parser.add_argument("--alpha", type=float, default=ComparisonSettings.alpha)
+    parser.add_argument("--min-effect", type=float, default=ComparisonSettings.min_effect, help="minimum |Cliff's delta|")
+    parser.add_argument("--confidence", type=float, default=ComparisonSettings.confidence)
+    parser.add_argument("--resamples", type=int, default=ComparisonSettings.resamples)
+    parser.add_argument("--min-queries", type=int, default=ComparisonSettings.min_queries)
+    parser.add_argument("--gate-percentile", type=float, default=ComparisonSettings.gate_percentile)
+    parser.add_argument("--seed", type=int, default=ComparisonSettings.seed)
+    parser.add_argument("-v", "--verbose", action="store_true", help="list unchanged cases too")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    settings = ComparisonSettings(
+        alpha=args.alpha,
+        min_effect=args.min_effect,
+        confidence=args.confidence,
+        resamples=args.resamples,
+        min_queries=args.min_queries,
+        gate_percentile=args.gate_percentile,
+        seed=args.seed,
+    )
+    comparison_json = compare_results(load_results(args.baseline), load_results(args.candidate), settings)
+    comparison_json["baseline"] = args.baseline
+    comparison_json["candidate"] = args.candidate
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(comparison_json, f, indent=2)
+    print("\n".join(format_comparison(comparison_json, args.verbose)))
+    if comparison_json["verdicts"].get("regressed"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Aggregated results of performance runs, per test case and component.
+
+Each (case id, component) of performance_tests.json gets a LatencyHistogram
+of successful query latencies plus counts of queries, errors, status codes
+and response bytes, and the time span the queries covered. Results are built
+from runner records, either while running or from records files afterwards,
+and merge across workers, so percentiles come from the combined histograms
+rather than from averaging per-worker percentiles.
+
+Usage: python -m test_generators.performance_results RESULTS_OR_RECORDS... [--out performance_results.json]
+"""
+import argparse
+from collections import Counter
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from test_generators.latency_histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+REPORT_PERCENTILES = (50, 95, 99)
+
+
+class CaseResult:
+    """What the queries of one test case to one component did."""
+
+    def __init__(self, histogram: Optional[LatencyHistogram] = None):
+        self.histogram = histogram or LatencyHistogram()
+        self.queries = 0
+        self.errors = 0
+        self.status_codes: Counter = Counter()
+        self.response_bytes = 0
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+
+    def add_record(self, record: Dict) -> None:
+        self.queries += 1
+        if record.get("ok"):
+            self.histogram.record(record["latency"])
+        else:
+            self.errors += 1
+        self.status_codes[str(record.get("status_code"))] += 1
+        self.response_bytes += record.get("response_bytes") or 0
+        self._extend(record.get("intended_start"), record.get("end"))
+
+    def _extend(self, start: Optional[float], end: Optional[float]) -> None:
+        if start is not None:
+            self.start = start if self.start is None else min(self.start, start)
+        if end is not None:
+            self.end = end if self.end is None else max(self.end, end)
+
+    def merge(self, other: "CaseResult") -> "CaseResult":
+        self.histogram.merge(other.histogram)
+        self.queries += other.queries
+        self.errors += other.errors
+        self.status_codes.update(other.status_codes)
+        self.response_bytes += other.response_bytes
+        self._extend(other.start, other.end)
+        return self
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    def summary(self) -> Dict:
+        elapsed = self.elapsed
+        return {
+            "queries": self.queries,
+            "errors": self.errors,
+            "error_rate": self.errors / self.queries if self.queries else 0.0,
+            "throughput": self.queries / elapsed if elapsed else None,
+            **self.histogram.percentiles(REPORT_PERCENTILES),
+            "max": self.histogram.max,
+            "mean": self.histogram.mean,
+            "status_codes": dict(self.status_codes),
+        }
+
+    def to_json(self) -> Dict:
+        return {
+            "queries": self.queries,
+            "errors": self.errors,
+            "status_codes": dict(self.status_codes),
+            "response_bytes": self.response_bytes,
+            "start": self.start,
+            "end": self.end,
+            "histogram": self.histogram.to_json(),
+        }
+
+    @classmethod
+    def from_json(cls, result_json: Dict) -> "CaseResult":
+        result = cls(LatencyHistogram.from_json(result_json["histogram"]))
+        result.queries = result_json["queries"]
+        result.errors = result_json["errors"]
+        result.status_codes = Counter(result_json["status_codes"])
+        result.response_bytes = result_json["response_bytes"]
+        result.start = result_json["start"]
+        result.end = result_json["end"]
+        return result
+
+
+class PerformanceResults:
+    """CaseResults keyed by (case id, component)."""
+
+    def __init__(self):
+        self.results: Dict[Tuple[str, str], CaseResult] = {}
+
+    def get(self, case_id: str, component: str) -> CaseResult:
+        key = (case_id, component)
+        if key not in self.results:
+            self.results[key] = CaseResult()
+        return self.results[key]
+
+    def add_record(self, record: Dict) -> None:
+        self.get(record["case_id"], record["component"]).add_record(record)
+
+    def add_records(self, records: Iterable[Dict]) -> "PerformanceResults":
+        for record in records:
+            self.add_record(record)
+        return self
+
+    def merge(self, other: "PerformanceResults") -> "PerformanceResults":
+        for (case_id, component), result in other.results.items():
+            self.get(case_id, component).merge(result)
+        return self
+
+    def report(self) -> Dict[str, Dict[str, Dict]]:
+        """{case id: {component: summary}}"""
+        report = {}
+        for (case_id, component), result in self.results.items():
+            report.setdefault(case_id, {})[component] = result.summary()
+        return report
+
+    def to_json(self) -> Dict:
+        results = {}
+        for (case_id, component), result in self.results.items():
+            results.setdefault(case_id, {})[component] = result.to_json()
+        return {"results": results}
+
+    @classmethod
+    def from_json(cls, results_json: Dict) -> "PerformanceResults":
+        results = cls()
+        for case_id, components in results_json["results"].items():
+            for component, result_json in components.items():
+                results.results[(case_id, component)] = CaseResult.from_json(result_json)
+        return results
+
+
+def iter_records(path) -> Iterable[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_results(paths: List[str]) -> PerformanceResults:
+    """Merge results files and runner records files (.jsonl) into one PerformanceResults."""
+    results = PerformanceResults()
+    for path in paths:
+        if str(path).endswith(".jsonl"):
+            results.add_records(iter_records(path))
+        else:
+            with open(path, encoding="utf-8") as f:
+                results.merge(PerformanceResults.from_json(json.load(f)))
+    return results
+
+
+def format_report(report: Dict[str, Dict[str, Dict]]) -> List[str]:
+    def seconds(value):
+        return "-" if value is None else f"{value:.3f}s"
+
+    lines = []
+    for case_id, components in report.items():
+        for component, summary in components.items():
+            throughput = "-" if summary["throughput"] is None else f"{summary['throughput']:.2f}/s"
+            lines.append(
+                f"{case_id} [{component}]: {summary['queries']} queries, {throughput}, "
+                f"p50 {seconds(summary['p50'])}, p95 {seconds(summary['p95'])}, "
+                f"p99 {seconds(summary['p99'])}, max {seconds(summary['max'])}, "
+                f"errors {summary['error_rate']:.1%}"
+            )
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge and report performance results.")
+    parser.add_argument("inputs", nargs="+", help="results json files or runner records (.jsonl)")
+    parser.add_argument("--out", help="write the merged results here")
+    parser.add_argument("--report", help="write the summary report json here")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    results = load_results(args.inputs)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results.to_json(), f)
+        logger.info(f"Wrote merged results of {len(results.results)} cases to {args.out}")
+    report = results.report()
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print("\n".join(format_report(report)))
+
+
+if __name__ == "__main__":
+    main()
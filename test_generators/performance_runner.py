@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Reference runner for the performance suite (test_suites/performance_tests.json).
+
+Every test case is run stage by stage from its load profile, or from
+num_queries/concurrent for cases that predate profiles, and capacity cases
+run a capacity search. Queries go out over one pooled httpx client using
+HTTP/1.1 keep-alive connections, or with --http2 multiplexed HTTP/2 to
+endpoints that negotiate it over TLS (needs the h2 package). For every query
+one json line is written with its intended start, actual start and end times,
+and latency histograms per case and component are saved with --results; for
+long runs pass --out "" to keep only the histograms.
+
+Open-loop stages send each query at its scheduled time whether or not earlier
+queries have completed, and latency is measured from that scheduled time, so
+a slow or stalled endpoint shows up as growing latencies rather than as fewer
+requests (no coordinated omission). Closed stages measure from the moment a
+worker was ready to send, which is all a closed loop can offer.
+
+ARS components are queried with the submit and poll flow, every other
+component with a single POST of the query.
+
+With --trace, spans for suite, test case, stage, query, query construction,
+submission, every ARS poll and every ARA child of an ARS query are written as
+OTLP/JSON, and every record carries the trace and span id of its query.
+Performance cases send pool queries rather than test assets, so there is no
+asset level between test case and query; acceptance_runner traces acceptance
+suites down to their assets.
+
+Usage: python -m test_generators.performance_runner SUITE [--endpoints endpoints.json] [--case PATTERN] [--out records.jsonl [--append]] [--results results.json] [--trace trace.jsonl]
+"""
+import argparse
+import asyncio
+import contextvars
+from dataclasses import asdict, dataclass, field
+import fnmatch
+import json
+import logging
+import random
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from test_generators import serialization
+from test_generators.capacity_search import CapacitySearch, StageResult, find_capacity, summarize_stage
+from test_generators.curie_sampler import POOL_DIR, get_seed
+from test_generators.load_profiles import LoadProfile, Stage, concurrent, sequential
+from test_generators.performance_results import PerformanceResults
+from test_generators.query_pool import QueryResolver
+from test_generators.tracing import SPAN_KIND_CLIENT, OtlpJsonFileExporter, Tracer
+
+logger = logging.getLogger(__name__)
+
+KP_BACKUP_FILE = "kp_performance_tests_2024_10_18.json"
+ARS_COMPONENT = "ars"
+ARS_DONE_STATUSES = ("Done", "Error")
+
+
+@dataclass
+class RunnerConfig:
+    """Where and how to send queries."""
+
+    endpoints: Dict[str, str]
+    http2: bool = False
+    max_connections: int = 100
+    timeout: float = 300.0
+    ars_poll_interval: float = 5.0
+    ars_timeout: float = 600.0
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+def load_endpoints(path=None) -> Dict[str, str]:
+    """
+    Component -> URL. KP query URLs come from the KP backup file, a json file
+    can add or override them, e.g. {"ara": "https://.../query", "ars": "https://ars.ci.transltr.io"}.
+    """
+    with open(POOL_DIR / KP_BACKUP_FILE, encoding="utf-8") as f:
+        endpoints = {kp["infores"]: kp["url"] for kp in json.load(f).values()}
+    if path is not None:
+        with open(path, encoding="utf-8") as f:
+            endpoints.update(json.load(f))
+    return endpoints
+
+
+def get_load_profile(test_case: Dict) -> LoadProfile:
+    """The case's load profile, or the one its legacy num_queries/concurrent fields describe."""
+    if test_case.get("load_profile"):
+        return LoadProfile.from_json(test_case["load_profile"])
+    if test_case.get("concurrent"):
+        return concurrent(test_case["num_queries"])
+    return sequential(test_case["num_queries"])
+
+
+def arrival_offsets(stage: Stage, rng: random.Random) -> Iterator[float]:
+    """Intended send times of an open-loop stage, in seconds from its start."""
+    offset = 0.0
+    index = 0
+    while (stage.num_queries is None or index < stage.num_queries) and (
+        stage.duration is None or offset < stage.duration
+    ):
+        yield offset
+        index += 1
+        if stage.arrival == "poisson":
+            offset += rng.expovariate(stage.target_rps)
+        else:
+            offset = index / stage.target_rps
+
+
+class RecordWriter:
+    """
+    Write per-request records as json lines, and aggregate them into results if
+    given. An existing file is replaced unless append is set.
+    """
+
+    def __init__(self, path=None, results: Optional[PerformanceResults] = None, append: bool = False):
+        self.f = open(path, "a" if append else "w", encoding="utf-8") if path else None
+        self.results = results
+        self.count = 0
+
+    def write(self, record: Dict) -> None:
+        self.count += 1
+        if self.results is not None:
+            self.results.add_record(record)
+        if self.f is not None:
+            self.f.write(json.dumps(record) + "\n")
+
+    def flush(self) -> None:
+        if self.f is not None:
+            self.f.flush()
+
+    def close(self) -> None:
+        if self.f is not None:
+            self.f.close()
+
+
+class PerformanceRunner:
+    """Run the test cases of a performance suite against configured endpoints."""
+
+    def __init__(
+        self,
+        suite_json: Dict,
+        config: RunnerConfig,
+        records: RecordWriter,
+        tracer: Optional[Tracer] = None,
+    ):
+        self.suite_json = suite_json
+        self.config = config
+        self.records = records
+        self.tracer = tracer or Tracer()
+        self.resolver = QueryResolver(suite_json)
+        self.client: Optional[httpx.AsyncClient] = None
+        self._clock_offset = 0.0
+
+    def _wall_time(self, loop_time: float) -> float:
+        return loop_time + self._clock_offset
+
+    async def run(self, case_ids: List[str]) -> Dict[str, Dict]:
+        """Run the given cases one after another and return a summary per case."""
+        loop = asyncio.get_running_loop()
+        self._clock_offset = time.time() - loop.time()
+        limits = httpx.Limits(
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.max_connections,
+        )
+        summaries = {}
+        async with httpx.AsyncClient(
+            http2=self.config.http2,
+            limits=limits,
+            timeout=self.config.timeout,
+            headers=self.config.headers,
+        ) as self.client:
+            with self.tracer.suite_span(self.suite_json, len(case_ids)):
+                for case_id in case_ids:
+                    summaries[case_id] = await self.run_case(self.suite_json["test_cases"][case_id])
+        return summaries
+
+    async def run_case(self, test_case: Dict) -> Dict:
+        with self.tracer.test_case_span(test_case) as span:
+            summary = await self._run_case(test_case)
+            if "skipped" in summary:
+                span.add_event("skipped", {"reason": summary["skipped"]})
+            return summary
+
+    async def _run_case(self, test_case: Dict) -> Dict:
+        case_id = test_case["id"]
+        component = test_case["components"][0]
+        if component not in self.config.endpoints:
+            logger.warning(f"Skipping {case_id}, no endpoint configured for {component}")
+            return {"skipped": f"no endpoint for {component}"}
+        logger.info(f"Running {case_id}")
+        query_counter = iter(range(1 << 62))
+        if test_case.get("capacity_search"):
+            search = CapacitySearch.from_json(test_case["capacity_search"])
+            loop = asyncio.get_running_loop()
+            stage_numbers = iter(range(1 << 62))
+
+            def measure(stage: Stage) -> StageResult:
+                future = asyncio.run_coroutine_threadsafe(
+                    self.run_stage(test_case, component, next(stage_numbers), stage, query_counter), loop
+                )
+                return future.result()
+
+            # run the search in the case's context, so its stages trace under the case
+            context = contextvars.copy_context()
+            result = await loop.run_in_executor(None, context.run, find_capacity, search, measure)
+            return {"capacity": result.to_json()}
+        stage_results = []
+        for stage_number, stage in enumerate(get_load_profile(test_case).stages):
+            stage_results.append(await self.run_stage(test_case, component, stage_number, stage, query_counter))
+        return {"stages": [asdict(stage_result) for stage_result in stage_results]}
+
+    async def run_stage(
+        self,
+        test_case: Dict,
+        component: str,
+        stage_number: int,
+        stage: Stage,
+        query_counter: Iterator[int],
+    ) -> StageResult:
+        """Run one stage and summarize what it saw."""
+        attributes = {
+            "stage.number": stage_number,
+            "stage.arrival": stage.arrival,
+            "stage.target_rps": stage.target_rps,
+            "stage.concurrency": stage.concurrency,
+        }
+        with self.tracer.span("stage", attributes) as span:
+            result = await self._run_stage(test_case, component, stage_number, stage, query_counter)
+            span.set_attributes({"stage.queries": result.num_queries, "stage.error_rate": result.error_rate})
+            return result
+
+    async def _run_stage(
+        self,
+        test_case: Dict,
+        component: str,
+        stage_number: int,
+        stage: Stage,
+        query_counter: Iterator[int],
+    ) -> StageResult:
+        loop = asyncio.get_running_loop()
+        results: List[Dict] = []
+        stage_start = loop.time()
+
+        async def send(intended_start: float) -> None:
+            record = await self.send_query(test_case, component, next(query_counter), intended_start)
+            record["stage"] = stage_number
+            self.records.write(record)
+            results.append(record)
+
+        if stage.arrival == "closed":
+            stage_end = None if stage.duration is None else stage_start + stage.duration
+            sent = 0
+
+            async def worker() -> None:
+                nonlocal sent
+                while (stage.num_queries is None or sent < stage.num_queries) and (
+                    stage_end is None or loop.time() < stage_end
+                ):
+                    sent += 1
+                    await send(loop.time())
+                    if stage.think_time:
+                        await asyncio.sleep(stage.think_time)
+
+            await asyncio.gather(*(worker() for _ in range(stage.concurrency)))
+        else:
+            rng = random.Random(get_seed(test_case["id"], str(stage_number)))
+            tasks = []
+            for offset in arrival_offsets(stage, rng):
+                intended_start = stage_start + offset
+                delay = intended_start - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(intended_start)))
+            await asyncio.gather(*tasks)
+        self.records.flush()
+
+        latencies = [record["latency"] for record in results if record["ok"]]
+        return summarize_stage(
+            stage.target_rps or stage.concurrency,
+            latencies,
+            errors=len(results) - len(latencies),
+            elapsed=loop.time() - stage_start,
+        )
+
+    async def send_query(self, test_case: Dict, component: str, query_index: int, intended_start: float) -> Dict:
+        """Send one query and return its timing record."""
+        loop = asyncio.get_running_loop()
+        with self.tracer.span("query", {"query.index": query_index}) as span:
+            # time spent waiting for the send slot, non-zero when the client falls behind the schedule
+            span.set_attribute("query.schedule_delay", loop.time() - intended_start)
+            with self.tracer.span("construct_query"):
+                query = self.resolver.resolve_query(test_case, query_index)
+            start = loop.time()
+            record = {
+                "case_id": test_case["id"],
+                "component": component,
+                "query_index": query_index,
+                "intended_start": self._wall_time(intended_start),
+                "start": self._wall_time(start),
+                "trace_id": span.trace_id,
+                "span_id": span.span_id,
+            }
+            try:
+                if component == ARS_COMPONENT:
+                    ars_record, _ = await query_ars(self.client, self.tracer, self.config, query)
+                    record.update(ars_record)
+                else:
+                    url = self.config.endpoints[component]
+                    with self.tracer.span("submit", {"http.url": url}, kind=SPAN_KIND_CLIENT) as submit_span:
+                        response = await self.client.post(url, json=query)
+                        submit_span.set_attribute("http.status_code", response.status_code)
+                    record.update(
+                        status_code=response.status_code,
+                        http_version=response.http_version,
+                        response_bytes=len(response.content),
+                        ok=response.is_success,
+                    )
+            except Exception as e:
+                # any failure, e.g. an unexpected response body or a bad URL, fails this query only
+                # instead of aborting its stage and losing the stage's records
+                record.update(ok=False, error=f"{type(e).__name__}: {e}")
+            end = loop.time()
+            record.update(
+                end=self._wall_time(end),
+                latency=end - intended_start,
+                service_time=end - start,
+            )
+            span.set_attributes(
+                {
+                    "query.ok": record["ok"],
+                    "http.status_code": record.get("status_code"),
+                    "query.response_bytes": record.get("response_bytes"),
+                }
+            )
+            if not record["ok"]:
+                span.set_error(record.get("error") or f"status {record.get('status_code')}")
+        return record
+
+
+async def query_ars(
+    client: httpx.AsyncClient,
+    tracer: Tracer,
+    config: RunnerConfig,
+    query: Dict,
+) -> Tuple[Dict, Optional[httpx.Response]]:
+    """
+    Submit a query to the ARS and poll its trace until it is done, then
+    fetch the finished message. Returns the fields of the query's timing
+    record and the response holding the finished message, None on a timeout.
+
+    Every ARA child message of the trace becomes an "ara" span under the
+    "ars" span, from the submission to the poll that first saw it done, so
+    its duration is accurate to one poll interval.
+    """
+    base_url = config.endpoints[ARS_COMPONENT].rstrip("/")
+    with tracer.span("ars") as ars_span:
+        with tracer.span("ars.submit", kind=SPAN_KIND_CLIENT) as span:
+            response = await client.post(f"{base_url}/ars/api/submit", json=query)
+            span.set_attribute("http.status_code", response.status_code)
+            response.raise_for_status()
+            pk = response.json()["pk"]
+        ars_span.set_attribute("ars.pk", pk)
+        loop = asyncio.get_running_loop()
+        submitted_ns = time.time_ns()
+        deadline = loop.time() + config.ars_timeout
+        polls = 0
+        status = None
+        children_done = set()
+        while loop.time() < deadline:
+            await asyncio.sleep(config.ars_poll_interval)
+            polls += 1
+            with tracer.span("ars.poll", {"ars.poll": polls}, kind=SPAN_KIND_CLIENT) as span:
+                response = await client.get(f"{base_url}/ars/api/messages/{pk}", params={"trace": "y"})
+                span.set_attribute("http.status_code", response.status_code)
+                response.raise_for_status()
+                trace = response.json()
+                status = trace.get("status")
+                span.set_attribute("ars.status", status)
+            for child in trace.get("children") or []:
+                agent = (child.get("actor") or {}).get("agent")
+                child_status = child.get("status")
+                if agent in children_done or child_status not in ARS_DONE_STATUSES:
+                    continue
+                children_done.add(agent)
+                tracer.record_span(
+                    "ara",
+                    submitted_ns,
+                    {
+                        "ara.agent": agent,
+                        "ara.status": child_status,
+                        "ara.code": child.get("code"),
+                        "ara.result_count": child.get("result_count"),
+                    },
+                    error=f"{agent} status {child_status}" if child_status == "Error" else None,
+                )
+            if status in ARS_DONE_STATUSES:
+                ars_span.set_attributes({"ars.status": status, "ars.polls": polls})
+                with tracer.span("ars.fetch", kind=SPAN_KIND_CLIENT) as span:
+                    response = await client.get(f"{base_url}/ars/api/messages/{pk}")
+                    span.set_attribute("http.status_code", response.status_code)
+                    response.raise_for_status()
+                record = {
+                    "pk": pk,
+                    "polls": polls,
+                    "ars_status": status,
+                    "status_code": response.status_code,
+                    "http_version": response.http_version,
+                    "response_bytes": len(response.content),
+                    "ok": status == "Done",
+                }
+                return record, response
+        ars_span.set_attributes({"ars.status": status, "ars.polls": polls})
+        ars_span.set_error("ARS poll timed out")
+        return {"pk": pk, "polls": polls, "ars_status": status, "ok": False, "error": "ARS poll timed out"}, None
+
+
+
+def select_cases(suite_json: Dict, patterns: List[str]) -> List[str]:
+    case_ids = list(suite_json["test_cases"])
+    if not patterns:
+        return case_ids
+    return [case_id for case_id in case_ids if any(fnmatch.fnmatchcase(case_id, pattern) for pattern in patterns)]
+
+
+def summarize(summaries: Dict[str, Dict]) -> List[str]:
+    lines = []
+    for case_id, summary in summaries.items():
+        if "skipped" in summary:
+            lines.append(f"{case_id}: skipped, {summary['skipped']}")
+        elif "capacity" in summary:
+            capacity = summary["capacity"]
+            bound = "" if capacity["saturated"] else " (not saturated)"
+            lines.append(f"{case_id}: capacity {capacity['knee_rps']} rps{bound}")
+        else:
+            for number, stage in enumerate(summary["stages"]):
+                lines.append(
+                    f"{case_id} stage {number}: {stage['num_queries']} queries, "
+                    f"p95 {stage['p95_latency']:.3f}s, errors {stage['error_rate']:.1%}"
+                )
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a performance TestSuite.")
+    parser.add_argument("suite", help="performance suite json")
+    parser.add_argument("--endpoints", help="json file mapping components to URLs")
+    parser.add_argument("--case", action="append", default=[], help="case id glob to run, may be repeated")
+    parser.add_argument("--out", default="performance_records.jsonl", help="per-request records (json lines), empty for none")
+    parser.add_argument("--append", action="store_true", help="append to --out instead of replacing it")
+    parser.add_argument("--results", help="write aggregated results (latency histograms) here")
+    parser.add_argument("--trace", help="write trace spans here (OTLP/JSON lines)")
+    parser.add_argument("--http2", action="store_true", help="use HTTP/2 (needs the h2 package)")
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--ars-poll-interval", type=float, default=5.0)
+    parser.add_argument("--ars-timeout", type=float, default=600.0, help="seconds to wait for an ARS query to finish")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.suite, "rb") as f:
+        suite_json = serialization.decode(f.read())
+    config = RunnerConfig(
+        endpoints=load_endpoints(args.endpoints),
+        http2=args.http2,
+        max_connections=args.max_connections,
+        timeout=args.timeout,
+        ars_poll_interval=args.ars_poll_interval,
+        ars_timeout=args.ars_timeout,
+    )
+    results = PerformanceResults() if args.results else None
+    records = RecordWriter(args.out, results, append=args.append)
+    tracer = Tracer(OtlpJsonFileExporter(args.trace, service_name="performance_runner") if args.trace else None)
+    try:
+        runner = PerformanceRunner(suite_json, config, records, tracer)
+        summaries = asyncio.run(runner.run(select_cases(suite_json, args.case)))
+    finally:
+        records.close()
+        tracer.close()
+    print("\n".join(summarize(summaries)))
+    if args.out:
+        print(f"Wrote {records.count} records to {args.out}")
+    if results is not None:
+        with open(args.results, "w", encoding="utf-8") as f:
+            json.dump(results.to_json(), f)
+        print(f"Wrote results of {len(results.results)} cases to {args.results}")
+    if args.trace:
+        print(f"Wrote {tracer.exporter.count} spans to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
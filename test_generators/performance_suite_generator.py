@@ -2,27 +2,14 @@
 """
 Script to generate a TestSuite of TestCases from specified TestAssets
 """
+import argparse
 import copy
-import glob
-import httpx
-import io
 import json
 import logging
 from pathlib import Path
-import tempfile
-import zipfile
-
-from translator_testing_model.datamodel.pydanticmodel import (
-    TestSuite,
-    TestAsset,
-    TestMetadata,
-    TestPersonaEnum,
-    TestSourceEnum,
-    TestObjectiveEnum,
-    TestEnvEnum,
-)
 
-from test_generators.utils import create_test_cases_from_test_assets, dump_to_json
+from test_generators import capacity_search, curie_sampler, load_profiles, query_corpus, query_pool
+from test_generators.asset_sources import DEFAULT_ASSET_SOURCE, REPO_ROOT, get_asset_source
 
 
 def generate_message(query, num_curies):
@@ -68,120 +55,270 @@ creative_query = {
 }
 
 
+# legacy (num_queries, curies) presets
+KP_SEQUENTIAL_RATES = [(900, 1), (180, 10), (90, 100), (30, 1000)]
+KP_CONCURRENT_RATES = [(10, 1), (100, 1), (1000, 1), (10, 10), (100, 10), (1000, 10), (10, 1000), (100, 1000), (1000, 1000)]
+ARA_SEQUENTIAL_QUERIES = 15
+ARA_CONCURRENT_RATES = [10, 50, 100, 1000]
+# open-loop (profile, curies) run against every KP, and profiles run against the ARA and ARS
+KP_OPEN_LOOP_PROFILES = [(load_profiles.ramp(1, 10, 600, steps=5), 10)]
+ARA_OPEN_LOOP_PROFILES = [load_profiles.constant_rate(0.2, 600)]
+# ARA and ARS cases draw at most this many distinct queries from the asset query corpus
+ARA_CORPUS_SIZE = 100
+# capacity searches run against every KP, per number of curies
+KP_CAPACITY_CURIES = [1, 100]
+KP_BACKUP_FILE = "kp_performance_tests_2024_10_18.json"
+KP_CAPACITY_SEARCH = capacity_search.CapacitySearch(
+    start_rps=1,
+    max_rps=256,
+    step_factor=2,
+    resolution=0.1,
+    stage_duration=60,
+    slo=capacity_search.SLO(p95_latency=10, max_error_rate=0.01),
+)
+
+
+def get_curie_sampling(uid, entry_key, kp, num_curies):
+    """Sample a distinct set of curies per query, unless every query has to send the whole pool."""
+    pool_ref = curie_sampler.get_pool_ref(KP_BACKUP_FILE, entry_key, kp["query"])
+    pool = curie_sampler.load_pool(pool_ref)
+    if num_curies >= len(pool):
+        return None
+    return curie_sampler.CurieSampling(pool_ref, num_curies, seed=curie_sampler.get_seed(uid)).to_json()
+
+
+def compile_test_case(
+    uid,
+    name,
+    query_ref,
+    components,
+    profile: load_profiles.LoadProfile,
+    num_curies=None,
+    curie_sampling=None,
+    query_refs=None,
+):
+    """
+    A performance test case running a query of the suite's query pool with a load profile.
+
+    num_curies cuts the query's ids, curie_sampling varies them per query sent,
+    and query_refs replaces the query by pool queries that are sent round robin.
+    Profiles that runners predating load profiles can run also get their
+    num_queries/concurrent fields.
+    """
+    return {
+        "id": uid,
+        "name": name,
+        "description": name,
+        "tags": [],
+        "test_runner_settings": [],
+        "query_ref": query_ref,
+        "num_curies": num_curies,
+        **(profile.legacy_fields() or {}),
+        "load_profile": profile.to_json(),
+        "curie_sampling": curie_sampling,
+        "query_refs": query_refs,
+        "components": components,
+    }
+
+
+def compile_capacity_test_case(
+    uid,
+    name,
+    query_ref,
+    components,
+    search: capacity_search.CapacitySearch,
+    num_curies=None,
+    curie_sampling=None,
+):
+    """A performance test case searching for the highest rate a pool query can be sent at within an SLO."""
+    return {
+        "id": uid,
+        "name": name,
+        "description": name,
+        "tags": [],
+        "test_runner_settings": ["capacity"],
+        "query_ref": query_ref,
+        "num_curies": num_curies,
+        "capacity_search": search.to_json(),
+        "curie_sampling": curie_sampling,
+        "components": components,
+    }
+
+
 def create_test_suite(
     logger: logging.Logger,
+    extra_profiles=None,
+    source: str = DEFAULT_ASSET_SOURCE,
 ) -> None:
-    """Download tests from specified location."""
-    with open("./asset_backups/kp_performance_tests_2024_10_18.json", "r") as f:
+    """
+    Generate the performance suite from the KP queries in asset_backups and the
+    Test Assets in source.
+
+    extra_profiles adds load profile test cases, as
+    {"kp": [{"num_curies": 10, **profile}], "ara": [profile], "ars": [profile]},
+    where ARA and ARS profiles may pick their queries with
+    "corpus": {"size": 50, "mix": {"treats": 1}}.
+    """
+    with open(curie_sampler.POOL_DIR / KP_BACKUP_FILE, "r") as f:
         data = json.load(f)
 
-        test_suite = {
-            "id": "performance_tests",
-            "name": "Performance Tests",
-            "description": "Performance Tests",
-            "tags": [],
-            "test_runner_settings": [],
-            "test_metadata": {},
-            "test_persona": "Developer",
-            "test_suite_specification": None,
-            "test_cases": {},
-        }
-        # sequential KP
-        for rate in [(900, 1), (180, 10), (90, 100), (30, 1000)]:
-            for kp in data.values():
-                infores = kp["infores"]
-                uid = f"{infores}_sequential_{rate[0]}x{rate[1]}"
-                test_case = {
-                    "id": uid,
-                    "name": f"[{infores}] {rate[0]} Sequential {rate[1]} curie queries",
-                    "description": f"[{infores}] {rate[0]} Sequential {rate[1]} curie queries",
-                    "tags": [],
-                    "test_runner_settings": [],
-                    "query": generate_message(copy.deepcopy(kp["query"]), rate[1]),
-                    "num_queries": rate[0],
-                    "concurrent": False,
-                    "components": [infores],
-                }
-                test_suite["test_cases"][uid] = test_case
-        # concurrent KP
-        for rate in [(10, 1), (100, 1), (1000, 1), (10, 10), (100, 10), (1000, 10), (10, 1000), (100, 1000), (1000, 1000)]:
-            for kp in data.values():
-                infores = kp["infores"]
-                uid = f"{infores}_concurrent_{rate[0]}x{rate[1]}"
-                test_case = {
-                    "id": uid,
-                    "name": f"[{infores}] {rate[0]} Concurrent {rate[1]} curie queries",
-                    "description": f"[{infores}] {rate[0]} Concurrent {rate[1]} curie queries",
-                    "tags": [],
-                    "test_runner_settings": [],
-                    "query": generate_message(copy.deepcopy(kp["query"]), rate[1]),
-                    "num_queries": rate[0],
-                    "concurrent": True,
-                    "components": [infores],
-                }
-                test_suite["test_cases"][uid] = test_case
-        
-        # sequential ARA
-        test_suite["test_cases"]["ara_sequential_tests"] = {
-            "id": "ara_sequential_tests",
-            "name": "Sequential ARA Performance Tests",
-            "description": "Sequential ARA Performance Tests",
-            "tags": [],
-            "test_runner_settings": [],
-            "query": creative_query,
-            "num_queries": 15,
-            "concurrent": False,
-            "components": ["ara"],
-        }
+    extra_profiles = extra_profiles or {}
+    kp_profiles = KP_OPEN_LOOP_PROFILES + [
+        (load_profiles.LoadProfile.from_json(profile), profile.get("num_curies", 1))
+        for profile in extra_profiles.get("kp", [])
+    ]
+    ara_profiles = {
+        component: [(profile, {}) for profile in ARA_OPEN_LOOP_PROFILES]
+        + [
+            (load_profiles.LoadProfile.from_json(profile), profile.get("corpus", {}))
+            for profile in extra_profiles.get(component, [])
+        ]
+        for component in ("ara", "ars")
+    }
+    corpus = query_corpus.build_query_corpus(
+        asset_json for _, asset_json in get_asset_source(source).iter_asset_json("test_assets")
+    )
 
-        # concurrent ARA
-        for rate in [10, 50, 100, 1000]:
-            uid = f"ara_{rate}_concurrent_tests"
-            test_suite["test_cases"][uid] = {
-                "id": uid,
-                "name": f"{rate} Concurrent ARA Performance Tests",
-                "description": f"{rate} Concurrent ARA Performance Tests",
-                "tags": [],
-                "test_runner_settings": [],
-                "query": creative_query,
-                "num_queries": rate,
-                "concurrent": True,
-                "components": ["ara"],
-            }
+    pool = query_pool.QueryPool()
+    # every KP query in full, cases cut it to their number of curies
+    kp_query_refs = {
+        entry_key: pool.add(generate_message(copy.deepcopy(kp["query"]), None)) for entry_key, kp in data.items()
+    }
+    creative_query_ref = pool.add(creative_query)
 
-        # sequential ARS
-        test_suite["test_cases"]["ars_sequential_tests"] = {
-            "id": "ars_sequential_tests",
-            "name": "Sequential ARS Performance Tests",
-            "description": "Sequential ARS Performance Tests",
-            "tags": [],
-            "test_runner_settings": [],
-            "query": creative_query,
-            "num_queries": 15,
-            "concurrent": False,
-            "components": ["ars"],
-        }
+    def select_queries(uid, profile, corpus_options):
+        size = corpus_options.get("size") or min(profile.expected_queries() or ARA_CORPUS_SIZE, ARA_CORPUS_SIZE)
+        queries = query_corpus.select_queries(corpus, size, corpus_options.get("mix"), curie_sampler.get_seed(uid))
+        return pool.add_all(queries)
 
-        # concurrent ARS
-        for rate in [10, 50, 100, 1000]:
-            uid = f"ars_{rate}_concurrent_tests"
-            test_suite["test_cases"][uid] = {
-                "id": uid,
-                "name": "Concurrent ARS Performance Tests",
-                "description": "Concurrent ARS Performance Tests",
-                "tags": [],
-                "test_runner_settings": [],
-                "query": creative_query,
-                "num_queries": rate,
-                "concurrent": True,
-                "components": ["ars"],
-            }
-        
-        with open("../test_suites/performance_tests.json", "w") as f:
-            json.dump(test_suite, f, indent=2)
+    test_suite = {
+        "id": "performance_tests",
+        "name": "Performance Tests",
+        "description": "Performance Tests",
+        "tags": [],
+        "test_runner_settings": [],
+        "test_metadata": {},
+        "test_persona": "Developer",
+        "test_suite_specification": None,
+        "test_cases": {},
+        "query_pool": {},
+    }
+    test_cases = test_suite["test_cases"]
+    # sequential KP
+    for num_queries, num_curies in KP_SEQUENTIAL_RATES:
+        for entry_key, kp in data.items():
+            infores = kp["infores"]
+            uid = f"{infores}_sequential_{num_queries}x{num_curies}"
+            test_cases[uid] = compile_test_case(
+                uid,
+                f"[{infores}] {num_queries} Sequential {num_curies} curie queries",
+                kp_query_refs[entry_key],
+                [infores],
+                load_profiles.sequential(num_queries),
+                num_curies,
+                get_curie_sampling(uid, entry_key, kp, num_curies),
+            )
+    # concurrent KP
+    for num_queries, num_curies in KP_CONCURRENT_RATES:
+        for entry_key, kp in data.items():
+            infores = kp["infores"]
+            uid = f"{infores}_concurrent_{num_queries}x{num_curies}"
+            test_cases[uid] = compile_test_case(
+                uid,
+                f"[{infores}] {num_queries} Concurrent {num_curies} curie queries",
+                kp_query_refs[entry_key],
+                [infores],
+                load_profiles.concurrent(num_queries),
+                num_curies,
+                get_curie_sampling(uid, entry_key, kp, num_curies),
+            )
+    # open-loop KP
+    for profile, num_curies in kp_profiles:
+        for entry_key, kp in data.items():
+            infores = kp["infores"]
+            uid = f"{infores}_{profile.name}_x{num_curies}"
+            test_cases[uid] = compile_test_case(
+                uid,
+                f"[{infores}] {profile.name} {num_curies} curie queries",
+                kp_query_refs[entry_key],
+                [infores],
+                profile,
+                num_curies,
+                get_curie_sampling(uid, entry_key, kp, num_curies),
+            )
 
+    # capacity KP
+    for num_curies in KP_CAPACITY_CURIES:
+        for entry_key, kp in data.items():
+            infores = kp["infores"]
+            uid = f"{infores}_capacity_x{num_curies}"
+            test_cases[uid] = compile_capacity_test_case(
+                uid,
+                f"[{infores}] Capacity of {num_curies} curie queries",
+                kp_query_refs[entry_key],
+                [infores],
+                KP_CAPACITY_SEARCH,
+                num_curies,
+                get_curie_sampling(uid, entry_key, kp, num_curies),
+            )
 
-if __name__ == "__main__":
-    create_test_suite(
-        logging.Logger("tester"),
+    for component in ("ara", "ars"):
+        label = component.upper()
+        uid = f"{component}_sequential_tests"
+        profile = load_profiles.sequential(ARA_SEQUENTIAL_QUERIES)
+        test_cases[uid] = compile_test_case(
+            uid,
+            f"Sequential {label} Performance Tests",
+            creative_query_ref,
+            [component],
+            profile,
+            query_refs=select_queries(uid, profile, {}),
+        )
+        for rate in ARA_CONCURRENT_RATES:
+            uid = f"{component}_{rate}_concurrent_tests"
+            profile = load_profiles.concurrent(rate)
+            test_cases[uid] = compile_test_case(
+                uid,
+                f"{rate} Concurrent {label} Performance Tests",
+                creative_query_ref,
+                [component],
+                profile,
+                query_refs=select_queries(uid, profile, {}),
+            )
+        for profile, corpus_options in ara_profiles[component]:
+            uid = f"{component}_{profile.name}_tests"
+            test_cases[uid] = compile_test_case(
+                uid,
+                f"{profile.name} {label} Performance Tests",
+                creative_query_ref,
+                [component],
+                profile,
+                query_refs=select_queries(uid, profile, corpus_options),
+            )
+
+    test_suite["query_pool"] = pool.to_json()
+    with open(REPO_ROOT / "test_suites" / "performance_tests.json", "w") as f:
+        json.dump(test_suite, f, indent=2)
+    logger.info(f"Wrote performance_tests with {len(test_cases)} test cases and {len(pool)} distinct queries")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the performance TestSuite.")
+    parser.add_argument(
+        "--profiles",
+        type=Path,
+        help='json file of extra load profiles: {"kp": [...], "ara": [...], "ars": [...]}',
     )
+    parser.add_argument("--source", default=DEFAULT_ASSET_SOURCE, help="repo checkout, .zip archive or .zip URL")
+    args = parser.parse_args(argv)
+
+    extra_profiles = None
+    if args.profiles:
+        with open(args.profiles, encoding="utf-8") as f:
+            extra_profiles = json.load(f)
+    logging.basicConfig(level=logging.INFO)
+    create_test_suite(logging.getLogger(__name__), extra_profiles, args.source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+A corpus of distinct creative TRAPI queries built from the Test Assets.
+
+Every asset with an input id, a predicate and both categories becomes a
+one-hop inferred query for its input id, like the ARA and ARS performance
+query. Queries are grouped by shape, the predicate plus the qualified
+direction (e.g. "treats", "affects_increased"), and performance test cases
+draw a seeded selection of a chosen size and shape mix, so concurrent load is
+spread over many queries instead of repeating a single one.
+"""
+import random
+from typing import Dict, Iterable, List, Optional
+
+# assets of these categories are the subject of their query edge, others the object
+SUBJECT_INPUT_CATEGORIES = ("biolink:ChemicalEntity", "biolink:SmallMolecule", "biolink:Drug")
+QUALIFIER_TYPES = {
+    "biolink_object_aspect_qualifier": "biolink:object_aspect_qualifier",
+    "biolink_object_direction_qualifier": "biolink:object_direction_qualifier",
+    "biolink_qualified_predicate": "biolink:qualified_predicate",
+}
+DEFAULT_MIX = {"treats": 0.5, "affects_increased": 0.25, "affects_decreased": 0.25}
+
+
+def get_query_shape(asset_json: Dict) -> str:
+    qualifiers = {qualifier["parameter"]: qualifier.get("value") for qualifier in asset_json.get("qualifiers") or []}
+    direction = qualifiers.get("biolink_object_direction_qualifier")
+    return f"{asset_json['predicate_name']}_{direction}" if direction else asset_json["predicate_name"]
+
+
+def build_creative_query(asset_json: Dict) -> Optional[Dict]:
+    """The creative query asking for the asset's output category, None if the asset cannot make one."""
+    input_id = asset_json.get("input_id")
+    predicate_id = asset_json.get("predicate_id")
+    input_category = asset_json.get("input_category")
+    output_category = asset_json.get("output_category")
+    if not (input_id and predicate_id and input_category and output_category):
+        return None
+    edge = {"subject": "SN", "object": "ON", "predicates": [predicate_id], "knowledge_type": "inferred"}
+    input_node, output_node = ("SN", "ON") if input_category in SUBJECT_INPUT_CATEGORIES else ("ON", "SN")
+    nodes = {
+        input_node: {"categories": [input_category], "ids": [input_id]},
+        output_node: {"categories": [output_category]},
+    }
+    qualifier_set = [
+        {"qualifier_type_id": QUALIFIER_TYPES[qualifier["parameter"]], "qualifier_value": qualifier["value"]}
+        for qualifier in asset_json.get("qualifiers") or []
+        if qualifier.get("value") and qualifier["parameter"] in QUALIFIER_TYPES
+        # a qualified predicate equal to the predicate itself adds nothing
+        and qualifier["value"] != predicate_id
+    ]
+    if qualifier_set:
+        edge["qualifier_constraints"] = [{"qualifier_set": qualifier_set}]
+    return {
+        "message": {"query_graph": {"nodes": nodes, "edges": {"t_edge": edge}}},
+        "bypass_cache": True,
+    }
+
+
+def build_query_corpus(asset_jsons: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    """Distinct creative queries by shape, in order of first appearance."""
+    corpus = {}
+    seen = set()
+    for asset_json in asset_jsons:
+        query = build_creative_query(asset_json)
+        if query is None:
+            continue
+        edge = query["message"]["query_graph"]["edges"]["t_edge"]
+        key = (asset_json["input_id"], asset_json["output_category"], repr(edge))
+        if key in seen:
+            continue
+        seen.add(key)
+        corpus.setdefault(get_query_shape(asset_json), []).append(query)
+    return corpus
+
+
+def select_queries(
+    corpus: Dict[str, List[Dict]],
+    size: int,
+    mix: Optional[Dict[str, float]] = None,
+    seed: int = 0,
+) -> List[Dict]:
+    """
+    Draw size distinct queries, shaped by mix.
+
+    mix maps shapes to their share of the selection, DEFAULT_MIX by default.
+    Shapes short of queries leave their share to the others, and the result
+    is shuffled so queries of one shape are not sent back to back.
+    """
+    mix = {shape: share for shape, share in (mix or DEFAULT_MIX).items() if corpus.get(shape)}
+    if not mix:
+        raise ValueError("None of the shapes of the mix are in the corpus")
+    rng = random.Random(seed)
+    total = sum(mix.values())
+    pools = {shape: rng.sample(corpus[shape], len(corpus[shape])) for shape in mix}
+    selected = []
+    for shape, share in mix.items():
+        selected.extend(pools[shape][:round(size * share / total)])
+    # fill up rounding and shortfalls from the shapes with queries left
+    leftovers = [query for shape in mix for query in pools[shape][round(size * mix[shape] / total):]]
+    selected = selected[:size] + rng.sample(leftovers, min(len(leftovers), max(0, size - len(selected))))
+    rng.shuffle(selected)
+    return selected
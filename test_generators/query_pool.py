@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Deduplicated pool of the TRAPI queries of a performance suite.
+
+The suite keeps every distinct query once under "query_pool", keyed by a hash
+of its content, and test cases reference pool entries:
+
+    "query_ref": "<hash>", "num_curies": 10     one query, its CURIE lists
+                                                 cut to num_curies
+    "query_refs": ["<hash>", ...]               queries sent round robin
+
+KP cases of all rates and CURIE counts share their KP's full query, and ARA
+and ARS cases share the corpus queries, so the suite grows with the number of
+distinct queries rather than cases times CURIEs. resolve_query rebuilds the
+query a runner sends, applying any curie_sampling of the case.
+"""
+import copy
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from test_generators.curie_sampler import CurieSampler, CurieSampling
+
+
+def get_query_ref(query: Dict) -> str:
+    """The content hash of a query, independent of key order and of the json backend."""
+    canonical = json.dumps(query, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def limit_curies(query: Dict, num_curies: Optional[int]) -> Dict:
+    """Cut the ids of every query node to num_curies, in place."""
+    if num_curies is not None:
+        for node in query["message"]["query_graph"]["nodes"].values():
+            if "ids" in node:
+                node["ids"] = node["ids"][:num_curies]
+    return query
+
+
+class QueryPool:
+    """Collects the distinct queries of a suite."""
+
+    def __init__(self, queries: Optional[Dict[str, Dict]] = None):
+        self.queries: Dict[str, Dict] = dict(queries or {})
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    def add(self, query: Dict) -> str:
+        query_ref = get_query_ref(query)
+        self.queries.setdefault(query_ref, query)
+        return query_ref
+
+    def add_all(self, queries: List[Dict]) -> List[str]:
+        return [self.add(query) for query in queries]
+
+    def to_json(self) -> Dict[str, Dict]:
+        return dict(self.queries)
+
+
+class QueryResolver:
+    """Build the queries of a suite's test cases, reusing samplers across calls."""
+
+    def __init__(self, suite_json: Dict):
+        self.pool = suite_json.get("query_pool") or {}
+        self._samplers: Dict[str, CurieSampler] = {}
+
+    def _sampler(self, test_case: Dict) -> Optional[CurieSampler]:
+        sampling_json = test_case.get("curie_sampling")
+        if not sampling_json:
+            return None
+        if test_case["id"] not in self._samplers:
+            self._samplers[test_case["id"]] = CurieSampler.from_spec(CurieSampling.from_json(sampling_json))
+        return self._samplers[test_case["id"]]
+
+    def resolve_query(self, test_case: Dict, query_index: int = 0) -> Dict:
+        """The query number query_index of a test case sends, as a fresh copy."""
+        if test_case.get("query_refs"):
+            query_refs = test_case["query_refs"]
+            return copy.deepcopy(self.pool[query_refs[query_index % len(query_refs)]])
+        if "query_ref" not in test_case:
+            # suites from before the pool embed their query
+            return copy.deepcopy(test_case["query"])
+        template = self.pool[test_case["query_ref"]]
+        sampler = self._sampler(test_case)
+        if sampler is not None:
+            return sampler.query(template, query_index)
+        return limit_curies(copy.deepcopy(template), test_case.get("num_curies"))
+
+
+def resolve_query(suite_json: Dict, test_case: Dict, query_index: int = 0) -> Dict:
+    """One-off version of QueryResolver.resolve_query."""
+    return QueryResolver(suite_json).resolve_query(test_case, query_index)
+
+
+def inline_queries(suite_json: Dict) -> Dict:
+    """The suite in the older format, with the first query of every case embedded as query."""
+    resolver = QueryResolver(suite_json)
+    test_cases = {}
+    for case_id, test_case in suite_json["test_cases"].items():
+        test_case = dict(test_case)
+        if "query_ref" in test_case or test_case.get("query_refs"):
+            test_case["query"] = resolver.resolve_query(test_case, 0)
+        test_cases[case_id] = test_case
+    return {key: value for key, value in {**suite_json, "test_cases": test_cases}.items() if key != "query_pool"}
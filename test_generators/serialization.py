@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Serialization of Test Assets, Cases and Suites.
+
+All output uses orjson when it is installed. Pretty output with an even indent
+(the default indent=4) is orjson's indent=2 output with the indentation widened,
+which is byte-for-byte what the standard library writes; objects holding floats
+the two libraries format differently fall back to the standard library, so
+generated files stay stable. Compact output of a pydantic v2 model goes straight
+from the model to bytes without building an intermediate dict. Compressed
+siblings (.json.gz, and .json.zst when zstandard is installed) can be written
+next to any output file.
+"""
+import gzip
+import json
+import math
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIONS = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+
+def to_jsonable(test_object: Any) -> Any:
+    """Turn a pydantic model into plain python objects, leave anything else as is."""
+    if hasattr(test_object, "model_dump"):
+        return test_object.model_dump(mode="json")
+    if hasattr(test_object, "dict"):
+        return test_object.dict()
+    return test_object
+
+
+def _orjson_matches_stdlib(jsonable: Any) -> bool:
+    """
+    Whether orjson formats every number in jsonable as the standard library does.
+
+    Floats agree unless python writes them in exponent notation (1e-05, 1e+16)
+    or they are not finite.
+    """
+    kind = type(jsonable)
+    if kind is dict:
+        jsonable = jsonable.values()
+    elif kind is float:
+        return math.isfinite(jsonable) and "e" not in repr(jsonable)
+    elif kind is not list and kind is not tuple:
+        return True
+    for value in jsonable:
+        if not _orjson_matches_stdlib(value):
+            return False
+    return True
+
+
+def _widen_indent(data: bytes, factor: int) -> bytes:
+    """Multiply the leading spaces of every line, strings never span lines in json."""
+    lines = []
+    for line in data.split(b"\n"):
+        width = len(line) - len(line.lstrip(b" "))
+        lines.append(line[:width] * (factor - 1) + line)
+    return b"\n".join(lines)
+
+
+def _encode_indented(jsonable: Any, indent: int) -> Optional[bytes]:
+    """orjson output identical to json.dumps(indent=indent), or None if it would differ."""
+    if orjson is None or indent <= 0 or indent % 2 or not _orjson_matches_stdlib(jsonable):
+        return None
+    try:
+        data = orjson.dumps(jsonable, option=orjson.OPT_INDENT_2)
+    except TypeError:
+        # e.g. integers wider than 64 bits or non-string keys
+        return None
+    return data if indent == 2 else _widen_indent(data, indent // 2)
+
+
+def encode(test_object: Any, indent: Optional[int] = 4) -> bytes:
+    """Serialize a model or plain object to utf-8 json, compact when indent is None."""
+    if indent is None:
+        if hasattr(test_object, "model_dump_json"):
+            return test_object.model_dump_json().encode("utf-8")
+        if orjson is not None:
+            return orjson.dumps(to_jsonable(test_object))
+        return json.dumps(to_jsonable(test_object), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    jsonable = to_jsonable(test_object)
+    data = _encode_indented(jsonable, indent)
+    if data is not None:
+        return data
+    return json.dumps(jsonable, ensure_ascii=False, indent=indent).encode("utf-8")
+
+
+def decode(data: bytes) -> Any:
+    """Parse utf-8 json bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    """Compress deterministically so unchanged content gives unchanged bytes."""
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the zstandard package")
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    raise ValueError(f"Unknown compression {compression}")
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown compression {compression}")
+
+
+def load_json(path) -> Any:
+    """Load a .json file, or a compressed .json.gz / .json.zst sibling."""
+    path = Path(path)
+    data = path.read_bytes()
+    for compression, suffix in COMPRESSIONS.items():
+        if path.suffix == suffix:
+            data = decompress(data, compression)
+    return decode(data)
+
+
+def get_sibling_path(path, compression: str) -> Path:
+    """The compressed sibling of a json file, e.g. {id}.json.gz for gzip."""
+    path = Path(path)
+    return path.with_name(path.name + COMPRESSIONS[compression])
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Compare two TSV asset snapshots from asset_backups/ and regenerate only what changed.
+
+Rows are keyed by their id column. The report lists added and removed asset ids,
+and for changed assets every field whose value differs. With --apply, only the
+added and changed assets are rebuilt and written, removed assets are deleted,
+and only the test cases holding any of them are rebuilt. The first run over a
+case directory with TestCase_{index} files regenerates all of them instead,
+replacing those files the way generate_suites does.
+
+Usage: python -m test_generators.snapshot_diff OLD.tsv NEW.tsv [--report diff.json] [--apply]
+"""
+import argparse
+from collections import defaultdict
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from test_generators import serialization
+from test_generators.asset_sources import REPO_ROOT
+from test_generators.generate_suites import LEGACY_ID_DIR
+
+logger = logging.getLogger(__name__)
+
+# Columns that create_test_asset reads, changes elsewhere do not alter the asset
+ASSET_FIELDS = (
+    "Relationship",
+    "Settings",
+    "InputName",
+    "InputID",
+    "OutputName",
+    "OutputID",
+    "Expected Result / Suggested Comparator",
+    "Translator GitHubIssue",
+    "Well Known",
+)
+# create_test_asset lower-cases these, so case-only edits are not changes
+CASE_INSENSITIVE_FIELDS = ("Relationship", "Settings")
+
+
+def iter_tsv_rows(filename) -> Iterator[Dict[str, str]]:
+    """Stream the rows of a TSV snapshot that have an id."""
+    with open(filename, newline='', encoding='utf-8') as tsvfile:
+        for row in csv.DictReader(tsvfile, delimiter='\t'):
+            if row.get("id"):
+                yield row
+
+
+def is_valid_row(row: Dict[str, str]) -> bool:
+    """Mirror the rows create_test_assets_from_tsv would skip."""
+    return bool(row.get("Relationship") and row.get("OutputID") and row.get("InputID"))
+
+
+def _changed_fields(old_row: Dict[str, str], new_row: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+    changes = {}
+    for field in sorted(set(old_row) | set(new_row), key=str):
+        if field is None:
+            # overflow cells of rows with more columns than the header
+            continue
+        old_value = (old_row.get(field) or "").strip()
+        new_value = (new_row.get(field) or "").strip()
+        if field in CASE_INSENSITIVE_FIELDS and old_value.lower() == new_value.lower():
+            continue
+        if old_value != new_value:
+            changes[field] = {"old": old_value, "new": new_value}
+    return changes
+
+
+def _forget(report: Dict, asset_id: str) -> None:
+    """Drop what an earlier row with the same id put into the report."""
+    for key in ("added", "removed", "changed"):
+        if asset_id in report[key]:
+            report[key].remove(asset_id)
+    report["changes"].pop(asset_id, None)
+    report["rows"].pop(asset_id, None)
+
+
+def diff_snapshots(old_filename, new_filename) -> Dict:
+    """
+    Diff two snapshots, holding only the old one in memory.
+
+    Returns a report with "added", "removed" and "changed" asset ids, the
+    per-field "changes" of changed assets, and "rows" holding the new rows of
+    every asset that has to be regenerated.
+    """
+    old_rows = {}
+    for row in iter_tsv_rows(old_filename):
+        if row["id"] in old_rows:
+            logger.warning(f"Duplicate id {row['id']} in {old_filename}, keeping the last row")
+        old_rows[row["id"]] = row
+
+    report = {
+        "old": str(old_filename),
+        "new": str(new_filename),
+        "added": [],
+        "removed": [],
+        "changed": [],
+        "changes": {},
+        "rows": {},
+    }
+    seen = set()
+    for row in iter_tsv_rows(new_filename):
+        asset_id = row["id"]
+        if asset_id in seen:
+            logger.warning(f"Duplicate id {asset_id} in {new_filename}, keeping the last row")
+            _forget(report, asset_id)
+        seen.add(asset_id)
+        old_row = old_rows.get(asset_id)
+        if old_row is None or not is_valid_row(old_row):
+            if is_valid_row(row):
+                report["added"].append(asset_id)
+                report["rows"][asset_id] = row
+            continue
+        if not is_valid_row(row):
+            report["removed"].append(asset_id)
+            continue
+        changes = _changed_fields(old_row, row)
+        if changes:
+            report["changes"][asset_id] = changes
+            if any(field in changes for field in ASSET_FIELDS):
+                report["changed"].append(asset_id)
+                report["rows"][asset_id] = row
+    report["removed"].extend(
+        asset_id for asset_id, row in old_rows.items() if asset_id not in seen and is_valid_row(row)
+    )
+    return report
+
+
+def apply_diff(
+    report: Dict,
+    asset_dir=REPO_ROOT / "test_assets",
+    case_dir=REPO_ROOT / "test_cases",
+    legacy_id_dir=REPO_ROOT / LEGACY_ID_DIR,
+) -> None:
+    """
+    Write the added/changed assets, delete removed ones and refresh the test cases they belong to.
+
+    Only the cases of the grouping keys that an added, changed or removed asset
+    had or now has are rebuilt, from the assets already in them plus the new
+    ones, so the work follows the size of the diff. A case directory that
+    still holds TestCase_{index} files is regenerated in full once instead,
+    recording the replaced ids in {legacy_id_dir}/{case dir name}.json.
+    """
+    from translator_testing_model.datamodel.pydanticmodel import TestAsset
+
+    from test_generators.generate_suite_for_demo import create_test_asset, create_test_cases_from_test_assets
+    from test_generators.utils import (
+        LEGACY_TEST_CASE_ID,
+        dump_all_to_json,
+        get_grouping_key,
+        get_test_case_id,
+        remove_all_json,
+    )
+
+    asset_dir, case_dir = Path(asset_dir), Path(case_dir)
+    touched_ids = {asset_id.replace(":", "_") for asset_id in [*report["rows"], *report["removed"]]}
+    if not touched_ids:
+        return
+    # the cases the touched assets leave, read before their files are replaced
+    keys = set()
+    for asset_id in touched_ids:
+        asset_path = asset_dir / f"{asset_id}.json"
+        if asset_path.exists():
+            keys.add(get_grouping_key(serialization.load_json(asset_path)))
+
+    test_assets = []
+    removed_ids = [asset_id.replace(":", "_") for asset_id in report["removed"]]
+    for asset_id, row in report["rows"].items():
+        test_asset = create_test_asset(row)
+        if test_asset is None:
+            # no longer a valid asset, e.g. its expected output was cleared
+            removed_ids.append(asset_id.replace(":", "_"))
+        else:
+            test_assets.append(test_asset)
+    written = dump_all_to_json(asset_dir, test_assets)
+    removed = remove_all_json(asset_dir, removed_ids)
+    logger.info(f"Wrote {written} assets, removed {removed}")
+
+    if any(LEGACY_TEST_CASE_ID.match(path.stem) for path in case_dir.glob("TestCase_*.json")):
+        _regenerate_test_cases(asset_dir, case_dir, legacy_id_dir)
+        return
+
+    new_assets = defaultdict(list)
+    for test_asset in test_assets:
+        new_assets[get_grouping_key(test_asset)].append(test_asset)
+    keys.update(new_assets)
+    test_cases, emptied = [], []
+    for key in keys:
+        test_case_id = get_test_case_id(key)
+        case_path = case_dir / f"{test_case_id}.json"
+        assets = list(new_assets[key])
+        if case_path.exists():
+            assets.extend(
+                TestAsset.model_validate(asset_json)
+                for asset_json in serialization.load_json(case_path).get("test_assets") or []
+                if asset_json["id"] not in touched_ids
+            )
+        if not assets:
+            emptied.append(test_case_id)
+            continue
+        assets.sort(key=lambda asset: int(asset.id.split("_")[1]))
+        test_cases.extend(create_test_cases_from_test_assets(assets).values())
+    written = dump_all_to_json(case_dir, test_cases)
+    removed = remove_all_json(case_dir, emptied)
+    logger.info(f"Rebuilt {len(test_cases)} test cases, {written} changed, removed {removed}")
+
+
+def _regenerate_test_cases(asset_dir: Path, case_dir: Path, legacy_id_dir: Path) -> None:
+    """Regenerate every test case from asset_dir, replacing the TestCase_{index} files."""
+    from translator_testing_model.datamodel.pydanticmodel import TestAsset
+
+    from test_generators.asset_sources import LocalCheckoutSource, load_test_assets
+    from test_generators.generate_suite_for_demo import create_test_cases_from_test_assets
+    from test_generators.utils import replace_legacy_test_cases, update_legacy_id_map
+
+    all_assets = load_test_assets(LocalCheckoutSource(asset_dir.parent), TestAsset, asset_dir=asset_dir.name)
+    all_assets = sorted(all_assets, key=lambda asset: int(asset.id.split("_")[1]))
+    test_cases = create_test_cases_from_test_assets(all_assets)
+    legacy_ids = replace_legacy_test_cases(case_dir, test_cases.values())
+    if legacy_ids:
+        update_legacy_id_map(legacy_id_dir / f"{case_dir.name}.json", legacy_ids)
+    logger.info(f"Wrote {len(test_cases)} test cases, replacing {len(legacy_ids)} legacy ones")
+
+
+def summarize(report: Dict) -> List[str]:
+    lines = [
+        f"{report['old']} -> {report['new']}",
+        f"added: {len(report['added'])}, removed: {len(report['removed'])}, "
+        f"changed: {len(report['changed'])} (+{len(report['changes']) - len(report['changed'])} non-asset edits)",
+    ]
+    for asset_id in report["changed"]:
+        fields = ", ".join(field for field in report["changes"][asset_id] if field in ASSET_FIELDS)
+        lines.append(f"  ~ {asset_id}: {fields}")
+    lines.extend(f"  + {asset_id}" for asset_id in report["added"])
+    lines.extend(f"  - {asset_id}" for asset_id in report["removed"])
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two TSV asset snapshots.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--report", help="write the full json report to this file")
+    parser.add_argument("--apply", action="store_true", help="regenerate the changed assets and test cases")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    report = diff_snapshots(args.old, args.new)
+    print("\n".join(summarize(report)))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.apply:
+        apply_diff(report)
+
+
+if __name__ == "__main__":
+    main()
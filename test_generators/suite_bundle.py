@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Packed, randomly accessible bundle of Test Assets, Cases and Suites.
+
+A bundle holds the objects of a normalized suite store (see suite_store) in one
+file, so a harness worker can open it and fetch any object by id without
+decoding the rest:
+
+    MAGIC
+    block 0 .. block n   zlib compressed runs of compact json records
+    index                zlib compressed json: block offsets and, per kind,
+                         id -> [block, offset in block, length], where
+                         case ids are "<case id>@<hash>" and asset ids
+                         "<asset dir>/<asset id>@<hash>" as in a suite
+                         store
+    footer               index offset, index length, MAGIC
+
+Records are grouped into blocks of about BLOCK_SIZE bytes so related objects
+compress together. Reads go through a memory map and decompress one block,
+and recently used blocks are cached.
+
+Usage: python -m test_generators.suite_bundle BUNDLE [--verify SUITE_DIR]
+"""
+import argparse
+import functools
+import mmap
+from pathlib import Path
+import struct
+from typing import Dict, Iterable, List, Optional
+import zlib
+
+from test_generators import serialization
+from test_generators.suite_store import SuiteStore, normalize_suite
+
+MAGIC = b"TTBUNDL1"
+FOOTER = struct.Struct("<QQ8s")
+BLOCK_SIZE = 1 << 16
+KINDS = ("suites", "cases", "assets")
+
+
+class BundleWriter:
+    """Append records kind by kind, then write the index and footer on close."""
+
+    def __init__(self, path, block_size: int = BLOCK_SIZE, level: int = 9):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self.block_size = block_size
+        self.level = level
+        self.f = open(self.tmp_path, "wb")
+        self.f.write(MAGIC)
+        self.blocks: List[List[int]] = []
+        self.index: Dict[str, Dict[str, List[int]]] = {kind: {} for kind in KINDS}
+        self.pending = bytearray()
+
+    def add(self, kind: str, object_id: str, object_json) -> None:
+        if object_id in self.index[kind]:
+            raise ValueError(f"{kind} {object_id} was added twice")
+        record = serialization.encode(object_json, indent=None)
+        self.index[kind][object_id] = [len(self.blocks), len(self.pending), len(record)]
+        self.pending += record
+        if len(self.pending) >= self.block_size:
+            self._flush_block()
+
+    def _flush_block(self) -> None:
+        if not self.pending:
+            return
+        data = zlib.compress(bytes(self.pending), self.level)
+        self.blocks.append([self.f.tell(), len(data)])
+        self.f.write(data)
+        self.pending = bytearray()
+
+    def close(self) -> None:
+        self._flush_block()
+        index = zlib.compress(serialization.encode({"blocks": self.blocks, **self.index}, indent=None), self.level)
+        index_offset = self.f.tell()
+        self.f.write(index)
+        self.f.write(FOOTER.pack(index_offset, len(index), MAGIC))
+        self.f.close()
+        self.tmp_path.replace(self.path)
+
+
+def write_bundle(
+    path,
+    suites: Iterable,
+    overlays: Iterable[Dict] = (),
+    block_size: int = BLOCK_SIZE,
+) -> Dict[str, int]:
+    """
+    Pack TestSuites (models or json) and suite overlays into a bundle.
+
+    Objects shared between suites are stored once, returns the number of
+    objects of each kind.
+    """
+    normalized = [normalize_suite(suite) for suite in suites]
+    writer = BundleWriter(path, block_size)
+    try:
+        seen_assets = {}
+        seen_cases = {}
+        for suite_ref, cases, assets in normalized:
+            seen_assets.update(assets)
+            seen_cases.update(cases)
+        for asset_ref, asset_json in seen_assets.items():
+            writer.add("assets", asset_ref, asset_json)
+        for case_ref, case_json in seen_cases.items():
+            writer.add("cases", case_ref, case_json)
+        writer._flush_block()
+        for suite_ref, cases, assets in normalized:
+            writer.add("suites", suite_ref["id"], suite_ref)
+        for overlay in overlays:
+            writer.add("suites", overlay["id"], overlay)
+        writer.close()
+    except BaseException:
+        writer.f.close()
+        writer.tmp_path.unlink(missing_ok=True)
+        raise
+    return {kind: len(ids) for kind, ids in writer.index.items()}
+
+
+class BundleReader(SuiteStore):
+    """A SuiteStore backed by a memory mapped bundle instead of a directory."""
+
+    def __init__(self, path, cache_size: int = 4096, block_cache_size: int = 64):
+        super().__init__(path, cache_size)
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a suite bundle")
+        index_offset, index_length, magic = FOOTER.unpack(self._mmap[-FOOTER.size:])
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is truncated")
+        self.index = serialization.decode(zlib.decompress(self._mmap[index_offset:index_offset + index_length]))
+        self._block = functools.lru_cache(maxsize=block_cache_size)(self._read_block)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> "BundleReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _read_block(self, block: int) -> bytes:
+        offset, length = self.index["blocks"][block]
+        return zlib.decompress(self._mmap[offset:offset + length])
+
+    def _read_bytes_uncached(self, subdir: str, object_id: str) -> bytes:
+        try:
+            block, offset, length = self.index[subdir][object_id]
+        except KeyError:
+            raise KeyError(f"No {subdir} {object_id} in {self.path}") from None
+        return self._block(block)[offset:offset + length]
+
+    def suite_ids(self) -> List[str]:
+        return sorted(self.index["suites"])
+
+    def get_suite(self, suite_id: str):
+        return self.load_suite(suite_id)
+
+
+def verify_bundle(path, suite_dir, suite_ids: Optional[Iterable[str]] = None) -> List[str]:
+    """Compare every suite of a bundle with <suite_dir>/<suite id>.json, returns the ids that differ."""
+    mismatches = []
+    with BundleReader(path) as reader:
+        for suite_id in suite_ids or reader.suite_ids():
+            with open(Path(suite_dir) / f"{suite_id}.json", "rb") as f:
+                expected = serialization.decode(f.read())
+            if reader.load_suite_json(suite_id) != expected:
+                mismatches.append(suite_id)
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or verify a suite bundle.")
+    parser.add_argument("bundle", type=Path)
+    parser.add_argument("--verify", type=Path, metavar="SUITE_DIR", help="compare the suites with their json files")
+    args = parser.parse_args(argv)
+
+    with BundleReader(args.bundle) as reader:
+        counts = ", ".join(f"{len(reader.index[kind])} {kind}" for kind in KINDS)
+        print(f"{args.bundle}: {counts} in {len(reader.index['blocks'])} blocks")
+        for suite_id in reader.suite_ids():
+            base = " (overlay)" if reader.is_overlay(suite_id) else ""
+            print(f"  {suite_id}{base}")
+    if args.verify:
+        mismatches = verify_bundle(args.bundle, args.verify)
+        if mismatches:
+            raise SystemExit(f"Differs from {args.verify}: {', '.join(mismatches)}")
+        print(f"All suites match {args.verify}")
+
+
+if __name__ == "__main__":
+    main()
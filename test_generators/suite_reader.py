@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Stream the test cases of an embedded test_suites/*.json file.
+
+The suite file is read in chunks and its test_cases mapping is decoded one
+value at a time, so the first TestCase can be validated and dispatched before
+the rest of the file is read, and memory stays bounded by the largest single
+test case. While streaming, the byte range of every test case is recorded, so
+that later reads can seek directly to a case id.
+
+    reader = SuiteReader("test_suites/sprint_6_tests.json")
+    for test_case in reader.iter_test_cases():
+        ...
+    test_case = reader.get_test_case("TestCase_0")
+"""
+import codecs
+import json
+from typing import Dict, Iterator, Optional, Tuple
+
+from test_generators.suite_store import get_test_case_model
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+class _Cursor:
+    """A decoded text window over a binary file that tracks the byte offset of its position."""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        # byte offset of pos in the file, advanced along with pos
+        self.byte_pos = 0
+        self.eof = False
+
+    def fill(self, size: Optional[int] = None) -> bool:
+        """Read another size bytes (a chunk by default), dropping the consumed text. False at the end of the file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(size or self.chunk_size)
+        self.eof = not chunk
+        self.text = self.text[self.pos:] + self.decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+        return not self.eof or bool(self.text)
+
+    def peek(self) -> str:
+        """The next non-whitespace character, or "" at the end of the file."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                # json whitespace is ascii, one byte per character
+                self.pos += 1
+                self.byte_pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at byte {self.byte_pos}, found {found!r}")
+        self.pos += 1
+        self.byte_pos += 1
+
+    def value(self) -> Tuple[object, int, int]:
+        """
+        Decode the next json value, returning it with its start and end byte offsets.
+
+        A value that does not fit the window is retried after reading twice as
+        much as the time before, so large values take a logarithmic number of
+        decoding attempts.
+        """
+        self.peek()
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill(read_size):
+                    raise
+                read_size *= 2
+                continue
+            # a number cut off at the end of the window would decode to a shorter one
+            if end == len(self.text) and not self.eof:
+                self.fill(read_size)
+                read_size *= 2
+                continue
+            start = self.byte_pos
+            self.byte_pos += len(self.text[self.pos:end].encode("utf-8"))
+            self.pos = end
+            return value, start, self.byte_pos
+
+
+class SuiteReader:
+    """Lazily read a TestSuite json file."""
+
+    def __init__(self, path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.suite_fields: Optional[Dict] = None
+        self.case_index: Optional[Dict[str, Tuple[int, int]]] = None
+
+    def iter_case_json(self) -> Iterator[Tuple[str, Dict]]:
+        """
+        Stream (case id, test case json) pairs in file order.
+
+        Completing the iteration also fills in suite_fields, the suite without
+        its test cases, and case_index, the byte range of every test case.
+        """
+        suite_fields = {}
+        case_index = {}
+        with open(self.path, "rb") as f:
+            cursor = _Cursor(f, self.chunk_size)
+            cursor.expect("{")
+            while cursor.peek() != "}":
+                if suite_fields or case_index:
+                    cursor.expect(",")
+                key, _, _ = cursor.value()
+                cursor.expect(":")
+                if key != "test_cases" or cursor.peek() != "{":
+                    suite_fields[key], _, _ = cursor.value()
+                    continue
+                cursor.expect("{")
+                first = True
+                while cursor.peek() != "}":
+                    if not first:
+                        cursor.expect(",")
+                    first = False
+                    case_id, _, _ = cursor.value()
+                    cursor.expect(":")
+                    case_json, start, end = cursor.value()
+                    case_index[case_id] = (start, end - start)
+                    yield case_id, case_json
+                cursor.expect("}")
+                # keep the position of test_cases among the fields for load_suite_json
+                suite_fields["test_cases"] = None
+        self.suite_fields = suite_fields
+        self.case_index = case_index
+
+    def iter_test_cases(self, start_at: Optional[str] = None) -> Iterator:
+        """
+        Yield validated TestCases in file order, optionally starting at a case id.
+
+        An unknown start_at raises KeyError, once the file has been scanned if
+        the case index is not built yet.
+        """
+        if start_at is not None and self.case_index is not None:
+            if start_at not in self.case_index:
+                raise KeyError(start_at)
+            case_ids = list(self.case_index)
+            for case_id in case_ids[case_ids.index(start_at):]:
+                yield self.get_test_case(case_id)
+            return
+        started = start_at is None
+        for case_id, case_json in self.iter_case_json():
+            started = started or case_id == start_at
+            if started:
+                yield get_test_case_model(case_json).model_validate(case_json)
+        if not started:
+            raise KeyError(start_at)
+
+    def build_index(self) -> Dict[str, Tuple[int, int]]:
+        """Scan the whole file once for the byte range of every test case."""
+        if self.case_index is None:
+            for _ in self.iter_case_json():
+                pass
+        return self.case_index
+
+    def get_case_json(self, case_id: str) -> Dict:
+        """Read a single test case by seeking to it."""
+        offset, length = self.build_index()[case_id]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def get_test_case(self, case_id: str):
+        case_json = self.get_case_json(case_id)
+        return get_test_case_model(case_json).model_validate(case_json)
+
+    def case_ids(self):
+        return list(self.build_index())
+
+    def load_suite_json(self) -> Dict:
+        """The whole suite json, read one test case at a time."""
+        self.build_index()
+        return {
+            key: {case_id: self.get_case_json(case_id) for case_id in self.case_index} if key == "test_cases" else value
+            for key, value in self.suite_fields.items()
+        }
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Normalized, reference-based storage of TestSuites.
+
+Instead of embedding full copies of every TestCase and TestAsset, a store keeps
+each object once:
+
+    <root>/assets/<asset dir>/<asset id>@<hash>.json  full TestAsset
+    <root>/cases/<case id>@<hash>.json                TestCase whose test_assets lists
+                                                      "<asset dir>/<asset id>@<hash>"
+                                                      references
+    <root>/suites/<suite id>.json                     TestSuite whose test_cases maps
+                                                      case ids to "<case id>@<hash>"
+                                                      references, or an overlay of
+                                                      another suite
+
+Assets are shared by all suites and kept apart by the repo directory they come
+from (test_assets, pathfinder_test_assets). Asset ids are not unique, one id can
+stand for different assets in the same suite or in different suites, so assets
+are also keyed by a hash of their content. Case ids are only unique within
+their suite, so cases are keyed the same way, and a case that several suites
+hold with the same content is stored once.
+
+A suite that only differs from another one by its environment (e.g. the PROD
+and TEST copies of a suite) is stored as an overlay: the id of its base suite,
+the suite fields it overrides and the fields it sets on every test case,
+typically just test_env. Overlays are applied at load time, so the copies
+cannot drift apart.
+
+SuiteStore resolves references on demand, so a harness can load a suite and
+hydrate only the cases it is about to run. Fixing one asset adds one asset file
+and one file for every distinct case that uses it, cases that differ between
+suites (e.g. by test_env outside of an overlay) are distinct. Writes end by
+deleting the case and asset versions no suite refers to any more.
+"""
+import functools
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from test_generators import serialization
+from test_generators.asset_sources import REPO_ROOT
+
+DEFAULT_STORE_ROOT = REPO_ROOT / "test_store"
+
+
+def get_asset_dir(asset_json: Dict) -> str:
+    """The repo directory an asset belongs in, judged by its fields."""
+    return "pathfinder_test_assets" if "source_input_id" in asset_json else "test_assets"
+
+
+def _content_hash(object_json: Dict) -> str:
+    canonical = json.dumps(object_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def get_asset_ref(asset_json: Dict) -> str:
+    """The "<asset dir>/<asset id>@<hash>" reference of an asset, the hash taken over its canonical json."""
+    return f"{get_asset_dir(asset_json)}/{asset_json['id']}@{_content_hash(asset_json)}"
+
+
+def get_case_ref(case_json: Dict) -> str:
+    """The "<case id>@<hash>" reference of a test case whose test_assets are references."""
+    return f"{case_json['id']}@{_content_hash(case_json)}"
+
+
+def normalize_suite(suite) -> Tuple[Dict, Dict[str, Dict], Dict[str, Dict]]:
+    """
+    Split a TestSuite (model or json) into referencing json objects.
+
+    Returns (suite, cases by reference, assets by reference).
+    """
+    suite_json = serialization.to_jsonable(suite)
+    case_refs = {}
+    cases = {}
+    assets = {}
+    for case_id, case_json in (suite_json.get("test_cases") or {}).items():
+        asset_refs = []
+        for asset_json in case_json.get("test_assets") or []:
+            asset_ref = get_asset_ref(asset_json)
+            assets[asset_ref] = asset_json
+            asset_refs.append(asset_ref)
+        case_json = {**case_json, "test_assets": asset_refs}
+        case_refs[case_id] = get_case_ref(case_json)
+        cases[case_refs[case_id]] = case_json
+    suite_ref = {**suite_json, "test_cases": case_refs}
+    return suite_ref, cases, assets
+
+
+def write_normalized_suite(suite, store_root=DEFAULT_STORE_ROOT, sweep: bool = True, **dump_options) -> int:
+    """
+    Write a suite with its cases and assets into a store, returns the number of files written.
+
+    Unless sweep is False, e.g. to sweep once after writing many suites, the
+    case and asset versions no longer referred to are deleted afterwards.
+    """
+    from test_generators.utils import dump_all_to_json, dump_to_json
+
+    store_root = Path(store_root)
+    suite_ref, cases, assets = normalize_suite(suite)
+    assets_by_dir = {}
+    for asset_ref, asset_json in assets.items():
+        asset_dir, asset_name = asset_ref.split("/", 1)
+        assets_by_dir.setdefault(asset_dir, {})[asset_name] = asset_json
+    for subdir in [*(f"assets/{asset_dir}" for asset_dir in assets_by_dir), "cases", "suites"]:
+        (store_root / subdir).mkdir(parents=True, exist_ok=True)
+    written = sum(
+        dump_all_to_json(store_root / "assets" / asset_dir, dir_assets, **dump_options)
+        for asset_dir, dir_assets in assets_by_dir.items()
+    )
+    written += dump_all_to_json(store_root / "cases", cases, **dump_options)
+    written += dump_to_json(store_root / "suites", suite_ref, **dump_options)
+    if sweep:
+        collect_garbage(store_root)
+    return written
+
+
+def _stored_names(path: Path) -> List[str]:
+    return [file_path.name[:-len(".json")] for file_path in path.glob("*.json") if not file_path.name.startswith(".")]
+
+
+def collect_garbage(store_root=DEFAULT_STORE_ROOT) -> int:
+    """
+    Delete the cases no suite refers to and the assets no remaining case
+    refers to, e.g. the old versions of fixed ones. Returns the number of
+    files deleted.
+    """
+    from test_generators.utils import remove_all_json
+
+    store_root = Path(store_root)
+    case_refs = set()
+    for path in (store_root / "suites").glob("*.json"):
+        suite_ref = serialization.load_json(path)
+        if "base" not in suite_ref:
+            case_refs.update(suite_ref.get("test_cases", {}).values())
+    asset_refs = set()
+    for case_ref in case_refs:
+        asset_refs.update(serialization.load_json(store_root / "cases" / f"{case_ref}.json").get("test_assets") or [])
+    removed = 0
+    if (store_root / "cases").is_dir():
+        unused = [case_ref for case_ref in _stored_names(store_root / "cases") if case_ref not in case_refs]
+        removed += remove_all_json(store_root / "cases", unused)
+    asset_paths = (store_root / "assets").iterdir() if (store_root / "assets").is_dir() else []
+    for asset_path in filter(Path.is_dir, asset_paths):
+        unused = [name for name in _stored_names(asset_path) if f"{asset_path.name}/{name}" not in asset_refs]
+        removed += remove_all_json(asset_path, unused)
+    return removed
+
+
+def derive_overlay(base, variant) -> Optional[Dict]:
+    """
+    Express variant as an overlay of base, or None if it is not one.
+
+    variant must have the same test cases with the same assets as base, and
+    every test case field that differs must differ the same way in all cases.
+    """
+    base_json = serialization.to_jsonable(base)
+    variant_json = serialization.to_jsonable(variant)
+    base_cases = base_json.get("test_cases") or {}
+    variant_cases = variant_json.get("test_cases") or {}
+    if variant_json["id"] == base_json["id"] or list(base_cases) != list(variant_cases):
+        return None
+    case_overrides = None
+    for case_id, base_case in base_cases.items():
+        variant_case = variant_cases[case_id]
+        if set(base_case) != set(variant_case):
+            return None
+        overrides = {field: value for field, value in variant_case.items() if base_case[field] != value}
+        if case_overrides is None:
+            if "test_assets" in overrides or "id" in overrides:
+                return None
+            case_overrides = overrides
+        elif overrides != case_overrides:
+            return None
+    suite_overrides = {
+        field: value
+        for field, value in variant_json.items()
+        if field != "test_cases" and base_json.get(field) != value
+    }
+    return {
+        "id": variant_json["id"],
+        "base": base_json["id"],
+        "suite": suite_overrides,
+        "test_cases": case_overrides or {},
+    }
+
+
+def apply_overlay(base_json: Dict, overlay: Dict) -> Dict:
+    """Apply an overlay to a hydrated base suite json."""
+    case_overrides = overlay.get("test_cases") or {}
+    suite_json = {**base_json, **overlay.get("suite", {})}
+    suite_json["test_cases"] = {
+        case_id: {**case_json, **case_overrides} for case_id, case_json in (base_json.get("test_cases") or {}).items()
+    }
+    return suite_json
+
+
+def write_suite_overlay(overlay: Dict, store_root=DEFAULT_STORE_ROOT, sweep: bool = True, **dump_options) -> int:
+    """
+    Write an overlay in place of a full suite, its base has to be in the store as well.
+
+    Cases only the replaced suite referred to are deleted unless sweep is False.
+    """
+    from test_generators.utils import dump_to_json
+
+    (Path(store_root) / "suites").mkdir(parents=True, exist_ok=True)
+    written = int(dump_to_json(Path(store_root) / "suites", overlay, **dump_options))
+    if sweep:
+        collect_garbage(store_root)
+    return written
+
+
+def get_test_case_model(case_json: Dict):
+    """The TestCase model a test case json validates into, judged by its assets."""
+    from translator_testing_model.datamodel.pydanticmodel import PathfinderTestCase, TestCase
+
+    assets = case_json.get("test_assets") or []
+    if assets and "source_input_id" in assets[0]:
+        return PathfinderTestCase
+    return TestCase
+
+
+class SuiteStore:
+    """
+    Load suites from a normalized store, hydrating references lazily.
+
+    Recently read files are cached as bytes and decoded on every access, so
+    callers get their own objects and may modify them.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_ROOT, cache_size: int = 4096):
+        self.root = Path(root)
+        self._read_bytes = functools.lru_cache(maxsize=cache_size)(self._read_bytes_uncached)
+
+    def _read_bytes_uncached(self, subdir: str, object_id: str) -> bytes:
+        with open(self.root / subdir / f"{object_id}.json", "rb") as f:
+            return f.read()
+
+    def _read(self, subdir: str, object_id: str) -> Dict:
+        return serialization.decode(self._read_bytes(subdir, object_id))
+
+    def suite_ids(self) -> List[str]:
+        return sorted(path.stem for path in (self.root / "suites").glob("*.json"))
+
+    def get_asset_json(self, asset_ref: str) -> Dict:
+        """An asset by its "<asset dir>/<asset id>@<hash>" reference."""
+        return self._read("assets", asset_ref)
+
+    def _get_case_json(self, case_ref: str) -> Dict:
+        case_json = self._read("cases", case_ref)
+        case_json["test_assets"] = [self.get_asset_json(asset_ref) for asset_ref in case_json.get("test_assets") or []]
+        return case_json
+
+    def get_test_case_json(self, suite_id: str, case_id: str) -> Dict:
+        """A TestCase of a suite as json with its assets embedded, like in the old suite files."""
+        suite_ref, case_overrides = self._resolve(suite_id)
+        return {**self._get_case_json(suite_ref["test_cases"][case_id]), **case_overrides}
+
+    def get_test_case(self, suite_id: str, case_id: str):
+        case_json = self.get_test_case_json(suite_id, case_id)
+        return get_test_case_model(case_json).model_validate(case_json)
+
+    def _resolve(self, suite_id: str) -> Tuple[Dict, Dict]:
+        """The suite with case references and the fields its overlays set on every test case."""
+        suite_ref = self._read("suites", suite_id)
+        if "base" not in suite_ref:
+            return suite_ref, {}
+        base_ref, case_overrides = self._resolve(suite_ref["base"])
+        return {**base_ref, **suite_ref["suite"]}, {**case_overrides, **suite_ref["test_cases"]}
+
+    def get_suite_ref(self, suite_id: str) -> Dict:
+        """The suite with test_cases mapping case ids to case references, overlays applied to its own fields."""
+        return self._resolve(suite_id)[0]
+
+    def is_overlay(self, suite_id: str) -> bool:
+        return "base" in self._read("suites", suite_id)
+
+    def iter_test_case_json(self, suite_id: str) -> Iterator[Dict]:
+        suite_ref, case_overrides = self._resolve(suite_id)
+        for case_ref in (suite_ref.get("test_cases") or {}).values():
+            yield {**self._get_case_json(case_ref), **case_overrides}
+
+    def iter_test_cases(self, suite_id: str) -> Iterator:
+        """Yield the suite's TestCases one at a time, hydrating each on demand."""
+        for case_json in self.iter_test_case_json(suite_id):
+            yield get_test_case_model(case_json).model_validate(case_json)
+
+    def load_suite_json(self, suite_id: str) -> Dict:
+        """The fully hydrated suite json, identical to the embedded suite format."""
+        suite_json = self.get_suite_ref(suite_id)
+        suite_json["test_cases"] = {case_json["id"]: case_json for case_json in self.iter_test_case_json(suite_id)}
+        return suite_json
+
+    def load_suite(self, suite_id: str):
+        from translator_testing_model.datamodel.pydanticmodel import TestSuite
+
+        return TestSuite.model_validate(self.load_suite_json(suite_id))
+
+
+def main(argv=None):
+    """
+    Convert embedded suite files into a normalized store, storing environment copies as overlays.
+
+    Suites are stored by id, so two files with the same suite id are an error.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert embedded TestSuite json files into a normalized store.")
+    parser.add_argument("suites", nargs="+", type=Path, help="embedded suite json files")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE_ROOT)
+    args = parser.parse_args(argv)
+    converted = []
+    paths_by_id = {}
+    for path in args.suites:
+        with open(path, encoding="utf-8") as f:
+            suite_json = json.load(f)
+        if suite_json["id"] in paths_by_id:
+            raise ValueError(f"{path} and {paths_by_id[suite_json['id']]} both hold suite {suite_json['id']}")
+        paths_by_id[suite_json["id"]] = path
+        overlay = next(filter(None, (derive_overlay(base_json, suite_json) for base_json in converted)), None)
+        if overlay is not None:
+            write_suite_overlay(overlay, args.store, sweep=False)
+            print(f"{path}: stored as an overlay of {overlay['base']}")
+            continue
+        written = write_normalized_suite(suite_json, args.store, sweep=False)
+        converted.append(suite_json)
+        print(f"{path}: wrote {written} files")
+    removed = collect_garbage(args.store)
+    if removed:
+        print(f"Deleted {removed} unreferenced files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Minimal trace spans with an OpenTelemetry-compatible file exporter.
+
+Spans nest through a context variable, so a span opened inside another, in
+the same thread or in an asyncio task created under it, becomes its child:
+
+    tracer = Tracer(OtlpJsonFileExporter("trace.jsonl"))
+    with tracer.span("test_case", {"test_case.id": case_id}):
+        with tracer.span("query", kind=SPAN_KIND_CLIENT) as span:
+            span.set_attribute("http.status_code", 200)
+    tracer.close()
+
+suite_span, test_case_span and asset_span open the spans of a test run keyed
+by the ids of its TestSuite, TestCase and TestAsset (models or their json),
+so runs of any suite can be grouped by case and asset in a trace viewer.
+
+The exporter writes OTLP/JSON: every line is an ExportTraceServiceRequest,
+the format of the OpenTelemetry collector's file exporter, which the
+collector's otlpjsonfile receiver and most trace viewers can load, so runs
+can be inspected without live tracing infrastructure. Without an exporter
+spans are timed but dropped.
+"""
+from contextlib import contextmanager
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _attribute_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64 bit integers as strings
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_attribute_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: Dict[str, Any]) -> List[Dict]:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def _get(test_object, field: str):
+    """Read a field from either a model or its json, enums by their value."""
+    value = test_object.get(field) if isinstance(test_object, dict) else getattr(test_object, field, None)
+    return getattr(value, "value", value)
+
+
+class Span:
+    """A timed operation with attributes and events, see OpenTelemetry's span."""
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["Span"] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict] = []
+        self.status_code = STATUS_UNSET
+        self.status_message: Optional[str] = None
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.events.append({"name": name, "time": time.time_ns(), "attributes": dict(attributes or {})})
+
+    def set_error(self, message: str) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = message
+
+    def end(self) -> None:
+        if self.end_time is None:
+            self.end_time = time.time_ns()
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds, once ended."""
+        return None if self.end_time is None else (self.end_time - self.start_time) / 1e9
+
+    def to_otlp(self) -> Dict:
+        span_json = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time or self.start_time),
+            "attributes": _attributes(self.attributes),
+            "events": [
+                {"timeUnixNano": str(event["time"]), "name": event["name"], "attributes": _attributes(event["attributes"])}
+                for event in self.events
+            ],
+            "status": {"code": self.status_code},
+        }
+        if self.parent_span_id is not None:
+            span_json["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span_json["status"]["message"] = self.status_message
+        return span_json
+
+
+class OtlpJsonFileExporter:
+    """Append ended spans to a file as OTLP/JSON lines, batch_size spans per line."""
+
+    def __init__(self, path, service_name: str = "translator-tests", batch_size: int = 512):
+        self.f = open(path, "a", encoding="utf-8")
+        self.resource = {"attributes": _attributes({"service.name": service_name})}
+        self.batch_size = batch_size
+        self.spans: List[Span] = []
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def export(self, span: Span) -> None:
+        with self.lock:
+            self.spans.append(span)
+            if len(self.spans) >= self.batch_size:
+                self._write()
+
+    def _write(self) -> None:
+        if not self.spans:
+            return
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": self.resource,
+                    "scopeSpans": [
+                        {"scope": {"name": "test_generators"}, "spans": [span.to_otlp() for span in self.spans]}
+                    ],
+                }
+            ]
+        }
+        self.f.write(json.dumps(request) + "\n")
+        self.count += len(self.spans)
+        self.spans = []
+
+    def flush(self) -> None:
+        with self.lock:
+            self._write()
+            self.f.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.f.close()
+
+
+class Tracer:
+    """Opens spans under the current one and hands them to the exporter when they end."""
+
+    def __init__(self, exporter: Optional[OtlpJsonFileExporter] = None):
+        self.exporter = exporter
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+    ) -> Iterator[Span]:
+        """A child span of the current span, ended and exported on exit; exceptions mark it as an error."""
+        span = Span(name, _current_span.get(), kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            if self.exporter is not None:
+                self.exporter.export(span)
+
+    def record_span(
+        self,
+        name: str,
+        start_time: int,
+        attributes: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> Span:
+        """
+        A child span of the current span for an operation only observed from
+        outside, e.g. through polling: it started at start_time (ns since the
+        epoch) and ends now. It is exported right away.
+        """
+        span = Span(name, _current_span.get(), attributes=attributes)
+        span.start_time = start_time
+        if error is not None:
+            span.set_error(error)
+        span.end()
+        if self.exporter is not None:
+            self.exporter.export(span)
+        return span
+
+    def suite_span(self, suite, num_cases: Optional[int] = None) -> ContextManager[Span]:
+        """A "suite" span for a TestSuite, num_cases defaulting to all of its cases."""
+        if num_cases is None:
+            num_cases = len(_get(suite, "test_cases") or {})
+        return self.span("suite", {"suite.id": _get(suite, "id"), "suite.cases": num_cases})
+
+    def test_case_span(self, test_case) -> ContextManager[Span]:
+        """A "test_case" span for a TestCase."""
+        components = _get(test_case, "components") or []
+        attributes = {
+            "test_case.id": _get(test_case, "id"),
+            "test_case.objective": _get(test_case, "test_case_objective"),
+            "test_env": _get(test_case, "test_env"),
+            "component": getattr(components[0], "value", components[0]) if components else None,
+        }
+        return self.span("test_case", attributes)
+
+    def asset_span(self, asset) -> ContextManager[Span]:
+        """An "asset" span for a TestAsset."""
+        attributes = {
+            "asset.id": _get(asset, "id"),
+            "asset.input_id": _get(asset, "input_id"),
+            "asset.predicate": _get(asset, "predicate_id"),
+            "asset.output_id": _get(asset, "output_id"),
+            "asset.expected_output": _get(asset, "expected_output"),
+        }
+        return self.span("asset", attributes)
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
@@ -2,9 +2,15 @@
 """
 Utility functions for creating Test Suites.
 """
+import concurrent.futures
+import hashlib
 import json
+import os
+from pathlib import Path
 import re
-from typing import Dict
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from translator_testing_model.datamodel.pydanticmodel import (
     PathfinderTestCase,
@@ -14,24 +20,100 @@ from translator_testing_model.datamodel.pydanticmodel import (
     ComponentEnum,
 )
 
+from test_generators import serialization
+
+
+LEGACY_TEST_CASE_ID = re.compile(r"TestCase_\d+$")
+
+
+def _get(test_object, field: str):
+    """Read a field from either a model or its json."""
+    if isinstance(test_object, dict):
+        return test_object.get(field)
+    return getattr(test_object, field)
+
+
+def get_qualifier_key(test_asset) -> str:
+    qualifier_key = ""
+    qualifiers = _get(test_asset, "qualifiers")
+    if qualifiers and qualifiers is not None:
+        for qualifier in qualifiers:
+            qualifier_key = qualifier_key + _get(qualifier, "value")
+    return qualifier_key
+
+
+def get_grouping_key(test_asset) -> Tuple[str, str, str]:
+    return (_get(test_asset, "input_id"), _get(test_asset, "predicate_name"), get_qualifier_key(test_asset))
+
+
+def get_pathfinder_grouping_key(test_asset) -> Tuple[str, str, str, str]:
+    return (
+        _get(test_asset, "source_input_id"),
+        _get(test_asset, "target_input_id"),
+        _get(test_asset, "predicate_name"),
+        get_qualifier_key(test_asset),
+    )
+
+
+def get_test_case_id(key: Tuple) -> str:
+    """
+    Derive a TestCase id from its grouping key.
+
+    The id only depends on the key, so it stays the same when assets are added
+    or removed elsewhere, unlike the former TestCase_{index} ids. It is spelled
+    TestCase-{digest} so it can never be taken for one of those, even when the
+    digest happens to be all digits.
+    """
+    digest = hashlib.sha256("\x1f".join(str(part) for part in key).encode("utf-8")).hexdigest()
+    return f"TestCase-{digest[:12]}"
+
+
+def get_legacy_id_mapping(test_cases_json: Dict[str, Dict], grouping_key=get_grouping_key) -> Dict[str, str]:
+    """Map the TestCase_{index} ids of a previously generated suite to their stable ids."""
+    mapping = {}
+    for test_case_id, test_case in test_cases_json.items():
+        if LEGACY_TEST_CASE_ID.match(test_case_id) and test_case.get("test_assets"):
+            mapping[test_case_id] = get_test_case_id(grouping_key(test_case["test_assets"][0]))
+    return mapping
+
+
+def get_legacy_id_mapping_from_dir(case_dir, grouping_key=get_grouping_key) -> Dict[str, str]:
+    """Same as get_legacy_id_mapping for a directory of TestCase_{index}.json files."""
+    test_cases_json = {}
+    for path in Path(case_dir).glob("TestCase_*.json"):
+        if LEGACY_TEST_CASE_ID.match(path.stem):
+            with open(path, encoding="utf-8") as file:
+                test_cases_json[path.stem] = json.load(file)
+    return get_legacy_id_mapping(test_cases_json, grouping_key)
+
+
+def replace_legacy_test_cases(case_dir, test_cases, grouping_key=get_grouping_key, **dump_options) -> Dict[str, str]:
+    """
+    Write test cases into case_dir, deleting the TestCase_{index}.json files they replace.
+
+    Previously generated files that are not written again are removed too.
+    Returns the legacy ids that were removed mapped to their stable ids.
+    """
+    legacy_ids = get_legacy_id_mapping_from_dir(case_dir, grouping_key)
+    dump_all_to_json(case_dir, test_cases, remove_orphans=True, **dump_options)
+    for legacy_id in legacy_ids:
+        (Path(case_dir) / f"{legacy_id}.json").unlink(missing_ok=True)
+    return legacy_ids
+
 
 def create_test_cases_from_test_assets(test_assets, test_env: TestEnvEnum) -> Dict[str, TestCase]:
     # Group test assets based on input_id and relationship
     grouped_assets = {}
     for test_asset in test_assets:
-        qualifier_key = ""
-        if test_asset.qualifiers and test_asset.qualifiers is not None:
-            for qualifier in test_asset.qualifiers:
-                qualifier_key = qualifier_key + qualifier.value
-        key = (test_asset.input_id, test_asset.predicate_name, qualifier_key)
+        key = get_grouping_key(test_asset)
         if key not in grouped_assets:
             grouped_assets[key] = []
         grouped_assets[key].append(test_asset)
 
     # Create test cases from grouped test assets
     test_cases = {}
-    for idx, (key, assets) in enumerate(grouped_assets.items()):
-        test_case_id = f"TestCase_{idx}"
+    for key, assets in grouped_assets.items():
+        test_case_id = get_test_case_id(key)
         descriptions = '; '.join(asset.description for asset in assets)
         first_asset = next(iter(assets))
         test_case = TestCase(
@@ -83,19 +165,15 @@ def create_pathfinder_test_cases_from_test_assets(test_assets, test_env: TestEnv
     # Group test assets based on input_id and relationship
     grouped_assets = {}
     for test_asset in test_assets:
-        qualifier_key = ""
-        if test_asset.qualifiers and test_asset.qualifiers is not None:
-            for qualifier in test_asset.qualifiers:
-                qualifier_key = qualifier_key + qualifier.value
-        key = (test_asset.source_input_id, test_asset.target_input_id, test_asset.predicate_name, qualifier_key)
+        key = get_pathfinder_grouping_key(test_asset)
         if key not in grouped_assets:
             grouped_assets[key] = []
         grouped_assets[key].append(test_asset)
 
     # Create test cases from grouped test assets
     test_cases = {}
-    for idx, (key, assets) in enumerate(grouped_assets.items()):
-        test_case_id = f"TestCase_{idx}"
+    for key, assets in grouped_assets.items():
+        test_case_id = get_test_case_id(key)
         first_asset = next(iter(assets))
         test_case = PathfinderTestCase(
             id=test_case_id,
@@ -115,7 +193,216 @@ def create_pathfinder_test_cases_from_test_assets(test_assets, test_env: TestEnv
 
     return test_cases
 
-def dump_to_json(file_path, test_object):
-    filename = f"{file_path}/{test_object.id}.json"
-    with open(f"{filename}", 'w', encoding='utf-8') as file:
-        json.dump(test_object.dict(), file, ensure_ascii=False, indent=4)
+
+def update_legacy_id_map(path, mapping: Dict[str, str]) -> None:
+    """Merge old-to-new TestCase id pairs into a json mapping file."""
+    path = Path(path)
+    existing = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as file:
+            existing = json.load(file)
+    merged = {**existing, **mapping}
+    if merged != existing:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, json.dumps(merged, indent=4, sort_keys=True).encode("utf-8"))
+
+
+MANIFEST_FILENAME = ".manifest.json"
+
+# read once, os.umask can only be queried by setting it, which is not thread safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hash_file(path: Path) -> Optional[str]:
+    """The digest of a generated file, of the json it holds for compressed siblings."""
+    data = path.read_bytes()
+    for compression, suffix in serialization.COMPRESSIONS.items():
+        if path.suffix == suffix:
+            try:
+                data = serialization.decompress(data, compression)
+            except Exception:
+                # corrupt, or zstd without zstandard installed
+                return None
+    return _hash_bytes(data)
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """
+    Write to a temp file next to path and rename it into place, keeping the
+    mode of the file it replaces or giving a new file the default mode.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        try:
+            mode = path.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class OutputManifest:
+    """
+    Content hashes of the generated files in one output directory.
+
+    Every entry also holds the size and mtime the file had when it was hashed.
+    A file whose size or mtime changed since, e.g. by a git checkout, is hashed
+    again instead of trusting the recorded digest.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = Path(file_path)
+        self.path = self.file_path / MANIFEST_FILENAME
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as file:
+                self.entries = json.load(file)
+        self.touched: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def is_current(self, filename: str, digest: str) -> bool:
+        path = self.file_path / filename
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return False
+        entry = self.entries.get(filename)
+        # entries of older manifests are bare digests without a stat
+        if not isinstance(entry, dict) or (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            entry = self._entry(_hash_file(path), stat)
+            with self._lock:
+                self.entries[filename] = entry
+        return entry["sha256"] == digest
+
+    @staticmethod
+    def _entry(digest: Optional[str], stat: os.stat_result) -> Dict:
+        return {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def record(self, filename: str, digest: str) -> None:
+        """Record the digest of a file as it is on disk now."""
+        entry = self._entry(digest, (self.file_path / filename).stat())
+        with self._lock:
+            self.entries[filename] = entry
+            self.touched.add(filename)
+
+    def remove(self, filename: str) -> None:
+        """Delete a generated file and forget it."""
+        (self.file_path / filename).unlink(missing_ok=True)
+        with self._lock:
+            self.entries.pop(filename, None)
+            self.touched.discard(filename)
+
+    def remove_orphans(self) -> List[str]:
+        """Delete generated files that were not produced by this run."""
+        orphans = sorted(set(self.entries) - self.touched)
+        for filename in orphans:
+            self.remove(filename)
+        return orphans
+
+    def save(self) -> None:
+        _atomic_write(self.path, json.dumps(self.entries, indent=0, sort_keys=True).encode("utf-8"))
+
+
+def dump_to_json(
+    file_path,
+    test_object,
+    manifest: Optional[OutputManifest] = None,
+    indent: Optional[int] = 4,
+    compressions: Iterable[str] = (),
+    name: Optional[str] = None,
+) -> bool:
+    """
+    Write test_object to {file_path}/{id}.json, skipping the write if unchanged.
+
+    name replaces the id in the file name. indent=None writes compact json, and
+    every entry of compressions ("gzip", "zstd") adds a compressed sibling such
+    as {id}.json.gz, which is rewritten with the json or when it is missing.
+    Returns whether the file or any sibling was (re)written.
+    """
+    filename = f"{name or _get(test_object, 'id')}.json"
+    path = Path(file_path) / filename
+    data = serialization.encode(test_object, indent=indent)
+    digest = _hash_bytes(data)
+    if manifest is not None:
+        current = manifest.is_current(filename, digest)
+    else:
+        current = path.exists() and _hash_bytes(path.read_bytes()) == digest
+    written = not current
+    if written:
+        _atomic_write(path, data)
+    for compression in compressions:
+        sibling_path = serialization.get_sibling_path(path, compression)
+        # siblings are recorded with the digest of the json they compress
+        if manifest is not None:
+            sibling_current = current and manifest.is_current(sibling_path.name, digest)
+        else:
+            sibling_current = current and sibling_path.exists()
+        if not sibling_current:
+            _atomic_write(sibling_path, serialization.compress(data, compression))
+            written = True
+        if manifest is not None:
+            manifest.record(sibling_path.name, digest)
+    if manifest is not None:
+        manifest.record(filename, digest)
+    return written
+
+
+def dump_all_to_json(
+    file_path,
+    test_objects,
+    workers: int = 8,
+    remove_orphans: bool = False,
+    **dump_options,
+) -> int:
+    """
+    Incrementally write many test objects into one directory.
+
+    test_objects is an iterable of objects named by their id, or a dict of
+    file names to objects. Unchanged files are skipped using the directory
+    manifest, and with remove_orphans previously generated files that were not
+    written again are deleted. Returns the number of files written.
+    """
+    if isinstance(test_objects, dict):
+        named_objects = test_objects.items()
+    else:
+        named_objects = ((None, test_object) for test_object in test_objects)
+    manifest = OutputManifest(file_path)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        written = sum(
+            pool.map(
+                lambda named: dump_to_json(file_path, named[1], manifest, name=named[0], **dump_options),
+                named_objects,
+            )
+        )
+    if remove_orphans:
+        manifest.remove_orphans()
+    manifest.save()
+    return written
+
+
+def remove_all_json(file_path, names: Iterable[str]) -> int:
+    """
+    Delete the {name}.json files of a directory written by dump_all_to_json,
+    with their compressed siblings and manifest entries. Returns the number
+    of files deleted.
+    """
+    manifest = OutputManifest(file_path)
+    removed = 0
+    for name in names:
+        siblings = [filename for filename in manifest.entries if filename.startswith(f"{name}.json.")]
+        for filename in [f"{name}.json", *siblings]:
+            removed += (manifest.file_path / filename).exists()
+            manifest.remove(filename)
+    manifest.save()
+    return removed
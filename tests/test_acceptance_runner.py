@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+from test_generators.acceptance_runner import AcceptanceRunner, evaluate, get_output_rank
+from test_generators.asset_sources import REPO_ROOT
+from test_generators.mock_trapi_server import MockTrapiServer, load_components
+from test_generators.performance_runner import RecordWriter, RunnerConfig
+from test_generators.tracing import OtlpJsonFileExporter, Tracer
+
+QUERY = {"message": {"query_graph": {"nodes": {"ON": {"ids": ["MONDO:0011705"]}, "SN": {}}, "edges": {}}}}
+
+
+def _load_spans(path):
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            for resource_spans in json.loads(line)["resourceSpans"]:
+                for scope_spans in resource_spans["scopeSpans"]:
+                    spans.extend(scope_spans["spans"])
+    return spans
+
+
+def _attributes(span):
+    return {item["key"]: next(iter(item["value"].values())) for item in span["attributes"]}
+
+
+def test_output_rank_and_verdicts():
+    message = {"results": [{"node_bindings": {"SN": [{"id": "CHEBI:1"}]}}, {"node_bindings": {"SN": [{"id": "CHEBI:2"}]}}]}
+    assert get_output_rank(message, QUERY, "CHEBI:2") == 2
+    assert get_output_rank(message, QUERY, "CHEBI:3") is None
+    assert evaluate("TopAnswer", 2) and not evaluate("TopAnswer", 31) and not evaluate("TopAnswer", None)
+    assert evaluate("Acceptable", 31) and not evaluate("Acceptable", None)
+    assert evaluate("NeverShow", None) and not evaluate("NeverShow", 1)
+    assert evaluate("BadButForgivable", 1)
+
+
+def test_acceptance_run_is_traced_down_to_assets(tmp_path):
+    with open(REPO_ROOT / "test_suites" / "prod_integration.json", encoding="utf-8") as f:
+        suite_json = json.load(f)
+    case_id = next(iter(suite_json["test_cases"]))
+    test_case = suite_json["test_cases"][case_id]
+    models = load_components({"components": {"ars": {"latency": {"distribution": "fixed", "median": 0.1}}}})
+    trace_path = tmp_path / "trace.jsonl"
+    records_path = tmp_path / "records.jsonl"
+    tracer = Tracer(OtlpJsonFileExporter(trace_path))
+    records = RecordWriter(records_path)
+    with MockTrapiServer(models) as mock:
+        config = RunnerConfig(endpoints=mock.endpoints(), ars_poll_interval=0.05, ars_timeout=10.0)
+        summaries = asyncio.run(AcceptanceRunner(suite_json, config, records, tracer).run([case_id]))
+    records.close()
+    tracer.close()
+
+    # the mock's results bind nothing, so only NeverShow assets pass
+    never_show = sum(asset["expected_output"] == "NeverShow" for asset in test_case["test_assets"])
+    assert summaries[case_id] == {"assets": len(test_case["test_assets"]), "passed": never_show}
+    spans = _load_spans(trace_path)
+    by_name = {}
+    for span in spans:
+        by_name.setdefault(span["name"], []).append(span)
+    (suite_span,) = by_name["suite"]
+    (case_span,) = by_name["test_case"]
+    (query_span,) = by_name["query"]
+    (ars_span,) = by_name["ars"]
+    assert _attributes(suite_span)["suite.id"] == suite_json["id"]
+    assert case_span["parentSpanId"] == suite_span["spanId"]
+    assert _attributes(case_span)["test_case.id"] == case_id
+    assert query_span["parentSpanId"] == case_span["spanId"]
+    assert ars_span["parentSpanId"] == query_span["spanId"]
+    assert by_name["ara"] and all(span["parentSpanId"] == ars_span["spanId"] for span in by_name["ara"])
+    assert all(span["parentSpanId"] == case_span["spanId"] for span in by_name["asset"])
+    assert [_attributes(span)["asset.id"] for span in by_name["asset"]] == [
+        asset["id"] for asset in test_case["test_assets"]
+    ]
+    with open(records_path, encoding="utf-8") as f:
+        assert [json.loads(line)["trace_id"] for line in f] == [case_span["traceId"]] * len(test_case["test_assets"])
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from test_generators.asset_index import AssetIndex
+from test_generators.asset_sources import AssetLoadReport, LocalCheckoutSource
+
+
+def _asset(asset_id, expected_output, well_known=None, predicate_name="treats"):
+    return {
+        "id": asset_id,
+        "input_id": "MONDO:0005148",
+        "predicate_name": predicate_name,
+        "expected_output": expected_output,
+        "well_known": well_known,
+        "qualifiers": [],
+    }
+
+
+@pytest.fixture
+def index():
+    return AssetIndex.from_json(
+        [
+            _asset("Asset_0", "TopAnswer", well_known=True),
+            _asset("Asset_1", "NeverShow", well_known=False),
+            _asset("Asset_2", "TopAnswer", predicate_name="affects"),
+            _asset("Asset_3", "Acceptable", well_known=True),
+        ]
+    )
+
+
+def test_select_matches_single_values_and_any_of_many(index):
+    assert index.select(expected_output="TopAnswer") == [0, 2]
+    assert index.select(expected_output=["TopAnswer", "Acceptable"], predicate_name="treats") == [0, 3]
+    assert index.select(expected_output="BadButForgivable") == []
+    assert index.select() == [0, 1, 2, 3]
+
+
+def test_select_normalizes_booleans_and_missing_values(index):
+    assert index.select(well_known=True) == [0, 3]
+    assert index.select(well_known="false") == [1]
+    assert index.select(well_known=None) == [2]
+    assert index.select(well_known=[False, None]) == [1, 2]
+
+
+def test_select_rejects_unknown_columns(index):
+    with pytest.raises(KeyError):
+        index.select(name="Asset_0")
+
+
+def test_rows_keep_their_json(index):
+    assert [index.asset_id(row) for row in index.select(predicate_name="affects")] == ["Asset_2"]
+    assert index.get_json(3) == _asset("Asset_3", "Acceptable", well_known=True)
+    assert index.values("expected_output") == {"TopAnswer": 2, "NeverShow": 1, "Acceptable": 1}
+
+
+def test_from_source_indexes_in_workers_like_from_json(tmp_path):
+    asset_dir = tmp_path / "test_assets"
+    asset_dir.mkdir()
+    assets = [_asset(f"Asset_{i}", ["TopAnswer", "NeverShow"][i % 2], well_known=i % 3 == 0) for i in range(40)]
+    for asset_json in assets:
+        (asset_dir / f"{asset_json['id']}.json").write_text(json.dumps(asset_json))
+    (asset_dir / "Asset_broken.json").write_text("{")
+    assets.sort(key=lambda asset_json: asset_json["id"])
+
+    report = AssetLoadReport()
+    index = AssetIndex.from_source(LocalCheckoutSource(tmp_path), workers=2, report=report)
+
+    assert (report.loaded, [name for name, _ in report.failures]) == (40, ["Asset_broken.json"])
+    assert [index.get_json(row) for row in range(len(index))] == assets
+    expected = AssetIndex.from_json(assets)
+    assert index.select(expected_output="NeverShow", well_known=True) == expected.select(
+        expected_output="NeverShow", well_known=True
+    )
@@ -0,0 +1,106 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from test_generators import biolink_index
+from test_generators.asset_sources import REPO_ROOT
+from test_generators.snapshot_diff import is_valid_row, iter_tsv_rows
+
+SNAPSHOT_PATH = REPO_ROOT / "test_generators" / "asset_backups" / "2024_06_20.tsv"
+
+
+class FakeToolkit:
+    """The parts of bmt.Toolkit the index is built from."""
+
+    pmap = {
+        "predicate mappings": [
+            {
+                "mapped predicate": "decreases activity or abundance of",
+                "predicate": "affects",
+                "object aspect qualifier": "activity or abundance",
+                "object direction qualifier": "decreased",
+                "qualified predicate": "causes",
+            },
+        ],
+    }
+    elements = {
+        "treats": SimpleNamespace(name="treats", aliases=["is treatment for"], id_prefixes=[], class_uri=None),
+        "disease": SimpleNamespace(name="disease", aliases=[], id_prefixes=["MONDO", "DOID"], class_uri="biolink:Disease"),
+        "chemical entity": SimpleNamespace(
+            name="chemical entity", aliases=[], id_prefixes=["PUBCHEM.COMPOUND", "DOID"], class_uri="biolink:ChemicalEntity"
+        ),
+    }
+
+    def get_all_elements(self):
+        return list(self.elements)
+
+    def get_element(self, name):
+        return self.elements.get(name, SimpleNamespace(id_prefixes=[], class_uri=None))
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(biolink_index, "_index", None)
+
+
+def test_load_index_builds_and_writes_the_snapshot_on_a_miss(tmp_path, monkeypatch, fresh_index):
+    index_path = tmp_path / "biolink_index.json"
+    monkeypatch.setattr(biolink_index, "get_toolkit", FakeToolkit)
+    index = biolink_index.load_index(index_path)
+
+    assert json.loads(index_path.read_text()) == index
+    assert biolink_index.get_converted_predicate("treats") == ("treats", "", "", "biolink:treats")
+    assert biolink_index.get_converted_predicate("is_treatment_for") == ("treats", "", "", "biolink:treats")
+    assert biolink_index.get_converted_predicate("decreases abundance or activity of") == (
+        "affects",
+        "activity or abundance",
+        "decreased",
+        "biolink:causes",
+    )
+    assert biolink_index.get_converted_predicate("unknown") == ("unknown", "", "", "")
+    # DOID is listed under both, the earlier category in CATEGORY_PRECEDENCE wins
+    assert biolink_index.get_category("DOID:1234") == "biolink:ChemicalEntity"
+
+    # a hit never constructs the toolkit
+    monkeypatch.setattr(biolink_index, "_index", None)
+    monkeypatch.setattr(biolink_index, "get_toolkit", pytest.fail)
+    assert biolink_index.load_index(index_path) == index
+
+
+def test_load_index_rebuilds_an_index_of_another_release(tmp_path, monkeypatch, fresh_index):
+    index_path = tmp_path / "biolink_index.json"
+    index_path.write_text(json.dumps({"biolink_version": "0.0.0", "predicates": {}, "categories": {}}))
+    monkeypatch.setattr(biolink_index, "get_toolkit", FakeToolkit)
+    assert biolink_index.load_index(index_path)["biolink_version"] == biolink_index.BIOLINK_VERSION
+    assert json.loads(index_path.read_text())["biolink_version"] == biolink_index.BIOLINK_VERSION
+
+
+@pytest.fixture
+def pinned_index(monkeypatch, fresh_index):
+    """The index of the pinned release, skipping when it is missing and cannot be downloaded."""
+    try:
+        return biolink_index.load_index()
+    except OSError as e:
+        pytest.skip(f"Biolink {biolink_index.BIOLINK_VERSION} index unavailable: {e}")
+
+
+def test_pinned_index_resolves_snapshot_predicates(pinned_index):
+    assert biolink_index.get_converted_predicate("treats") == ("treats", "", "", "biolink:treats")
+    predicate, aspect, direction, qualified_predicate = biolink_index.get_converted_predicate(
+        "decreases activity or abundance of"
+    )
+    assert (predicate, direction, qualified_predicate) == ("affects", "decreased", "biolink:causes")
+    assert aspect.replace(" ", "_") == "activity_or_abundance"
+    assert biolink_index.get_converted_predicate("increases activity or abundance of")[2] == "increased"
+
+
+def test_pinned_index_leaves_few_snapshot_rows_without_a_category(pinned_index):
+    rows = [row for row in iter_tsv_rows(SNAPSHOT_PATH) if is_valid_row(row)]
+    uncategorized = [
+        row["id"]
+        for row in rows
+        if biolink_index.get_category(row["InputID"]) is None or biolink_index.get_category(row["OutputID"]) is None
+    ]
+    # the rows left use misspelled or non-Biolink prefixes, e.g. UNNI, ChEBI, RXCUI
+    assert (len(rows), len(uncategorized)) == (658, 12)
@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from test_generators.capacity_search import SLO, CapacitySearch, StageResult, find_capacity, summarize_stage
+
+SEARCH = CapacitySearch(start_rps=1, max_rps=256, step_factor=2, resolution=0.1, slo=SLO(p95_latency=10))
+
+
+def _component(knee_rps):
+    """A component that answers in 1s up to knee_rps and in 20s above it."""
+
+    def measure(stage):
+        return StageResult(stage.target_rps, 100, 1.0 if stage.target_rps <= knee_rps else 20.0, 0.0)
+
+    return measure
+
+
+def test_find_capacity_brackets_the_knee_within_the_resolution():
+    result = find_capacity(SEARCH, _component(37))
+
+    assert result.saturated
+    assert 37 / (1 + SEARCH.resolution) <= result.knee_rps <= 37
+    rates = [stage.target_rps for stage in result.stages]
+    assert rates[:7] == [1, 2, 4, 8, 16, 32, 64]
+    assert len(rates) <= SEARCH.max_stages()
+
+
+def test_find_capacity_edges():
+    unsaturated = find_capacity(SEARCH, _component(1000))
+    assert (unsaturated.knee_rps, unsaturated.saturated) == (256, False)
+    overloaded = find_capacity(SEARCH, _component(0.5))
+    assert (overloaded.knee_rps, overloaded.saturated, len(overloaded.stages)) == (None, True, 1)
+
+
+def test_search_validation_and_round_trip():
+    assert CapacitySearch.from_json(SEARCH.to_json()) == SEARCH
+    with pytest.raises(ValueError):
+        CapacitySearch(arrival="closed")
+    with pytest.raises(ValueError):
+        CapacitySearch(start_rps=10, max_rps=5)
+
+
+def test_summarize_stage():
+    stage = summarize_stage(4, [0.1] * 19 + [5.0], errors=0, elapsed=5.0)
+    assert (stage.num_queries, stage.p95_latency, stage.error_rate, stage.achieved_rps) == (20, 0.1, 0.0, 4.0)
+    failed = summarize_stage(4, [], errors=3)
+    assert (failed.p95_latency, failed.error_rate) == (math.inf, 1.0)
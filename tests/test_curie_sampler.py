@@ -0,0 +1,55 @@
+from collections import Counter
+import json
+
+import pytest
+
+from test_generators.curie_sampler import CurieSampler, CurieSampling, get_pool_ref, get_seed, load_pool
+
+POOL = [f"CHEBI:{i}" for i in range(10)]
+QUERY = {"message": {"query_graph": {"nodes": {"n0": {"ids": POOL}, "n1": {"ids": ["MONDO:1"]}}, "edges": {}}}}
+
+
+def _sampler(num_curies=3, seed=1, **options):
+    return CurieSampler(CurieSampling("backup.json#kp/n0", num_curies, seed, **options), POOL)
+
+
+def test_sampling_without_replacement_uses_the_whole_pool_before_repeating():
+    sampler = _sampler()
+    samples = [sampler.sample(query_index) for query_index in range(3)]
+
+    assert all(len(sample) == 3 for sample in samples)
+    assert len({curie for sample in samples for curie in sample}) == 9
+    assert [_sampler().sample(query_index) for query_index in range(3)] == samples
+    assert _sampler(seed=2).sample(0) != samples[0]
+    # slices spanning two permutations still hold distinct curies
+    assert all(len(set(sampler.sample(query_index))) == 3 for query_index in range(20))
+
+
+def test_zipf_sampling_favours_popular_curies():
+    sampler = _sampler(num_curies=1, replacement=True, zipf_exponent=1.5)
+    counts = Counter(sampler.sample(query_index)[0] for query_index in range(2000))
+
+    assert counts.most_common(1)[0][0] == sampler.pool[0]
+    assert counts[sampler.pool[0]] > 5 * counts[sampler.pool[-1]]
+
+
+def test_invalid_samplings():
+    with pytest.raises(ValueError):
+        _sampler(num_curies=11)
+    with pytest.raises(ValueError):
+        CurieSampling("backup.json#kp/n0", 1, 0, zipf_exponent=1.0)
+    sampling = CurieSampling("backup.json#kp/n0", 2, 0, replacement=True)
+    assert CurieSampling.from_json(sampling.to_json()) == sampling
+
+
+def test_queries_are_filled_from_a_backup_pool(tmp_path):
+    (tmp_path / "backup.json").write_text(json.dumps({"kp": {"query": QUERY}}))
+    pool_ref = get_pool_ref("backup.json", "kp", QUERY)
+    assert pool_ref == "backup.json#kp/n0"
+    assert load_pool(pool_ref, tmp_path) == POOL
+
+    sampler = CurieSampler.from_spec(CurieSampling(pool_ref, 2, get_seed("case")), tmp_path)
+    query = sampler.query(QUERY, 4)
+    assert query["message"]["query_graph"]["nodes"]["n0"]["ids"] == sampler.sample(4)
+    assert QUERY["message"]["query_graph"]["nodes"]["n0"]["ids"] == POOL
+    assert get_seed("case") == get_seed("case") != get_seed("other case")
@@ -0,0 +1,57 @@
+import math
+import random
+
+import pytest
+
+from test_generators.latency_histogram import UNIT, LatencyHistogram
+
+
+def _histogram(latencies, **options):
+    histogram = LatencyHistogram(**options)
+    for latency in latencies:
+        histogram.record(latency)
+    return histogram
+
+
+def _exact_percentile(latencies, percentile):
+    ordered = sorted(latencies)
+    return ordered[max(1, math.ceil(percentile / 100 * len(ordered))) - 1]
+
+
+@pytest.mark.parametrize("significant_figures", [1, 2, 3])
+def test_percentiles_are_within_the_configured_precision(significant_figures):
+    rng = random.Random(significant_figures)
+    # from microseconds to minutes
+    latencies = [rng.lognormvariate(-4, 2.5) for _ in range(20000)]
+    histogram = _histogram(latencies, significant_figures=significant_figures)
+    size = len(histogram.counts)
+
+    for percentile in (0.1, 1, 10, 50, 90, 95, 99, 99.9, 100):
+        exact = _exact_percentile(latencies, percentile)
+        # bucket resolution plus rounding to whole microseconds
+        assert abs(histogram.percentile(percentile) - exact) <= exact * 10**-significant_figures + UNIT
+    assert len(histogram.counts) == size
+    assert histogram.total == len(latencies) and histogram.mean == pytest.approx(sum(latencies) / len(latencies))
+
+
+def test_merged_histograms_match_one_histogram_of_all_latencies():
+    rng = random.Random(0)
+    parts = [[rng.expovariate(2) for _ in range(500)] for _ in range(4)]
+    whole = _histogram([latency for part in parts for latency in part])
+    merged = LatencyHistogram.merged([_histogram(part) for part in parts])
+
+    assert merged.counts == whole.counts
+    assert (merged.total, merged.min, merged.max) == (whole.total, whole.min, whole.max)
+    assert merged.percentiles() == whole.percentiles()
+    assert LatencyHistogram.from_json(merged.to_json()).percentiles() == whole.percentiles()
+    with pytest.raises(ValueError):
+        merged.merge(LatencyHistogram(significant_figures=3))
+
+
+def test_latencies_out_of_range_count_in_the_top_bucket():
+    histogram = _histogram([0.5, 0.5, 7200.0], highest_trackable=3600.0)
+
+    assert histogram.counts[-1] == 1
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.01)
+    assert histogram.percentile(100) == 7200.0
+    assert LatencyHistogram().percentile(50) is None
@@ -0,0 +1,41 @@
+import time
+
+import httpx
+
+from test_generators.mock_trapi_server import MockTrapiServer, load_components
+
+QUERY = {"message": {"query_graph": {"nodes": {"n0": {"ids": ["MONDO:0005148"]}, "n1": {}}, "edges": {}}}}
+
+
+def _models(component, **model_json):
+    return load_components({"components": {component: model_json}})
+
+
+def test_keep_alive_requests_add_no_latency_floor():
+    fixed_zero = {"distribution": "fixed", "median": 0.0}
+    with MockTrapiServer(_models("ara", latency=fixed_zero)) as mock, httpx.Client() as client:
+        url = mock.endpoints()["ara"]
+        client.post(url, json=QUERY)
+        start = time.perf_counter()
+        for _ in range(20):
+            assert client.post(url, json=QUERY).status_code == 200
+        # with Nagle's algorithm on, every response waited ~40 ms for a delayed ACK
+        assert (time.perf_counter() - start) / 20 < 0.02
+
+
+def test_ars_rejects_submissions_beyond_max_concurrency():
+    models = _models("ars", latency={"distribution": "fixed", "median": 5.0}, max_concurrency=1, overload="reject")
+    with MockTrapiServer(models) as mock, httpx.Client(base_url=mock.base_url) as client:
+        assert client.post("/ars/api/submit", json=QUERY).status_code == 200
+        assert client.post("/ars/api/submit", json=QUERY).status_code == 429
+        assert mock.stats()["ars"] == {"requests": 2, "rejected": 1}
+
+
+def test_ars_queues_submissions_beyond_max_concurrency():
+    models = _models("ars", latency={"distribution": "fixed", "median": 0.3}, max_concurrency=1)
+    with MockTrapiServer(models) as mock, httpx.Client(base_url=mock.base_url) as client:
+        pks = [client.post("/ars/api/submit", json=QUERY).json()["pk"] for _ in range(2)]
+        time.sleep(0.4)
+        statuses = [client.get(f"/ars/api/messages/{pk}").json()["fields"]["status"] for pk in pks]
+        # the second message only started when the first finished
+        assert statuses == ["Done", "Running"]
@@ -0,0 +1,70 @@
+import random
+
+from test_generators.performance_compare import (
+    ComparisonSettings,
+    cliffs_delta,
+    compare_case,
+    compare_results,
+    mann_whitney,
+)
+from test_generators.performance_results import CaseResult, PerformanceResults
+
+SETTINGS = ComparisonSettings(resamples=200)
+
+
+def _latencies(seed, num_queries=300, scale=1.0):
+    rng = random.Random(seed)
+    return [scale * rng.lognormvariate(0, 0.3) for _ in range(num_queries)]
+
+
+def _result(latencies, errors=0):
+    result = CaseResult()
+    for latency in latencies:
+        result.add_record({"ok": True, "latency": latency, "status_code": 200})
+    for _ in range(errors):
+        result.add_record({"ok": False, "status_code": 500})
+    return result
+
+
+def test_rank_statistics_of_identical_runs():
+    result = _result(_latencies(0))
+    u, z, p_value = mann_whitney(result.histogram, result.histogram)
+
+    assert u == result.queries**2 / 2 and (z, p_value) == (0.0, 1.0)
+    assert cliffs_delta(u, result.queries, result.queries) == 0.0
+
+
+def test_verdicts():
+    baseline = _result(_latencies(0))
+
+    assert compare_case(baseline, _result(_latencies(1)), SETTINGS)["verdict"] == "unchanged"
+    slower = compare_case(baseline, _result(_latencies(1, scale=1.5)), SETTINGS)
+    assert slower["verdict"] == "regressed" and slower["effect"] == "large"
+    assert slower["percentiles"]["p95"]["difference_ci"][0] > 0
+    faster = compare_case(baseline, _result(_latencies(1, scale=0.6)), SETTINGS)
+    assert faster["verdict"] == "improved" and faster["cliffs_delta"] < 0
+    # as fast, but failing more often
+    failing = compare_case(baseline, _result(_latencies(1), errors=60), SETTINGS)
+    assert failing["verdict"] == "regressed" and failing["error_rate"]["p_value"] < SETTINGS.alpha
+
+
+def test_verdicts_without_enough_latencies():
+    baseline = _result(_latencies(0))
+
+    assert compare_case(baseline, _result(_latencies(1, num_queries=5)), SETTINGS)["verdict"] == "insufficient_data"
+    assert compare_case(baseline, CaseResult(), SETTINGS)["verdict"] == "insufficient_data"
+    # too few successful queries to compare latencies, but the errors alone regressed
+    assert compare_case(baseline, _result(_latencies(1, num_queries=5), errors=200), SETTINGS)["verdict"] == "regressed"
+
+
+def test_compare_results_counts_verdicts_per_case_and_component():
+    baseline, candidate = PerformanceResults(), PerformanceResults()
+    baseline.results[("case_a", "ars")] = _result(_latencies(0))
+    candidate.results[("case_a", "ars")] = _result(_latencies(1, scale=1.5))
+    baseline.results[("case_b", "ars")] = _result(_latencies(2))
+    candidate.results[("case_c", "ars")] = _result(_latencies(3))
+
+    comparison = compare_results(baseline, candidate, SETTINGS)
+
+    assert comparison["verdicts"] == {"regressed": 1, "missing_candidate": 1, "missing_baseline": 1}
+    assert comparison["comparisons"]["case_b"]["ars"] == {"verdict": "missing_candidate"}
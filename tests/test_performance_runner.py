@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+from test_generators import performance_runner
+from test_generators.asset_sources import REPO_ROOT
+from test_generators.capacity_search import CapacitySearch
+from test_generators.load_profiles import LoadProfile, concurrent, sequential
+from test_generators.mock_trapi_server import ARS_AGENTS, MockTrapiServer, load_components
+from test_generators.performance_runner import PerformanceRunner, RecordWriter, RunnerConfig
+from test_generators.tracing import OtlpJsonFileExporter, Tracer
+
+QUERY = {"message": {"query_graph": {"nodes": {"n0": {"ids": ["MONDO:0005148"]}, "n1": {}}, "edges": {}}}}
+SUITE = {
+    "id": "TestSuite_ars",
+    "query_pool": {"query_0": QUERY},
+    "test_cases": {
+        "TestCase_ars": {
+            "id": "TestCase_ars",
+            "components": ["ars"],
+            "query_ref": "query_0",
+            "load_profile": sequential(1).to_json(),
+        },
+    },
+}
+
+
+def _load_spans(path):
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            for resource_spans in json.loads(line)["resourceSpans"]:
+                for scope_spans in resource_spans["scopeSpans"]:
+                    spans.extend(scope_spans["spans"])
+    return spans
+
+
+def test_ars_children_are_traced_as_child_spans(tmp_path):
+    models = load_components({"components": {"ars": {"latency": {"distribution": "fixed", "median": 0.2}}}})
+    trace_path = tmp_path / "trace.jsonl"
+    tracer = Tracer(OtlpJsonFileExporter(trace_path))
+    records = RecordWriter()
+    with MockTrapiServer(models) as mock:
+        config = RunnerConfig(endpoints=mock.endpoints(), ars_poll_interval=0.05, ars_timeout=10.0)
+        runner = PerformanceRunner(SUITE, config, records, tracer)
+        summaries = asyncio.run(runner.run(["TestCase_ars"]))
+    tracer.close()
+
+    assert summaries["TestCase_ars"]["stages"][0]["error_rate"] == 0.0
+    spans = _load_spans(trace_path)
+    (ars_span,) = [span for span in spans if span["name"] == "ars"]
+    ara_spans = [span for span in spans if span["name"] == "ara"]
+    assert all(span["parentSpanId"] == ars_span["spanId"] for span in ara_spans)
+    attributes = [{item["key"]: item["value"] for item in span["attributes"]} for span in ara_spans]
+    assert sorted(attribute["ara.agent"]["stringValue"] for attribute in attributes) == sorted(ARS_AGENTS)
+    assert all(attribute["ara.status"]["stringValue"] == "Done" for attribute in attributes)
+    assert all(int(span["endTimeUnixNano"]) <= int(ars_span["endTimeUnixNano"]) for span in ara_spans)
+
+
+def test_failing_queries_are_recorded_without_aborting_the_case(tmp_path, monkeypatch):
+    async def non_dict_body(*args):
+        raise TypeError("list indices must be integers or slices, not str")
+
+    monkeypatch.setattr(performance_runner, "query_ars", non_dict_body)
+    suite_json = {
+        "id": "TestSuite_errors",
+        "query_pool": {"query_0": QUERY},
+        "test_cases": {
+            case_id: {
+                "id": case_id,
+                "components": [component],
+                "query_ref": "query_0",
+                "load_profile": concurrent(3).to_json(),
+            }
+            for case_id, component in [("TestCase_ars", "ars"), ("TestCase_ara", "ara")]
+        },
+    }
+    records_path = tmp_path / "records.jsonl"
+    config = RunnerConfig(endpoints={"ars": "http://127.0.0.1:1", "ara": "http://[::1/query"})
+    for _ in range(2):
+        records = RecordWriter(records_path)
+        asyncio.run(PerformanceRunner(suite_json, config, records).run(["TestCase_ars", "TestCase_ara"]))
+        records.close()
+
+    # the second run replaced the records of the first
+    with open(records_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 6 and not any(record["ok"] for record in records)
+    errors = {record["case_id"]: record["error"].split(":")[0] for record in records}
+    assert errors == {"TestCase_ars": "TypeError", "TestCase_ara": "InvalidURL"}
+
+
+def test_committed_performance_suite_is_runnable():
+    with open(REPO_ROOT / "test_suites" / "performance_tests.json", encoding="utf-8") as f:
+        suite_json = json.load(f)
+    pool = suite_json["query_pool"]
+    for test_case in suite_json["test_cases"].values():
+        assert test_case["query_ref"] in pool
+        assert all(query_ref in pool for query_ref in test_case.get("query_refs") or [])
+        if "capacity_search" in test_case:
+            CapacitySearch.from_json(test_case["capacity_search"])
+        else:
+            LoadProfile.from_json(test_case["load_profile"])
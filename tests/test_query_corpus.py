@@ -0,0 +1,64 @@
+from collections import Counter
+
+import pytest
+
+from test_generators.query_corpus import build_creative_query, build_query_corpus, get_query_shape, select_queries
+
+
+def _asset(input_id, predicate_name="treats", direction=None, input_category="biolink:Disease"):
+    qualifiers = []
+    if direction:
+        qualifiers = [
+            {"parameter": "biolink_qualified_predicate", "value": "biolink:causes"},
+            {"parameter": "biolink_object_direction_qualifier", "value": direction},
+        ]
+    return {
+        "input_id": input_id,
+        "input_category": input_category,
+        "predicate_name": predicate_name,
+        "predicate_id": f"biolink:{predicate_name}",
+        "output_category": "biolink:ChemicalEntity",
+        "qualifiers": qualifiers,
+    }
+
+
+def test_creative_queries_follow_their_asset():
+    query = build_creative_query(_asset("CHEBI:1", "affects", "increased", input_category="biolink:ChemicalEntity"))
+    graph = query["message"]["query_graph"]
+
+    assert graph["nodes"]["SN"]["ids"] == ["CHEBI:1"]
+    assert graph["edges"]["t_edge"]["qualifier_constraints"] == [
+        {
+            "qualifier_set": [
+                {"qualifier_type_id": "biolink:qualified_predicate", "qualifier_value": "biolink:causes"},
+                {"qualifier_type_id": "biolink:object_direction_qualifier", "qualifier_value": "increased"},
+            ]
+        }
+    ]
+    assert build_creative_query(_asset("MONDO:1"))["message"]["query_graph"]["nodes"]["ON"]["ids"] == ["MONDO:1"]
+    assert build_creative_query({**_asset("MONDO:1"), "output_category": None}) is None
+
+
+def test_corpus_groups_distinct_queries_by_shape():
+    assets = [_asset(f"MONDO:{i}") for i in range(30)] + [_asset("MONDO:0")]
+    assets += [_asset(f"CHEBI:{i}", "affects", "increased") for i in range(10)]
+    corpus = build_query_corpus(assets)
+
+    assert {shape: len(queries) for shape, queries in corpus.items()} == {"treats": 30, "affects_increased": 10}
+    assert get_query_shape(assets[-1]) == "affects_increased"
+
+
+def test_selection_follows_the_mix_and_seed():
+    corpus = build_query_corpus(
+        [_asset(f"MONDO:{i}") for i in range(30)] + [_asset(f"CHEBI:{i}", "affects", "increased") for i in range(10)]
+    )
+    mix = {"treats": 0.5, "affects_increased": 0.5}
+    selected = select_queries(corpus, 16, mix, seed=1)
+
+    edges = [query["message"]["query_graph"]["edges"]["t_edge"] for query in selected]
+    assert Counter("qualifier_constraints" in edge for edge in edges) == {False: 8, True: 8}
+    assert select_queries(corpus, 16, mix, seed=1) == selected
+    # a shape short of queries leaves its share to the others
+    assert len(select_queries(corpus, 30, mix)) == 30
+    with pytest.raises(ValueError):
+        select_queries(corpus, 4, {"affects_decreased": 1})
@@ -0,0 +1,56 @@
+import json
+
+from test_generators.asset_sources import REPO_ROOT
+from test_generators.query_pool import QueryPool, QueryResolver, get_query_ref, inline_queries
+
+QUERY = {"message": {"query_graph": {"nodes": {"n0": {"ids": ["A", "B", "C"]}, "n1": {}}, "edges": {}}}}
+OTHER_QUERY = {"message": {"query_graph": {"nodes": {"n0": {"ids": ["D"]}, "n1": {}}, "edges": {}}}}
+
+
+def test_pool_keeps_each_distinct_query_once():
+    pool = QueryPool()
+    reordered = {"message": {"query_graph": {"edges": {}, "nodes": {"n1": {}, "n0": {"ids": ["A", "B", "C"]}}}}}
+
+    assert pool.add(QUERY) == pool.add(reordered) == get_query_ref(QUERY)
+    assert pool.add_all([QUERY, OTHER_QUERY]) == [get_query_ref(QUERY), get_query_ref(OTHER_QUERY)]
+    assert len(pool) == 2
+
+
+def test_resolver_builds_the_queries_cases_send():
+    pool = QueryPool()
+    query_ref, other_ref = pool.add_all([QUERY, OTHER_QUERY])
+    suite_json = {
+        "query_pool": pool.to_json(),
+        "test_cases": {
+            "cut": {"id": "cut", "query_ref": query_ref, "num_curies": 2},
+            "round_robin": {"id": "round_robin", "query_ref": query_ref, "query_refs": [query_ref, other_ref]},
+            "embedded": {"id": "embedded", "query": OTHER_QUERY},
+        },
+    }
+    resolver = QueryResolver(suite_json)
+    cases = suite_json["test_cases"]
+
+    assert resolver.resolve_query(cases["cut"])["message"]["query_graph"]["nodes"]["n0"]["ids"] == ["A", "B"]
+    assert [resolver.resolve_query(cases["round_robin"], index) for index in range(3)] == [QUERY, OTHER_QUERY, QUERY]
+    assert resolver.resolve_query(cases["embedded"]) == OTHER_QUERY
+    # resolved queries are copies
+    resolver.resolve_query(cases["round_robin"])["bypass_cache"] = True
+    assert "bypass_cache" not in suite_json["query_pool"][query_ref]
+    inlined = inline_queries(suite_json)
+    assert "query_pool" not in inlined and inlined["test_cases"]["round_robin"]["query"] == QUERY
+
+
+def test_sampled_cases_of_the_performance_suite_vary_their_curies():
+    with open(REPO_ROOT / "test_suites" / "performance_tests.json", encoding="utf-8") as f:
+        suite_json = json.load(f)
+    test_case = next(case for case in suite_json["test_cases"].values() if case.get("curie_sampling"))
+    resolver = QueryResolver(suite_json)
+    node_id = test_case["curie_sampling"]["pool_ref"].rsplit("/", 1)[1]
+
+    def get_ids(resolver, index):
+        return resolver.resolve_query(test_case, index)["message"]["query_graph"]["nodes"][node_id]["ids"]
+
+    ids = [get_ids(resolver, index) for index in range(2)]
+    assert all(len(query_ids) == test_case["num_curies"] for query_ids in ids)
+    assert ids[0] != ids[1]
+    assert get_ids(QueryResolver(suite_json), 1) == ids[1]
@@ -0,0 +1,100 @@
+import json
+import logging
+
+import pytest
+
+from test_generators import asset_sources, generate_suite_for_demo, snapshot_diff
+from test_generators.snapshot_diff import apply_diff, diff_snapshots
+
+COLUMNS = [
+    "id",
+    "Relationship",
+    "Settings",
+    "InputName",
+    "InputID",
+    "OutputName",
+    "OutputID",
+    "Expected Result / Suggested Comparator",
+]
+OLD_ROWS = [
+    ["asset:1", "treats", "inferred", "diabetes", "MONDO:1", "metformin", "CHEBI:1", "1_TopAnswer"],
+    ["asset:2", "treats", "inferred", "diabetes", "MONDO:1", "insulin", "CHEBI:2", "2_Acceptable"],
+    ["asset:3", "treats", "inferred", "asthma", "MONDO:2", "salbutamol", "CHEBI:3", "1_TopAnswer"],
+    ["asset:4", "treats", "inferred", "gout", "MONDO:3", "colchicine", "CHEBI:4", "1_TopAnswer"],
+    ["asset:7", "treats", "inferred", "acne", "MONDO:9", "isotretinoin", "CHEBI:7", "1_TopAnswer"],
+]
+NEW_ROWS = [
+    # only the case of the settings changed
+    ["asset:1", "treats", "Inferred", "diabetes", "MONDO:1", "metformin", "CHEBI:1", "1_TopAnswer"],
+    ["asset:2", "treats", "inferred", "diabetes", "MONDO:1", "insulin", "CHEBI:2", "4_NeverShow"],
+    # moves from the asthma case, which is left empty, to the gout case
+    ["asset:3", "treats", "inferred", "gout", "MONDO:3", "salbutamol", "CHEBI:3", "4_NeverShow"],
+    ["asset:5", "treats", "inferred", "diabetes", "MONDO:1", "aspirin", "CHEBI:5", "4_NeverShow"],
+    ["asset:6", "treats", "inferred", "gout", "MONDO:3", "ibuprofen", "CHEBI:6", "2_Acceptable"],
+    ["asset:6", "treats", "inferred", "gout", "MONDO:3", "ibuprofen", "", "2_Acceptable"],
+    ["asset:7", "treats", "inferred", "acne", "MONDO:9", "isotretinoin", "CHEBI:7", "1_TopAnswer"],
+]
+
+
+def _write_tsv(path, rows):
+    path.write_text("\n".join("\t".join(row) for row in [COLUMNS, *rows]) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_suite_for_demo, "get_converted_predicate", lambda predicate: (predicate, "", "", ""))
+    monkeypatch.setattr(generate_suite_for_demo, "get_category", lambda curie: "biolink:NamedThing")
+    empty = _write_tsv(tmp_path / "empty.tsv", [])
+    old = _write_tsv(tmp_path / "old.tsv", OLD_ROWS)
+    new = _write_tsv(tmp_path / "new.tsv", NEW_ROWS)
+    return empty, old, new
+
+
+def _load_cases(case_dir):
+    return {path.name: json.loads(path.read_text()) for path in case_dir.glob("TestCase-*.json")}
+
+
+def test_diff_snapshots_keeps_the_last_of_duplicate_rows(snapshots, caplog):
+    _, old, new = snapshots
+    with caplog.at_level(logging.WARNING, logger=snapshot_diff.__name__):
+        report = diff_snapshots(old, new)
+
+    assert report["added"] == ["asset:5"]
+    assert report["removed"] == ["asset:4"]
+    assert report["changed"] == ["asset:2", "asset:3"]
+    assert set(report["rows"]) == {"asset:2", "asset:3", "asset:5"}
+    assert "asset:1" not in report["changes"]
+    assert "Duplicate id asset:6" in caplog.text
+
+
+def test_apply_diff_only_rebuilds_the_affected_cases(tmp_path, monkeypatch, snapshots):
+    empty, old, new = snapshots
+    asset_dir, case_dir = tmp_path / "test_assets", tmp_path / "test_cases"
+    asset_dir.mkdir()
+    case_dir.mkdir()
+    apply_diff(diff_snapshots(empty, old), asset_dir, case_dir, tmp_path)
+    before = _load_cases(case_dir)
+    assert len(before) == 4
+    mtimes = {path.name: path.stat().st_mtime_ns for path in case_dir.glob("TestCase-*.json")}
+
+    with monkeypatch.context() as patch:
+        patch.setattr(asset_sources, "load_test_assets", None)  # the asset directory is not read back
+        apply_diff(diff_snapshots(old, new), asset_dir, case_dir, tmp_path)
+
+    asset_ids = sorted(path.stem for path in asset_dir.glob("asset_*.json"))
+    assert asset_ids == ["asset_1", "asset_2", "asset_3", "asset_5", "asset_7"]
+    after = _load_cases(case_dir)
+    assets = {case["test_case_input_id"]: [asset["id"] for asset in case["test_assets"]] for case in after.values()}
+    assert assets == {"MONDO:1": ["asset_1", "asset_2", "asset_5"], "MONDO:3": ["asset_3"], "MONDO:9": ["asset_7"]}
+    (acne_case,) = [name for name, case in after.items() if case["test_case_input_id"] == "MONDO:9"]
+    assert after[acne_case] == before[acne_case]
+    assert (case_dir / acne_case).stat().st_mtime_ns == mtimes[acne_case]
+    manifest = json.loads((case_dir / ".manifest.json").read_text())
+    assert sorted(manifest) == sorted(after)
+
+    # the same cases as regenerating all of them from the assets
+    full_dir = tmp_path / "full"
+    full_dir.mkdir()
+    snapshot_diff._regenerate_test_cases(asset_dir, full_dir, tmp_path)
+    assert _load_cases(full_dir) == after
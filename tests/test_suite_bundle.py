@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from test_generators.asset_sources import REPO_ROOT
+from test_generators.suite_bundle import BundleReader, verify_bundle, write_bundle
+from test_generators.suite_store import derive_overlay
+
+
+def _load_suite(suite_id, num_cases=3):
+    with open(REPO_ROOT / "test_suites" / f"{suite_id}.json", encoding="utf-8") as f:
+        suite_json = json.load(f)
+    suite_json["test_cases"] = dict(list(suite_json["test_cases"].items())[:num_cases])
+    return suite_json
+
+
+def test_bundle_round_trip(tmp_path):
+    base, variant = _load_suite("sprint_3_tests"), _load_suite("sprint_3_tests_PROD")
+    base_copy = {**base, "id": "sprint_3_tests_copy"}
+    bundle_path = tmp_path / "suites.bundle"
+
+    # small blocks, so cases and assets span several of them
+    counts = write_bundle(bundle_path, [base, base_copy], [derive_overlay(base, variant)], block_size=1024)
+
+    # the copy shares the cases and assets of base
+    assert counts["suites"] == 3 and counts["cases"] == len(base["test_cases"])
+    with BundleReader(bundle_path) as reader:
+        assert len(reader.index["blocks"]) > 1
+        assert reader.suite_ids() == sorted([base["id"], base_copy["id"], variant["id"]])
+        assert reader.is_overlay(variant["id"])
+        assert reader.load_suite_json(variant["id"]) == variant
+        case_id = next(iter(base["test_cases"]))
+        assert reader.get_test_case_json(base_copy["id"], case_id) == base["test_cases"][case_id]
+        with pytest.raises(KeyError):
+            reader.get_asset_json("test_assets/Asset_0@000000000000")
+
+    suite_dir = tmp_path / "suites"
+    suite_dir.mkdir()
+    for suite_json in (base, base_copy, variant):
+        (suite_dir / f"{suite_json['id']}.json").write_text(json.dumps(suite_json))
+    assert verify_bundle(bundle_path, suite_dir) == []
+    (suite_dir / f"{base['id']}.json").write_text(json.dumps({**base, "name": "changed"}))
+    assert verify_bundle(bundle_path, suite_dir) == [base["id"]]
+
+
+def test_truncated_bundles_are_rejected(tmp_path):
+    bundle_path = tmp_path / "suites.bundle"
+    write_bundle(bundle_path, [_load_suite("sprint_3_tests", 1)])
+    bundle_path.write_bytes(bundle_path.read_bytes()[:-4])
+
+    with pytest.raises(ValueError):
+        BundleReader(bundle_path)
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from test_generators.asset_sources import REPO_ROOT
+from test_generators.suite_reader import SuiteReader
+
+SUITE_PATH = REPO_ROOT / "test_suites" / "semantic_smoke_test_suite_CI.json"
+
+
+def test_start_at_streaming_and_indexed_agree():
+    streamed = SuiteReader(SUITE_PATH, chunk_size=256)
+    case_ids = [test_case.id for test_case in streamed.iter_test_cases()]
+    start_at = case_ids[2]
+    assert [test_case.id for test_case in SuiteReader(SUITE_PATH).iter_test_cases(start_at)] == case_ids[2:]
+    # streamed is indexed now, so this reads by seeking
+    assert [test_case.id for test_case in streamed.iter_test_cases(start_at)] == case_ids[2:]
+
+
+def test_unknown_start_at_raises_key_error():
+    reader = SuiteReader(SUITE_PATH)
+    with pytest.raises(KeyError):
+        list(reader.iter_test_cases(start_at="TestCase_missing"))
+    assert reader.case_index is not None
+    with pytest.raises(KeyError):
+        list(reader.iter_test_cases(start_at="TestCase_missing"))
+
+
+def test_cases_larger_than_a_chunk_keep_exact_byte_ranges(tmp_path):
+    big_case = {"id": "TestCase_big", "name": "ü" * 5000, "test_assets": [{"id": "Asset_é", "numbers": list(range(2000))}]}
+    suite_json = {"id": "TestSuite_big", "test_cases": {"TestCase_0": {"id": "TestCase_0"}, "TestCase_big": big_case}}
+    path = tmp_path / "suite.json"
+    path.write_text(json.dumps(suite_json, ensure_ascii=False, indent=2), encoding="utf-8")
+    reader = SuiteReader(path, chunk_size=64)
+    assert [case_id for case_id, _ in reader.iter_case_json()] == ["TestCase_0", "TestCase_big"]
+    assert reader.get_case_json("TestCase_big") == big_case
+    assert reader.load_suite_json() == suite_json
@@ -0,0 +1,71 @@
+import copy
+import json
+
+import pytest
+
+from test_generators.asset_sources import REPO_ROOT
+from test_generators.suite_store import SuiteStore, derive_overlay, write_normalized_suite, write_suite_overlay
+
+
+def _load_suite(suite_id, num_cases=3):
+    with open(REPO_ROOT / "test_suites" / f"{suite_id}.json", encoding="utf-8") as f:
+        suite_json = json.load(f)
+    suite_json["test_cases"] = dict(list(suite_json["test_cases"].items())[:num_cases])
+    return suite_json
+
+
+@pytest.fixture
+def suites():
+    return _load_suite("sprint_3_tests"), _load_suite("sprint_3_tests_PROD")
+
+
+def _stored(store_root, subdir):
+    return sorted(path.name for path in (store_root / subdir).glob("*.json") if not path.name.startswith("."))
+
+
+def test_suites_and_overlays_round_trip(tmp_path, suites):
+    base, variant = suites
+    overlay = derive_overlay(base, variant)
+    assert overlay is not None and overlay["test_cases"] == {"test_env": "prod"}
+    write_normalized_suite(base, tmp_path)
+    write_suite_overlay(overlay, tmp_path)
+
+    store = SuiteStore(tmp_path)
+    assert store.suite_ids() == [base["id"], variant["id"]]
+    assert store.load_suite_json(base["id"]) == base
+    assert store.load_suite_json(variant["id"]) == variant
+    assert store.load_suite(variant["id"]).test_cases[next(iter(variant["test_cases"]))].test_env == "prod"
+
+    # callers get their own objects, not the cached ones
+    case_id = next(iter(base["test_cases"]))
+    store.get_test_case_json(base["id"], case_id)["test_assets"][0]["name"] = "changed"
+    store.get_suite_ref(base["id"])["test_cases"].clear()
+    assert store.load_suite_json(base["id"]) == base
+
+
+def test_fixing_an_asset_replaces_its_versions(tmp_path, suites):
+    base, _ = suites
+    base_copy = {**copy.deepcopy(base), "id": "sprint_3_tests_copy"}
+    write_normalized_suite(base, tmp_path)
+    write_normalized_suite(base_copy, tmp_path)
+    cases, assets = _stored(tmp_path, "cases"), _stored(tmp_path, "assets/test_assets")
+    # both suites share their cases
+    assert len(cases) == len(base["test_cases"])
+
+    case_id = next(iter(base["test_cases"]))
+    for suite_json in (base, base_copy):
+        suite_json["test_cases"][case_id]["test_assets"][0]["name"] += " (fixed)"
+    write_normalized_suite(base, tmp_path)
+    # the copy still refers to the old versions
+    assert len(_stored(tmp_path, "cases")) == len(cases) + 1
+    assert len(_stored(tmp_path, "assets/test_assets")) == len(assets) + 1
+
+    write_normalized_suite(base_copy, tmp_path)
+    new_cases, new_assets = _stored(tmp_path, "cases"), _stored(tmp_path, "assets/test_assets")
+    assert len(set(new_cases) - set(cases)) == 1 and len(new_cases) == len(cases)
+    assert len(set(new_assets) - set(assets)) == 1 and len(new_assets) == len(assets)
+    manifest = json.loads((tmp_path / "assets" / "test_assets" / ".manifest.json").read_text())
+    assert sorted(manifest) == new_assets
+    store = SuiteStore(tmp_path)
+    assert store.load_suite_json(base["id"]) == base
+    assert store.load_suite_json(base_copy["id"]) == base_copy
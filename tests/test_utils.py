@@ -0,0 +1,72 @@
+import json
+
+from test_generators import utils
+
+# a grouping key whose sha256 starts with twelve digits
+ALL_DIGIT_KEY = ("MONDO:0000207", "treats", "")
+
+
+def _asset(input_id, predicate_name="treats"):
+    return {"id": f"Asset_{input_id}", "input_id": input_id, "predicate_name": predicate_name, "qualifiers": []}
+
+
+def test_stable_id_is_never_a_legacy_id():
+    test_case_id = utils.get_test_case_id(ALL_DIGIT_KEY)
+    assert test_case_id == "TestCase-847835749658"
+    assert not utils.LEGACY_TEST_CASE_ID.match(test_case_id)
+    assert utils.LEGACY_TEST_CASE_ID.match("TestCase_12")
+
+
+def test_replace_legacy_test_cases_keeps_new_files(tmp_path):
+    legacy_case = {"id": "TestCase_0", "test_assets": [_asset("MONDO:0000207")]}
+    (tmp_path / "TestCase_0.json").write_text(json.dumps(legacy_case))
+    new_id = utils.get_test_case_id(ALL_DIGIT_KEY)
+    new_cases = [{"id": new_id, "test_assets": [_asset("MONDO:0000207")]}]
+
+    legacy_ids = utils.replace_legacy_test_cases(tmp_path, new_cases)
+
+    assert legacy_ids == {"TestCase_0": new_id}
+    assert sorted(path.name for path in tmp_path.glob("TestCase*.json")) == [f"{new_id}.json"]
+    # a second run finds no legacy files left and keeps the written case
+    assert utils.replace_legacy_test_cases(tmp_path, new_cases) == {}
+    assert (tmp_path / f"{new_id}.json").exists()
+
+
+def test_written_files_get_the_default_mode_or_keep_theirs(tmp_path):
+    utils.dump_to_json(tmp_path, {"id": "new"})
+    assert (tmp_path / "new.json").stat().st_mode & 0o777 == 0o666 & ~utils._UMASK
+    (tmp_path / "kept.json").write_text("{}")
+    (tmp_path / "kept.json").chmod(0o640)
+    utils.dump_to_json(tmp_path, {"id": "kept", "value": 1})
+    assert (tmp_path / "kept.json").stat().st_mode & 0o777 == 0o640
+
+
+def test_manifest_skips_unchanged_files_and_rewrites_changed_ones(tmp_path):
+    objects = [{"id": "a", "value": 1}, {"id": "b", "value": 2}]
+    assert utils.dump_all_to_json(tmp_path, objects, compressions=["gzip"]) == 2
+    assert utils.dump_all_to_json(tmp_path, objects, compressions=["gzip"]) == 0
+
+    # a checkout replaces a file behind the manifest's back, keeping its size
+    path = tmp_path / "a.json"
+    stale = path.read_bytes()
+    path.write_bytes(stale.replace(b"1", b"3"))
+    assert utils.dump_all_to_json(tmp_path, objects, compressions=["gzip"]) == 1
+    assert path.read_bytes() == stale
+
+    # a missing sibling is rewritten alone
+    (tmp_path / "b.json.gz").unlink()
+    assert utils.dump_all_to_json(tmp_path, objects, compressions=["gzip"]) == 1
+    assert (tmp_path / "b.json.gz").exists()
+
+    assert utils.dump_all_to_json(tmp_path, objects[:1], remove_orphans=True, compressions=["gzip"]) == 0
+    assert sorted(path.name for path in tmp_path.glob("[ab].json*")) == ["a.json", "a.json.gz"]
+
+
+def test_manifest_of_an_older_format_is_checked_against_the_files(tmp_path):
+    objects = [{"id": "a", "value": 1}]
+    utils.dump_all_to_json(tmp_path, objects)
+    manifest_path = tmp_path / utils.MANIFEST_FILENAME
+    (tmp_path / "a.json").write_text("{}")
+    manifest_path.write_text(json.dumps({"a.json": "0" * 64}))
+    assert utils.dump_all_to_json(tmp_path, objects) == 1
+    assert json.loads(manifest_path.read_text())["a.json"]["size"] == (tmp_path / "a.json").stat().st_size